@@ -1,4 +1,5 @@
 import copy
+import gzip
 import json
 import traceback
 from typing import Any, Callable, Dict
@@ -18,6 +19,9 @@ config: Dict[str, Any] = {}
 
 SUPPORTED_VERSIONS = ['v1']
 
+# Responses smaller than this aren't worth compressing.
+GZIP_MINIMUM_LENGTH = 1024
+
 
 def jsonify_response(data: Dict[str, Any], code: int=200) -> Response:
     return Response(
@@ -54,6 +58,17 @@ def after_request(response: Response) -> Response:
     response.cache_control.no_cache = True
     response.cache_control.must_revalidate = True
     response.cache_control.private = True
+
+    # Records and profiles compress very well, so save remote servers the transfer.
+    if (
+        'gzip' in request.accept_encodings and
+        'Content-Encoding' not in response.headers and
+        not response.direct_passthrough and
+        len(response.get_data()) >= GZIP_MINIMUM_LENGTH
+    ):
+        response.set_data(gzip.compress(response.get_data(), compresslevel=6))
+        response.headers['Content-Encoding'] = 'gzip'
+        response.vary.add('Accept-Encoding')
     return response
 
 
@@ -1,6 +1,7 @@
 import traceback
 from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
 
+from bemani.backend.cache import ResponseCache
 from bemani.common import Model, ValidatedDict, Time
 from bemani.data import Data, UserID, RemoteUser
 
@@ -128,6 +129,20 @@ class Base:
     """
     name = 'dummy'
 
+    """
+    Set of (service, method) pairs whose responses depend only on the game class,
+    the server configuration and the machine and arcade settings. Dispatch will
+    cache the encoded response to these. Extend this in your subclass.
+    """
+    cacheable_requests: Set[Tuple[str, str]] = set()
+
+    """
+    Set of (service, method) pairs whose handlers save many things at once, such as
+    several scores or a score along with a profile. Dispatch will run these in a single
+    DB transaction instead of committing each write separately. Extend this in your subclass.
+    """
+    transactional_requests: Set[Tuple[str, str]] = set()
+
     def __init__(self, data: Data, config: Dict[str, Any], model: Model) -> None:
         self.data = data
         self.config = config
@@ -281,20 +296,23 @@ class Base:
             profile = ValidatedDict()
         return profile
 
-    def get_any_profiles(self, userids: List[UserID]) -> List[Tuple[UserID, ValidatedDict]]:
+    def get_any_profiles(self, userids: List[UserID], fields: Optional[List[str]]=None) -> List[Tuple[UserID, ValidatedDict]]:
         """
         Does the identical thing to the above function, but takes a list of user IDs to
         fetch in bulk.
 
         Parameters:
             userids - List of user IDs we are getting the profile for.
+            fields - Optional list of top-level profile fields that the caller needs. Local
+                     profiles will only include these fields, which is much cheaper when
+                     looking at many profiles. Remote profiles may include more.
 
         Returns:
             A list of tuples with the User ID and dictionary representing the user's profile,
             or an empty dictionary if nothing was found.
         """
         userids = list(set(userids))
-        profiles = self.data.remote.user.get_any_profiles(self.game, self.version, userids)
+        profiles = self.data.remote.user.get_any_profiles(self.game, self.version, userids, fields)
         return [
             (userid, profile if profile is not None else ValidatedDict())
             for (userid, profile) in profiles
@@ -387,14 +405,16 @@ class Base:
     def update_machine_name(self, newname: Optional[str]) -> None:
         if newname is None:
             return
-        machine = self.data.local.machine.get_machine(self.config['machine']['pcbid'])
+        machine = self.data.local.machine.get_machine(self.config['machine']['pcbid'], cached=False)
         machine.name = newname
         self.data.local.machine.put_machine(machine)
+        ResponseCache.invalidate(machine.pcbid)
 
     def update_machine_data(self, newdata: Dict[str, Any]) -> None:
-        machine = self.data.local.machine.get_machine(self.config['machine']['pcbid'])
+        machine = self.data.local.machine.get_machine(self.config['machine']['pcbid'], cached=False)
         machine.data.update(newdata)
         self.data.local.machine.put_machine(machine)
+        ResponseCache.invalidate(machine.pcbid)
 
     def get_game_config(self) -> ValidatedDict:
         machine = self.data.local.machine.get_machine(self.config['machine']['pcbid'])
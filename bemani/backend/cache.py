@@ -0,0 +1,69 @@
+from typing import Hashable, Optional, Tuple
+
+from bemani.data.cache import TTLCache
+
+
+class ResponseCache:
+    """
+    A process-wide cache of already encoded response packets, keyed by everything
+    that a static response depends on. Dispatch uses this for requests that a game
+    class lists in its cacheable_requests, so that hot boot-time calls can skip
+    building and encoding a Node tree entirely. Entries expire after a TTL, and can
+    be explicitly invalidated when machine or arcade settings change.
+
+    The key includes the Machine and Arcade rows, which are themselves read through
+    MachineData's short-lived cache, so an operator edit made in another process can
+    take up to that cache's TTL to show up here.
+    """
+
+    # Number of seconds a cached response is good for.
+    TTL = 300
+
+    # Maximum number of responses we will remember at once.
+    MAX_ENTRIES = 4096
+
+    # Mapping of cache key to the PCBID it was generated for and the encoded response body.
+    __cache: TTLCache[Tuple[str, bytes]] = TTLCache(ttl=TTL, max_entries=MAX_ENTRIES)
+
+    @classmethod
+    def get(cls, key: Hashable) -> Optional[bytes]:
+        """
+        Look up a previously cached response.
+
+        Parameters:
+            key - A hashable key, as previously given to put().
+
+        Returns:
+            The encoded response body if it is cached and hasn't expired, or None.
+        """
+        entry = cls.__cache.get(key)
+        if entry is None:
+            return None
+        return entry[1]
+
+    @classmethod
+    def put(cls, key: Hashable, pcbid: str, data: bytes) -> None:
+        """
+        Cache an encoded response.
+
+        Parameters:
+            key - A hashable key that uniquely identifies this response.
+            pcbid - The PCBID of the machine that this response was generated for.
+            data - The encoded response body, before compression or encryption.
+        """
+        cls.__cache.put(key, (pcbid, data))
+
+    @classmethod
+    def invalidate(cls, pcbid: Optional[str]=None) -> None:
+        """
+        Throw away cached responses.
+
+        Parameters:
+            pcbid - If provided, only responses for this machine are thrown away.
+                    Otherwise, every cached response is thrown away, which is what
+                    should happen when an arcade's settings change.
+        """
+        if pcbid is None:
+            cls.__cache.invalidate()
+        else:
+            cls.__cache.invalidate_matching(lambda entry: entry[0] == pcbid)
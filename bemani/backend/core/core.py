@@ -10,6 +10,15 @@ class CoreHandler(Base):
     Implements the core packets that are shared across all games.
     """
 
+    cacheable_requests = Base.cacheable_requests | {
+        ('services', 'get'),
+        ('pcbtracker', 'alive'),
+        ('package', 'list'),
+        ('message', 'get'),
+        ('dlstatus', 'progress'),
+        ('facility', 'get'),
+    }
+
     def handle_services_get_request(self, request: Node) -> Node:
         """
         Handles a game request for services.get. This should return the URL of
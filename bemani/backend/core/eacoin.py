@@ -400,7 +400,7 @@ class PASELIHandler(Base):
                 root.set_attribute('status', str(Status.NO_PROFILE))
                 return root
 
-            arcade = self.data.local.machine.get_arcade(self.config['machine']['arcade'])
+            arcade = self.data.local.machine.get_arcade(self.config['machine']['arcade'], cached=False)
             if arcade is None:
                 # Refuse to do anything
                 print("No arcade for operator pass change request")
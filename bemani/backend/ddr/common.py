@@ -110,7 +110,7 @@ class DDRGameAreaHiscoreHandler(DDRBase):
 
         # First, get all users that are in the current shop's area
         area_users = {
-            uid: prof for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version)
+            uid: prof for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version, fields=['area', 'name'])
             if prof.get_int('area', 51) == shop_area
         }
 
@@ -56,6 +56,10 @@ class DDR2013(
     name = 'DanceDanceRevolution 2013'
     version = VersionConstants.DDR_2013
 
+    transactional_requests = DDRBase.transactional_requests | {
+        ('game', 'save_m'),
+    }
+
     GAME_STYLE_SINGLE = 0
     GAME_STYLE_DOUBLE = 1
     GAME_STYLE_VERSUS = 2
@@ -50,6 +50,10 @@ class DDR2014(
     name = 'DanceDanceRevolution 2014'
     version = VersionConstants.DDR_2014
 
+    transactional_requests = DDRBase.transactional_requests | {
+        ('game', 'save_m'),
+    }
+
     GAME_STYLE_SINGLE = 0
     GAME_STYLE_DOUBLE = 1
     GAME_STYLE_VERSUS = 2
@@ -18,6 +18,11 @@ class DDRAce(
     name = 'DanceDanceRevolution A'
     version = VersionConstants.DDR_ACE
 
+    transactional_requests = DDRBase.transactional_requests | {
+        ('playerdata', 'usergamedata_advanced'),
+        ('playerdata', 'usergamedata_send'),
+    }
+
     GAME_STYLE_SINGLE = 0
     GAME_STYLE_DOUBLE = 1
     GAME_STYLE_VERSUS = 2
@@ -46,6 +46,10 @@ class DDRX2(
     name = 'DanceDanceRevolution X2'
     version = VersionConstants.DDR_X2
 
+    transactional_requests = DDRBase.transactional_requests | {
+        ('game', 'save_m'),
+    }
+
     GAME_STYLE_SINGLE = 0
     GAME_STYLE_DOUBLE = 1
     GAME_STYLE_VERSUS = 2
@@ -52,6 +52,10 @@ class DDRX3(
     name = 'DanceDanceRevolution X3 VS 2ndMIX'
     version = VersionConstants.DDR_X3_VS_2NDMIX
 
+    transactional_requests = DDRBase.transactional_requests | {
+        ('game', 'save_m'),
+    }
+
     GAME_STYLE_SINGLE = 0
     GAME_STYLE_DOUBLE = 1
     GAME_STYLE_VERSUS = 2
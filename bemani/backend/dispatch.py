@@ -1,8 +1,9 @@
 import copy
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Hashable, Tuple
 
 from bemani.backend.base import Model, Base, Status
-from bemani.protocol import Node
+from bemani.backend.cache import ResponseCache
+from bemani.protocol import EAmuseProtocol, Node
 from bemani.data import Data
 
 
@@ -47,18 +48,84 @@ class Dispatch:
         if self.__verbose:
             print(msg.format(*args, **kwargs))
 
-    def handle(self, tree: Node) -> Optional[Node]:
+    def handle(self, tree: Node, client_address: Optional[str]=None) -> Optional[Node]:
         """
         Given a packet from a game, handle it and return a response.
 
         Parameters:
             tree - A Node representing the root of a tree. Expected to
                    come from an external game.
+            client_address - The address of the client that sent the packet. If not
+                             provided, the client section of our config is used.
 
         Returns:
             A Node representing the root of a response tree, or None if
             we had a problem parsing or generating a response.
         """
+        resolved = self.__resolve(tree, client_address)
+        if resolved is None:
+            return None
+
+        game, request, pcbid, _ = resolved
+        return self.__respond(game, request, pcbid)
+
+    def handle_encoded(self, tree: Node, proto: EAmuseProtocol, client_address: Optional[str]=None) -> Optional[bytes]:
+        """
+        Given a packet from a game, handle it and return an encoded response, ready
+        to be compressed and encrypted. If the game class says that the response
+        only depends on configuration, it is served from the response cache.
+
+        Parameters:
+            tree - A Node representing the root of a tree. Expected to
+                   come from an external game.
+            proto - The EAmuseProtocol instance that decoded the tree, which will be
+                    used to encode the response.
+            client_address - The address of the client that sent the packet. If not
+                             provided, the client section of our config is used.
+
+        Returns:
+            The encoded response, or None if we had a problem parsing or generating
+            a response.
+        """
+        resolved = self.__resolve(tree, client_address)
+        if resolved is None:
+            return None
+
+        game, request, pcbid, key = resolved
+        if game is None or (request.name, request.attribute('method')) not in game.cacheable_requests:
+            response = self.__respond(game, request, pcbid)
+            if response is None:
+                return None
+            return proto.encode_tree(response)
+
+        key = (key, proto.last_text_encoding, proto.last_packet_encoding)
+        data = ResponseCache.get(key)
+        if data is not None:
+            self.log("Sending cached response for {}.{}", request.name, request.attribute('method'))
+            return data
+
+        response = self.__respond(game, request, pcbid)
+        if response is None:
+            return None
+        data = proto.encode_tree(response)
+        ResponseCache.put(key, pcbid, data)
+        return data
+
+    def __resolve(self, tree: Node, client_address: Optional[str]) -> Optional[Tuple[Optional[Base], Node, str, Hashable]]:
+        """
+        Given a packet from a game, look up the machine and game class that
+        should handle it.
+
+        Parameters:
+            tree - A Node representing the root of a tree. Expected to
+                   come from an external game.
+            client_address - The address of the client that sent the packet, or None.
+
+        Returns:
+            A tuple of the game class, the request node, the PCBID of the machine
+            and a key that uniquely identifies everything a static response could
+            depend on, or None if we had a problem parsing the request.
+        """
         self.log("Received request:\n{}", tree)
 
         if tree.name != 'call':
@@ -75,11 +142,21 @@ class Dispatch:
         model = Model.from_modelstring(modelstring)
         pcbid = tree.attribute('srcid')
 
+        # Since we are long-lived, make sure nothing we set up for this request
+        # leaks into our own config.
+        config = copy.copy(self.__config)
+        config['server'] = copy.copy(config['server'])
+        config['paseli'] = copy.copy(config['paseli'])
+        if client_address is not None:
+            config['client'] = {
+                'address': client_address,
+            }
+
         # If we are enforcing, bail out if we don't recognize thie ID
         pcb = self.__data.local.machine.get_machine(pcbid)
-        if self.__config['server']['enforce_pcbid'] and pcb is None:
+        if config['server']['enforce_pcbid'] and pcb is None:
             self.log("Unrecognized PCBID {}", pcbid)
-            raise UnrecognizedPCBIDException(pcbid, modelstring, self.__config['client']['address'])
+            raise UnrecognizedPCBIDException(pcbid, modelstring, config['client']['address'])
 
         # If we don't have a Machine, but we aren't enforcing, we must create it
         if pcb is None:
@@ -87,7 +164,6 @@ class Dispatch:
 
         request = tree.children[0]
 
-        config = copy.copy(self.__config)
         config['machine'] = {
             'pcbid': pcbid,
             'arcade': pcb.arcade,
@@ -95,6 +171,7 @@ class Dispatch:
 
         # If the machine we looked up is in an arcade, override the global
         # paseli settings with the arcade paseli settings.
+        arcade = None
         if pcb.arcade is not None:
             arcade = self.__data.local.machine.get_arcade(pcb.arcade)
             if arcade is not None:
@@ -108,15 +185,13 @@ class Dispatch:
             config['server']['uri'] = None
 
         game = Base.create(self.__data, config, model)
-        method = request.attribute('method')
-        response = None
 
         # If we are enforcing, make sure the PCBID isn't specified to be
         # game-specific
-        if self.__config['server']['enforce_pcbid'] and pcb.game is not None:
+        if config['server']['enforce_pcbid'] and pcb.game is not None:
             if pcb.game != game.game:
                 self.log("PCBID {} assigned to game {}, but connected from game {}", pcbid, pcb.game, game.game)
-                raise UnrecognizedPCBIDException(pcbid, modelstring, self.__config['client']['address'])
+                raise UnrecognizedPCBIDException(pcbid, modelstring, config['client']['address'])
             if pcb.version is not None:
                 if pcb.version > 0 and pcb.version != game.version:
                     self.log(
@@ -127,7 +202,7 @@ class Dispatch:
                         game.game,
                         game.version,
                     )
-                    raise UnrecognizedPCBIDException(pcbid, modelstring, self.__config['client']['address'])
+                    raise UnrecognizedPCBIDException(pcbid, modelstring, config['client']['address'])
                 if pcb.version < 0 and (-pcb.version) < game.version:
                     self.log(
                         "PCBID {} assigned to game {} maximum version {}, but connected from game {} version {}",
@@ -137,7 +212,33 @@ class Dispatch:
                         game.game,
                         game.version,
                     )
-                    raise UnrecognizedPCBIDException(pcbid, modelstring, self.__config['client']['address'])
+                    raise UnrecognizedPCBIDException(pcbid, modelstring, config['client']['address'])
+
+        # Machine and arcade settings are part of the key, so that changing them
+        # from anywhere means we stop serving stale cached responses.
+        key = (
+            modelstring,
+            request.name,
+            request.attribute('method'),
+            repr(pcb),
+            repr(arcade),
+            repr([config.get(section) for section in ['server', 'client', 'paseli', 'machine']]),
+        )
+        return (game, request, pcbid, key)
+
+    def __call_handler(self, game: Optional[Base], request: Node, method: str) -> Optional[Node]:
+        """
+        Given a game class and a request, call the handler for that request.
+
+        Parameters:
+            game - The game class which should handle the request.
+            request - A Node representing the request.
+            method - The method attribute of the request.
+
+        Returns:
+            A Node representing the response, or None if no handler responded.
+        """
+        response = None
 
         # First, try to handle with specific service/method function
         try:
@@ -156,6 +257,30 @@ class Dispatch:
             if handler is not None:
                 response = handler(request)
 
+        return response
+
+    def __respond(self, game: Optional[Base], request: Node, pcbid: str) -> Optional[Node]:
+        """
+        Given a game class and a request, dispatch the request to the right handler.
+
+        Parameters:
+            game - The game class which should handle the request.
+            request - A Node representing the request, which is the only child of the
+                      root node that the game sent.
+            pcbid - The PCBID of the machine that sent the request.
+
+        Returns:
+            A Node representing the root of a response tree, or None if
+            we had a problem generating a response.
+        """
+        method = request.attribute('method')
+        if game is not None and (request.name, method) in game.transactional_requests:
+            # Commit everything this request saves at once, rather than a statement at a time.
+            with self.__data.transaction():
+                response = self.__call_handler(game, request, method)
+        else:
+            response = self.__call_handler(game, request, method)
+
         if response is None:
             # Unrecognized handler
             self.log(f"Unrecognized service {request.name} method {method}")
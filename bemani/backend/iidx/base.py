@@ -192,6 +192,21 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         machine = self.data.local.machine.get_machine(self.config['machine']['pcbid'])
         return machine.arcade is not None
 
+    @classmethod
+    def get_clear_statistics(cls, data: ValidatedDict) -> Optional[Tuple[bool, bool]]:
+        """
+        Given the data saved with an attempt, return whether it was a clear and whether
+        it was a full combo, or None if it shouldn't count towards clear rates at all.
+        """
+        clear_status = data.get_int('clear_status', cls.CLEAR_STATUS_FAILED)
+        if clear_status == cls.CLEAR_STATUS_NO_PLAY:
+            # This attempt was outside of the clear infra, so don't bother with it.
+            return None
+        return (
+            clear_status != cls.CLEAR_STATUS_FAILED,
+            clear_status == cls.CLEAR_STATUS_FULL_COMBO,
+        )
+
     def get_clear_rates(
         self,
         songid: Optional[int]=None,
@@ -210,8 +225,8 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             },
         }
         """
-        all_attempts, remote_attempts = Parallel.execute([
-            lambda: self.data.local.music.get_all_attempts(
+        local_rates, remote_rates = Parallel.execute([
+            lambda: self.data.local.music.get_clear_rates(
                 game=self.game,
                 version=self.music_version,
                 songid=songid,
@@ -225,52 +240,24 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             ),
         ])
 
+        # Merge local and remote clear rates
         attempts: Dict[int, Dict[int, Dict[str, int]]] = {}
-        for (_, attempt) in all_attempts:
-            if attempt.data.get_int('clear_status') == self.CLEAR_STATUS_NO_PLAY:
-                # This attempt was outside of the clear infra, so don't bother with it.
-                continue
-
-            # Terrible temporary structure is terrible.
-            if attempt.id not in attempts:
-                attempts[attempt.id] = {}
-            if attempt.chart not in attempts[attempt.id]:
-                attempts[attempt.id][attempt.chart] = {
-                    'total': 0,
-                    'clears': 0,
-                    'fcs': 0,
-                }
-
-            # We saw an attempt, keep the total attempts in sync.
-            attempts[attempt.id][attempt.chart]['total'] = attempts[attempt.id][attempt.chart]['total'] + 1
-
-            if attempt.data.get_int('clear_status', self.CLEAR_STATUS_FAILED) == self.CLEAR_STATUS_FAILED:
-                # This attempt was a failure, so don't count it against clears of full combos
-                continue
-
-            # It was at least a clear
-            attempts[attempt.id][attempt.chart]['clears'] = attempts[attempt.id][attempt.chart]['clears'] + 1
-
-            if attempt.data.get_int('clear_status') == self.CLEAR_STATUS_FULL_COMBO:
-                # This was a full combo clear, so it also counts here
-                attempts[attempt.id][attempt.chart]['fcs'] = attempts[attempt.id][attempt.chart]['fcs'] + 1
-
-        # Merge in remote attempts
-        for songid in remote_attempts:
-            if songid not in attempts:
-                attempts[songid] = {}
-
-            for songchart in remote_attempts[songid]:
-                if songchart not in attempts[songid]:
-                    attempts[songid][songchart] = {
-                        'total': 0,
-                        'clears': 0,
-                        'fcs': 0,
-                    }
+        for rates in [local_rates, remote_rates]:
+            for musicid in rates:
+                if musicid not in attempts:
+                    attempts[musicid] = {}
+
+                for chart in rates[musicid]:
+                    if chart not in attempts[musicid]:
+                        attempts[musicid][chart] = {
+                            'total': 0,
+                            'clears': 0,
+                            'fcs': 0,
+                        }
 
-                attempts[songid][songchart]['total'] += remote_attempts[songid][songchart]['plays']
-                attempts[songid][songchart]['clears'] += remote_attempts[songid][songchart]['clears']
-                attempts[songid][songchart]['fcs'] += remote_attempts[songid][songchart]['combos']
+                    attempts[musicid][chart]['total'] += rates[musicid][chart]['plays']
+                    attempts[musicid][chart]['clears'] += rates[musicid][chart]['clears']
+                    attempts[musicid][chart]['fcs'] += rates[musicid][chart]['combos']
 
         # If requesting a specific song/chart, make sure its in the dict
         if songid is not None:
@@ -408,6 +395,7 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             old_ex_score,
             history,
             raised,
+            statistics=self.get_clear_statistics(history),
         )
 
     def update_rank(
@@ -626,6 +614,64 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         # The machine they joined matches the arcade of the current machine
         return their_machine.arcade == machine.arcade
 
+    def __get_shop_scores(self, userid: UserID, songid: int, chart: int, machine: Machine) -> List[Tuple[UserID, Score]]:
+        # Arcade membership lives in profiles, so shop rankings have to look at every score.
+        all_scores = sorted(
+            self.data.remote.music.get_all_scores(game=self.game, version=self.music_version, songid=songid, songchart=chart),
+            key=lambda s: (s[1].points, s[1].timestamp),
+            reverse=True,
+        )
+        all_players = {
+            uid: prof for (uid, prof) in
+            self.get_any_profiles([s[0] for s in all_scores], fields=['shop_location'])
+        }
+        return [
+            score for score in all_scores
+            if (
+                score[0] == userid or
+                self.user_joined_arcade(machine, all_players[score[0]])
+            )
+        ]
+
+    def get_score_rank(self, userid: Optional[UserID], songid: int, chart: int, machine: Optional[Machine]) -> Optional[int]:
+        """
+        Given a user and a song/chart, return where the user's score ranks, starting at 1,
+        or None if they have no score. If a machine is given, only scores by players who
+        joined that machine's arcade are ranked. Otherwise, every score is ranked.
+        """
+        if userid is None:
+            return None
+        if machine is None:
+            return self.data.remote.music.get_score_rank(self.game, self.music_version, userid, songid, chart)
+
+        for rank, (scoreuserid, _) in enumerate(self.__get_shop_scores(userid, songid, chart, machine)):
+            if scoreuserid == userid:
+                return rank + 1
+        return None
+
+    def get_score_neighbors(
+        self,
+        userid: UserID,
+        songid: int,
+        chart: int,
+        machine: Optional[Machine],
+        distance: int,
+    ) -> Tuple[Optional[int], List[Tuple[UserID, Score]]]:
+        """
+        Given a user and a song/chart, return the rank of the first score and the scores
+        ranked up to distance away from the user's score, or None and an empty list if
+        they have no score. Machine works the same as in get_score_rank().
+        """
+        if machine is None:
+            return self.data.remote.music.get_score_neighbors(self.game, self.music_version, userid, songid, chart, distance)
+
+        scores = self.__get_shop_scores(userid, songid, chart, machine)
+        for index, (scoreuserid, _) in enumerate(scores):
+            if scoreuserid == userid:
+                start = max(index - distance, 0)
+                return (start + 1, scores[start:(index + distance + 1)])
+        return (None, [])
+
     def get_ghost(
         self,
         ghost_type: int,
@@ -680,9 +726,13 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
                     machine = None
 
                 if machine is not None:
+                    all_players = {
+                        uid: prof for (uid, prof) in
+                        self.get_any_profiles([s[0] for s in all_scores], fields=['shop_location'])
+                    }
                     all_scores = [
                         score for score in all_scores
-                        if self.user_joined_arcade(machine, self.get_any_profile(score[0]))
+                        if self.user_joined_arcade(machine, all_players[score[0]])
                     ]
                 else:
                     # Not joined an arcade, so nobody matches our scores
@@ -746,7 +796,11 @@ class IIDXBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
                     key=lambda s: s[1].points,
                     reverse=True,
                 )
-                all_profiles = self.data.local.user.get_all_profiles(self.game, self.version)
+                all_profiles = self.data.local.user.get_all_profiles(
+                    self.game,
+                    self.version,
+                    fields=[self.DAN_RANKING_DOUBLE if is_dp else self.DAN_RANKING_SINGLE],
+                )
                 relevant_userids = {
                     profile[0] for profile in all_profiles
                     if profile[1].get_int(self.DAN_RANKING_DOUBLE if is_dp else self.DAN_RANKING_SINGLE) == dan_rank
@@ -18,6 +18,13 @@ class IIDXRootage(IIDXCourse, IIDXBase):
     name = 'Beatmania IIDX ROOTAGE'
     version = VersionConstants.IIDX_ROOTAGE
 
+    transactional_requests = IIDXBase.transactional_requests | {
+        ('IIDX26grade', 'raised'),
+        ('IIDX26ranking', 'entry'),
+        ('IIDX26ranking', 'classicentry'),
+        ('IIDX26pc', 'save'),
+    }
+
     GAME_CLTYPE_SINGLE = 0
     GAME_CLTYPE_DOUBLE = 1
 
@@ -395,13 +402,12 @@ class IIDXRootage(IIDXCourse, IIDXBase):
             for score in scores:
                 if score[0] not in totalscores:
                     totalscores[score[0]] = 0
-                    profile = self.get_any_profile(score[0])
-                    if profile is None:
-                        profile = ValidatedDict()
-                    profiles[score[0]] = profile
-
                 totalscores[score[0]] += score[1].points
 
+        # We only need enough of each profile to filter by arcade and display the ranking.
+        for (userid, profile) in self.get_any_profiles(list(totalscores.keys()), fields=['shop_location', 'name', 'pid', 'qpro']):
+            profiles[userid] = profile
+
         topscores = sorted(
             [
                 (totalscores[userid], profiles[userid])
@@ -661,31 +667,7 @@ class IIDXRootage(IIDXCourse, IIDXBase):
             machine = None
 
         # First, determine our current ranking before saving the new score
-        all_scores = sorted(
-            self.data.remote.music.get_all_scores(game=self.game, version=self.music_version, songid=musicid, songchart=chart),
-            key=lambda s: (s[1].points, s[1].timestamp),
-            reverse=True,
-        )
-        all_players = {
-            uid: prof for (uid, prof) in
-            self.get_any_profiles([s[0] for s in all_scores])
-        }
-
-        if not global_scores:
-            all_scores = [
-                score for score in all_scores
-                if (
-                    score[0] == userid or
-                    self.user_joined_arcade(machine, all_players[score[0]])
-                )
-            ]
-
-        # Find our actual index
-        oldindex = None
-        for i in range(len(all_scores)):
-            if all_scores[i][0] == userid:
-                oldindex = i
-                break
+        oldrank = self.get_score_rank(userid, musicid, chart, None if global_scores else machine)
 
         if userid is not None:
             clear_status = self.game_to_db_status(int(request.attribute('cflg')))
@@ -729,50 +711,21 @@ class IIDXRootage(IIDXCourse, IIDXBase):
             # Shop ranking
             shopdata = Node.void('shopdata')
             root.add_child(shopdata)
-            shopdata.set_attribute('rank', '-1' if oldindex is None else str(oldindex + 1))
+            shopdata.set_attribute('rank', '-1' if oldrank is None else str(oldrank))
 
             # Grab the rank of some other players on this song
             ranklist = Node.void('ranklist')
             root.add_child(ranklist)
 
-            all_scores = sorted(
-                self.data.remote.music.get_all_scores(game=self.game, version=self.music_version, songid=musicid, songchart=chart),
-                key=lambda s: (s[1].points, s[1].timestamp),
-                reverse=True,
-            )
-            missing_players = [
-                uid for (uid, _) in all_scores
-                if uid not in all_players
-            ]
-            for (uid, prof) in self.get_any_profiles(missing_players):
-                all_players[uid] = prof
-
-            if not global_scores:
-                all_scores = [
-                    score for score in all_scores
-                    if (
-                        score[0] == userid or
-                        self.user_joined_arcade(machine, all_players[score[0]])
-                    )
-                ]
-
-            # Find our actual index
-            ourindex = None
-            for i in range(len(all_scores)):
-                if all_scores[i][0] == userid:
-                    ourindex = i
-                    break
-            if ourindex is None:
+            start, relevant_scores = self.get_score_neighbors(userid, musicid, chart, None if global_scores else machine, 4)
+            if start is None:
                 raise Exception('Cannot find our own score after saving to DB!')
-            start = ourindex - 4
-            end = ourindex + 4
-            if start < 0:
-                start = 0
-            if end >= len(all_scores):
-                end = len(all_scores) - 1
-            relevant_scores = all_scores[start:(end + 1)]
-
-            record_num = start + 1
+            all_players = {
+                uid: prof for (uid, prof) in
+                self.get_any_profiles([s[0] for s in relevant_scores])
+            }
+
+            record_num = start
             for score in relevant_scores:
                 profile = all_players[score[0]]
 
@@ -118,6 +118,10 @@ class JubeatLobbyCheckHandler(JubeatBase):
 
 class JubeatGamendRegisterHandler(JubeatBase):
 
+    transactional_requests = JubeatBase.transactional_requests | {
+        ('gameend', 'regist'),
+    }
+
     def handle_gameend_regist_request(self, request: Node) -> Node:
         data = request.child('data')
         player = data.child('player')
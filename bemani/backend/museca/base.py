@@ -1,5 +1,5 @@
 # vim: set fileencoding=utf-8
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Tuple, Any
 
 from bemani.backend.base import Base
 from bemani.backend.core import CoreHandler, CardManagerHandler, PASELIHandler
@@ -125,6 +125,18 @@ class MusecaBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         """
         return oldprofile
 
+    @classmethod
+    def get_clear_statistics(cls, data: ValidatedDict) -> Optional[Tuple[bool, bool]]:
+        """
+        Given the data saved with an attempt, return whether it was a clear and whether
+        it was a full combo, or None if it shouldn't count towards clear rates at all.
+        """
+        clear_type = data.get_int('clear_type', cls.CLEAR_TYPE_FAILED)
+        return (
+            clear_type != cls.CLEAR_TYPE_FAILED,
+            clear_type == cls.CLEAR_TYPE_FULL_COMBO,
+        )
+
     def get_clear_rates(self) -> Dict[int, Dict[int, Dict[str, int]]]:
         """
         Returns a dictionary similar to the following:
@@ -138,8 +150,8 @@ class MusecaBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             },
         }
         """
-        all_attempts, remote_attempts = Parallel.execute([
-            lambda: self.data.local.music.get_all_attempts(
+        local_rates, remote_rates = Parallel.execute([
+            lambda: self.data.local.music.get_clear_rates(
                 game=self.game,
                 version=self.music_version,
             ),
@@ -148,41 +160,23 @@ class MusecaBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
                 version=self.music_version,
             )
         ])
+
+        # Merge local and remote clear rates
         attempts: Dict[int, Dict[int, Dict[str, int]]] = {}
-        for (_, attempt) in all_attempts:
-            # Terrible temporary structure is terrible.
-            if attempt.id not in attempts:
-                attempts[attempt.id] = {}
-            if attempt.chart not in attempts[attempt.id]:
-                attempts[attempt.id][attempt.chart] = {
-                    'total': 0,
-                    'clears': 0,
-                }
-
-            # We saw an attempt, keep the total attempts in sync.
-            attempts[attempt.id][attempt.chart]['total'] = attempts[attempt.id][attempt.chart]['total'] + 1
-
-            if attempt.data.get_int('clear_type', self.CLEAR_TYPE_FAILED) != self.CLEAR_TYPE_FAILED:
-                # This attempt was a failure, so don't count it against clears of full combos
-                continue
-
-            # It was at least a clear
-            attempts[attempt.id][attempt.chart]['clears'] = attempts[attempt.id][attempt.chart]['clears'] + 1
-
-        # Merge in remote attempts
-        for songid in remote_attempts:
-            if songid not in attempts:
-                attempts[songid] = {}
-
-            for songchart in remote_attempts[songid]:
-                if songchart not in attempts[songid]:
-                    attempts[songid][songchart] = {
-                        'total': 0,
-                        'clears': 0,
-                    }
-
-                attempts[songid][songchart]['total'] += remote_attempts[songid][songchart]['plays']
-                attempts[songid][songchart]['clears'] += remote_attempts[songid][songchart]['clears']
+        for rates in [local_rates, remote_rates]:
+            for musicid in rates:
+                if musicid not in attempts:
+                    attempts[musicid] = {}
+
+                for chart in rates[musicid]:
+                    if chart not in attempts[musicid]:
+                        attempts[musicid][chart] = {
+                            'total': 0,
+                            'clears': 0,
+                        }
+
+                    attempts[musicid][chart]['total'] += rates[musicid][chart]['plays']
+                    attempts[musicid][chart]['clears'] += rates[musicid][chart]['clears']
 
         return attempts
 
@@ -296,4 +290,5 @@ class MusecaBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             oldpoints,
             history,
             raised,
+            statistics=self.get_clear_statistics(history),
         )
@@ -64,7 +64,7 @@ class MusecaGameHiscoreHandler(MusecaBase):
 
         # Now, grab local records
         area_users = [
-            uid for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version)
+            uid for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version, fields=['loc'])
             if prof.get_int('loc', -1) == locid
         ]
         records = self.data.local.music.get_all_records(self.game, self.version, userlist=area_users)
@@ -72,7 +72,7 @@ class MusecaGameHiscoreHandler(MusecaBase):
             uid for (uid, _) in records
             if uid not in users
         ]
-        for (uid, prof) in self.get_any_profiles(missing_players):
+        for (uid, prof) in self.get_any_profiles(missing_players, fields=['name']):
             users[uid] = prof
 
         hiscore_location = Node.void('hiscore_location')
@@ -228,7 +228,7 @@ class SoundVoltexBooth(
             records_by_id[score.id][score.chart] = record
             missing_users.append(userid)
 
-        users = {userid: profile for (userid, profile) in self.get_any_profiles(missing_users)}
+        users = {userid: profile for (userid, profile) in self.get_any_profiles(missing_users, fields=['name'])}
 
         # Output records
         for songid in records_by_id:
@@ -3065,7 +3065,7 @@ class SoundVoltexGravityWarsSeason1(
         # Now, grab user records
         records = self.data.remote.music.get_all_records(self.game, self.music_version)
         missing_users = [userid for (userid, _) in records]
-        users = {userid: profile for (userid, profile) in self.get_any_profiles(missing_users)}
+        users = {userid: profile for (userid, profile) in self.get_any_profiles(missing_users, fields=['name'])}
 
         hiscore_allover = Node.void('hiscore_allover')
         game.add_child(hiscore_allover)
@@ -3089,12 +3089,12 @@ class SoundVoltexGravityWarsSeason1(
 
         # Now, grab local records
         area_users = [
-            uid for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version)
+            uid for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version, fields=['loc'])
             if prof.get_int('loc', -1) == locid
         ]
         records = self.data.local.music.get_all_records(self.game, self.music_version, userlist=area_users)
         missing_users = [userid for (userid, _) in records if userid not in users]
-        for (userid, profile) in self.get_any_profiles(missing_users):
+        for (userid, profile) in self.get_any_profiles(missing_users, fields=['name']):
             users[userid] = profile
 
         hiscore_location = Node.void('hiscore_location')
@@ -3420,7 +3420,7 @@ class SoundVoltexVividWave(
         # Now, grab global and local scores as well as clear rates
         global_records = self.data.remote.music.get_all_records(self.game, self.music_version)
         users = {
-            uid: prof for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version)
+            uid: prof for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version, fields=['loc', 'name'])
         }
         area_users = [
             uid for uid in users
@@ -3434,7 +3434,7 @@ class SoundVoltexVividWave(
             [userid for (userid, _) in global_records if userid not in users] +
             [userid for (userid, _) in area_records if userid not in users]
         )
-        for (userid, profile) in self.get_any_profiles(missing_users):
+        for (userid, profile) in self.get_any_profiles(missing_users, fields=['name']):
             users[userid] = profile
 
         for (userid, score) in global_records:
@@ -1,78 +1,174 @@
 import concurrent.futures
-from typing import Any, Callable, List, TypeVar
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
 
 T = TypeVar('T')
 
 
+# Tracks whether the current thread belongs to the shared executor.
+_local = threading.local()
+
+
+class _Task:
+    """
+    A single callable handed to Parallel, which will be run exactly once by whichever
+    thread claims it first, either a shared executor thread or the caller itself.
+    """
+
+    def __init__(self, func: Callable[..., Any], args: Tuple[Any, ...]) -> None:
+        self.func = func
+        self.args = args
+        self.result: Any = None
+        self.exception: Optional[BaseException] = None
+        self.done = threading.Event()
+        self.__lock = threading.Lock()
+        self.__claimed = False
+
+    def claim(self) -> bool:
+        with self.__lock:
+            if self.__claimed:
+                return False
+            self.__claimed = True
+            return True
+
+    def run(self) -> None:
+        if not self.claim():
+            return
+        try:
+            self.result = self.func(*self.args)
+        except BaseException as e:
+            self.exception = e
+        finally:
+            self.done.set()
+
+
 class Parallel:
     """
     Utilities for executing parallel operations. This is used as a convenience
     so that we don't have to plumb async/await support (yuck) through the network,
     but we can still make multiple queries at once to remote services and the DB.
+
+    Work is run on a single executor shared by the whole process, so the number of
+    threads stays bounded no matter how many requests are using it or how deeply
+    calls are nested. The calling thread also works through anything the executor
+    hasn't started yet instead of only waiting on it. That way a nested call made from
+    an executor thread always makes progress even when every executor thread is busy.
     """
 
+    # Maximum number of threads the shared executor will ever start.
+    MAX_WORKERS = 16
+
+    __executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    __executor_pid: Optional[int] = None
+    __executor_lock = threading.Lock()
+
     @staticmethod
-    def execute(lambdas: List[Callable[[], Any]]) -> List[Any]:
+    def __get_executor() -> concurrent.futures.ThreadPoolExecutor:
+        with Parallel.__executor_lock:
+            # Threads don't survive a fork, so a forked child needs its own executor.
+            if Parallel.__executor is None or Parallel.__executor_pid != os.getpid():
+                Parallel.__executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=Parallel.MAX_WORKERS,
+                    thread_name_prefix='parallel',
+                )
+                Parallel.__executor_pid = os.getpid()
+            return Parallel.__executor
+
+    @staticmethod
+    def shutdown() -> None:
         """
-        Given a list of callables, execute them and return a list of their returns.
-        Guarantees order of return based on order of callable.
+        Stop the shared executor, waiting for anything running on it to finish. A new
+        one is started the next time any parallel operation is requested.
         """
+        with Parallel.__executor_lock:
+            executor = Parallel.__executor
+            Parallel.__executor = None
+            Parallel.__executor_pid = None
+        if executor is not None:
+            executor.shutdown(wait=True)
 
-        if len(lambdas) == 0:
+    @staticmethod
+    def __work(task: _Task) -> None:
+        _local.executor_thread = True
+        task.run()
+
+    @staticmethod
+    def __run(tasks: List[_Task], timeout: Optional[float]) -> List[Any]:
+        if len(tasks) == 0:
             return []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(lambdas)) as executor:
-            futures = {executor.submit(lambdas[pos]): pos for pos in range(len(lambdas))}
-            results = []  # List: Tuple[Any, int]
+        deadline = (time.time() + timeout) if timeout is not None else None
+
+        # Without a timeout there's no harm in the caller helping out. With one, the caller
+        # only waits so that it can give up on time, unless it is itself an executor thread.
+        # In that case it has to help or nested calls could starve each other.
+        helping = deadline is None or getattr(_local, 'executor_thread', False)
+
+        executor = Parallel.__get_executor()
+        futures = [executor.submit(Parallel.__work, task) for task in (tasks[1:] if helping else tasks)]
+
+        if helping:
+            # Run whatever the executor hasn't gotten to yet ourselves, starting at the end
+            # since the executor works from the start.
+            for task in reversed(tasks):
+                if deadline is not None and time.time() >= deadline:
+                    break
+                task.run()
+
+        try:
+            for task in tasks:
+                remaining = (deadline - time.time()) if deadline is not None else None
+                if not task.done.wait(remaining if remaining is None or remaining > 0 else 0):
+                    raise concurrent.futures.TimeoutError('Parallel operation timed out!')
+        except concurrent.futures.TimeoutError:
+            # Make sure anything that hasn't started never does. Anything already
+            # running will finish on its own and its result will be discarded.
+            for future in futures:
+                future.cancel()
+            for task in tasks:
+                task.claim()
+            raise
+
+        for task in tasks:
+            if task.exception is not None:
+                raise task.exception
+        return [task.result for task in tasks]
 
-            for future in concurrent.futures.as_completed(futures):
-                pos = futures[future]
-                data = future.result()
-                results.append((data, pos))
+    @staticmethod
+    def execute(lambdas: List[Callable[[], Any]], timeout: Optional[float]=None) -> List[Any]:
+        """
+        Given a list of callables, execute them and return a list of their returns.
+        Guarantees order of return based on order of callable. If a timeout in seconds
+        is given and not everything finishes in time, anything not yet started is
+        cancelled and concurrent.futures.TimeoutError is raised. Callables that are
+        already running can't be interrupted. When nested inside another parallel
+        operation, the timeout is only checked between callables.
+        """
 
-            return [r[0] for r in sorted(results, key=lambda r: r[1])]
+        return Parallel.__run([_Task(lam, ()) for lam in lambdas], timeout)
 
     @staticmethod
-    def map(lam: Callable[[T], Any], params: List[T]) -> List[Any]:
+    def map(lam: Callable[[T], Any], params: List[T], timeout: Optional[float]=None) -> List[Any]:
         """
         Given a callable and a list of params, executes that callable with each set
         of params in the list and returns a list of their returns. Guarantees order
-        of return.
+        of return. Takes an optional timeout, with the same behavior as execute.
         """
 
-        if len(params) == 0:
-            return []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(params)) as executor:
-            futures = {executor.submit(lam, params[pos]): pos for pos in range(len(params))}
-            results = []  # List: Tuple[Any, int]
-
-            for future in concurrent.futures.as_completed(futures):
-                pos = futures[future]
-                data = future.result()
-                results.append((data, pos))
-
-            return [r[0] for r in sorted(results, key=lambda r: r[1])]
+        return Parallel.__run([_Task(lam, (param,)) for param in params], timeout)
 
     @staticmethod
-    def call(lambdas: 'List[Callable[..., Any]]', *params: Any) -> List[Any]:
+    def call(lambdas: 'List[Callable[..., Any]]', *params: Any, timeout: Optional[float]=None) -> List[Any]:
         """
         Given a list of callables and zero or more params, calls each callable in
         parallel with the params specified. Essentially a map of params to multiple
         callables in parallel. Returns a list of returns, garanteed to be in the
-        same order as the lambdas.
+        same order as the lambdas. Takes an optional timeout, with the same behavior
+        as execute.
         """
 
-        if len(lambdas) == 0:
-            return []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(lambdas)) as executor:
-            futures = {executor.submit(lambdas[pos], *params): pos for pos in range(len(lambdas))}
-            results = []  # List: Tuple[Any, int]
-
-            for future in concurrent.futures.as_completed(futures):
-                pos = futures[future]
-                data = future.result()
-                results.append((data, pos))
-
-            return [r[0] for r in sorted(results, key=lambda r: r[1])]
+        return Parallel.__run([_Task(lam, params) for lam in lambdas], timeout)
 
     @staticmethod
     def flatten(lists: List[List[Any]]) -> List[Any]:
@@ -1,19 +1,267 @@
-from typing import List, Optional
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from bemani.data.api.client import APIClient
+from bemani.common import Time
+from bemani.data.api.client import APIClient, APIException
 from bemani.data.interfaces import APIProviderInterface
 
 
+class ServerRegistry:
+    """
+    Holds the list of remote servers, along with one APIClient for each, for the life of
+    a server process so that every request doesn't have to look them up again. The
+    server list is only reloaded when its version stamp changes, and the stamp itself is
+    only looked at once every CHECK_INTERVAL seconds.
+    """
+
+    CHECK_INTERVAL = 5
+
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__version: Optional[int] = None
+        self.__checked = 0.0
+        self.__clients: List[APIClient] = []
+
+    def clients(self, api: APIProviderInterface) -> List[APIClient]:
+        """
+        Given a local API data object to look servers up with if needed, return a client
+        for each remote server.
+        """
+        with self.__lock:
+            now = time.time()
+            if self.__version is not None and (now - self.__checked) < self.CHECK_INTERVAL:
+                return self.__clients
+            self.__checked = now
+
+            version = api.get_server_version()
+            if version != self.__version:
+                # Keep clients for servers that haven't changed, so anything they hold
+                # onto survives the reload.
+                existing = {
+                    (client.base_uri, client.token, client.allow_stats, client.allow_scores): client
+                    for client in self.__clients
+                }
+                self.__clients = [
+                    existing.get((server.uri, server.token, server.allow_stats, server.allow_scores)) or
+                    APIClient(server.uri, server.token, server.allow_stats, server.allow_scores)
+                    for server in api.get_all_servers()
+                ]
+                self.__version = version
+            return self.__clients
+
+
 class BaseGlobalData:
 
-    def __init__(self, api: APIProviderInterface) -> None:
+    # Once this fraction of the remote budget has passed, any server that still hasn't
+    # answered is sent a second copy of the request, and whichever answers first wins.
+    HEDGE_AFTER = 0.5
+
+    # Maximum number of remote calls outstanding at once across the whole process.
+    MAX_REMOTE_CALLS = 32
+
+    # Number of seconds a process has to refresh a stale cache entry before another
+    # process assumes it failed and tries instead.
+    CACHE_REFRESH_TIMEOUT = 60
+
+    __executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    __executor_pid: Optional[int] = None
+    __executor_lock = threading.Lock()
+
+    # Responses fetched by background refreshes, keyed by cache key, waiting for the
+    # next request in this process to write them to the shared cache.
+    __refreshed: Dict[str, Tuple[int, Any]] = {}
+    __refreshed_lock = threading.Lock()
+
+    def __init__(
+        self,
+        api: APIProviderInterface,
+        remote_budget: Optional[float]=None,
+        remote_cache_ttl: Optional[int]=None,
+        registry: Optional[ServerRegistry]=None,
+    ) -> None:
+        """
+        Initialize the global data object.
+
+        Parameters:
+            api - The local API data object, used to look up remote servers.
+            remote_budget - Number of seconds to wait on remote servers before going ahead
+                            with whatever has arrived. If None, we wait for every server.
+            remote_cache_ttl - Number of seconds a cached remote response is used before
+                               it is refreshed in the background. If None, responses
+                               are never cached.
+            registry - A process-wide registry of remote servers to use. If None, the
+                       servers are looked up once for this object.
+        """
         self.__localapi = api
         self.__apiclients: Optional[List[APIClient]] = None
+        self.__registry = registry
+        self.remote_budget = remote_budget
+        self.remote_cache_ttl = remote_cache_ttl
 
     @property
     def clients(self) -> List[APIClient]:
+        if self.__registry is not None:
+            return self.__registry.clients(self.__localapi)
         if self.__apiclients is None:
             servers = self.__localapi.get_all_servers()
             self.__apiclients = [APIClient(server.uri, server.token, server.allow_stats, server.allow_scores) for server in servers]
 
         return self.__apiclients
+
+    @staticmethod
+    def __get_executor() -> concurrent.futures.ThreadPoolExecutor:
+        # This is separate from the executor Parallel uses. Remote calls never wait on
+        # anything themselves, so callers running on Parallel's threads can always
+        # wait on them safely.
+        with BaseGlobalData.__executor_lock:
+            if BaseGlobalData.__executor is None or BaseGlobalData.__executor_pid != os.getpid():
+                BaseGlobalData.__executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=BaseGlobalData.MAX_REMOTE_CALLS,
+                    thread_name_prefix='remote',
+                )
+                BaseGlobalData.__executor_pid = os.getpid()
+            return BaseGlobalData.__executor
+
+    def remote_call(self, lambdas: 'List[Callable[..., Any]]', *params: Any) -> List[Any]:
+        """
+        Given a list of callables, one per remote server, and zero or more params, calls
+        each callable with the params at once, much like Parallel.call. Unlike that, if
+        we have a remote budget we only wait that long, and anything that hasn't answered
+        by then is left out of the returned list. Servers that haven't answered partway
+        through the budget get a hedged second request.
+
+        Returns:
+            A list of returns from the callables that finished in time, in the same order
+            as the callables.
+        """
+        if len(lambdas) == 0:
+            return []
+
+        executor = BaseGlobalData.__get_executor()
+        start = time.time()
+        deadline = (start + self.remote_budget) if self.remote_budget is not None else None
+        hedge_at = (start + (self.remote_budget * self.HEDGE_AFTER)) if self.remote_budget else None
+
+        pending: Dict[concurrent.futures.Future, int] = {
+            executor.submit(lambdas[pos], *params): pos for pos in range(len(lambdas))
+        }
+        results: Dict[int, Any] = {}
+
+        try:
+            while len(results) < len(lambdas):
+                now = time.time()
+                if hedge_at is not None and now >= hedge_at:
+                    hedge_at = None
+                    for pos in {pos for pos in pending.values() if pos not in results}:
+                        pending[executor.submit(lambdas[pos], *params)] = pos
+                if deadline is not None and now >= deadline:
+                    break
+
+                wake = hedge_at if hedge_at is not None else deadline
+                done, _ = concurrent.futures.wait(
+                    list(pending.keys()),
+                    timeout=(max(0.0, wake - now) if wake is not None else None),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                for future in done:
+                    pos = pending.pop(future)
+                    if pos not in results:
+                        results[pos] = future.result()
+        finally:
+            # Anything still outstanding is either too late or has been beaten by its
+            # hedge. Don't bother starting it if it hasn't started yet.
+            for future in pending:
+                future.cancel()
+
+        return [results[pos] for pos in sorted(results.keys())]
+
+    @staticmethod
+    def __cache_key(client: APIClient, method: str, params: Tuple[Any, ...]) -> str:
+        # Everything about the server that changes its answer is part of the key, so an
+        # admin changing the token or what we share never serves an old response.
+        server = [client.base_uri, client.token, client.allow_stats, client.allow_scores]
+        return hashlib.sha1(json.dumps([server, method, params]).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def __fetch(pos: int, call: 'Callable[..., Any]') -> 'Callable[..., Tuple[int, Any]]':
+        def fetch(*params: Any) -> Tuple[int, Any]:
+            try:
+                return (pos, call(*params, suppress_errors=False))
+            except APIException:
+                return (pos, None)
+        return fetch
+
+    @staticmethod
+    def __refresh(key: str, call: 'Callable[..., Any]', params: Tuple[Any, ...]) -> None:
+        try:
+            data = call(*params, suppress_errors=False)
+        except APIException:
+            # Keep serving what we have. Our claim will time out and another request
+            # will try again.
+            return
+        with BaseGlobalData.__refreshed_lock:
+            BaseGlobalData.__refreshed[key] = (Time.now(), data)
+
+    def cached_remote_call(self, method: str, *params: Any) -> List[Any]:
+        """
+        Given the name of an APIClient method which accepts suppress_errors, and zero or
+        more params, calls that method on every remote server much like remote_call.
+        Each server's response is cached in the DB so every server process shares it.
+        Cached responses older than the remote cache TTL are still returned, but are
+        refreshed in the background for future calls. Only servers we have nothing
+        cached for are waited on, and a server that fails to answer is never cached,
+        so stale responses are kept until it answers again.
+
+        Returns:
+            A list of responses, one per server that we either had cached or that
+            answered in time, in the same order as the servers.
+        """
+        clients = self.clients
+        if self.remote_cache_ttl is None:
+            return self.remote_call([getattr(client, method) for client in clients], *params)
+
+        # First, save anything that finished refreshing since the last call.
+        with BaseGlobalData.__refreshed_lock:
+            refreshed = BaseGlobalData.__refreshed
+            BaseGlobalData.__refreshed = {}
+        for key, (timestamp, data) in refreshed.items():
+            self.__localapi.put_remote_cache(key, timestamp, data)
+
+        keys = [BaseGlobalData.__cache_key(client, method, params) for client in clients]
+        cached = self.__localapi.get_remote_cache(keys)
+        now = Time.now()
+
+        results: Dict[int, Any] = {}
+        missing: List[int] = []
+        for pos, key in enumerate(keys):
+            if key not in cached:
+                missing.append(pos)
+                continue
+
+            timestamp, data = cached[key]
+            results[pos] = data
+            if (
+                timestamp + self.remote_cache_ttl <= now and
+                self.__localapi.claim_remote_cache_refresh(key, self.CACHE_REFRESH_TIMEOUT)
+            ):
+                BaseGlobalData.__get_executor().submit(
+                    BaseGlobalData.__refresh,
+                    key,
+                    getattr(clients[pos], method),
+                    params,
+                )
+
+        for pos, data in self.remote_call(
+            [BaseGlobalData.__fetch(pos, getattr(clients[pos], method)) for pos in missing],
+            *params,
+        ):
+            if data is not None:
+                self.__localapi.put_remote_cache(keys[pos], now, data)
+                results[pos] = data
+
+        return [results[pos] for pos in sorted(results.keys())]
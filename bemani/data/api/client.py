@@ -1,5 +1,10 @@
 import json
 import requests
+import threading
+import time
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.retry import Retry
 from typing import Tuple, Dict, List, Any, Optional
 
 from bemani.common import GameConstants, VersionConstants, DBConstants, ValidatedDict
@@ -29,19 +34,125 @@ class RemoteServerErrorAPIException(APIException):
     pass
 
 
+class _ResetRetry(Retry):
+    """
+    Retries a request once if the connection fails or is reset, which is safe since
+    every BEMAPI call is an idempotent GET, and saves us when the remote has closed a
+    keep-alive connection that we were about to reuse. A request that times out waiting
+    for the server to answer is never retried, so a hung server only costs us the read
+    timeout once.
+    """
+
+    def increment(
+        self,
+        method: Optional[str]=None,
+        url: Optional[str]=None,
+        response: Any=None,
+        error: Optional[Exception]=None,
+        _pool: Any=None,
+        _stacktrace: Any=None,
+    ) -> '_ResetRetry':
+        retry = self.new(total=0) if isinstance(error, ReadTimeoutError) else self
+        return Retry.increment(retry, method, url, response, error, _pool, _stacktrace)
+
+
+class _ServerConnection:
+    """
+    Everything we keep around for a single remote server for the life of the process.
+    That is a keep-alive HTTP session, a limit on how many requests can be outstanding
+    to the server at once, and some running metrics about how the server is behaving.
+    """
+
+    def __init__(self, max_requests: int) -> None:
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=max_requests,
+            max_retries=_ResetRetry(total=1, redirect=False, raise_on_status=False),
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.semaphore = threading.BoundedSemaphore(max_requests)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.total_time = 0.0
+        self.last_time = 0.0
+
+    def record(self, duration: float, error: bool) -> None:
+        with self.lock:
+            self.requests += 1
+            if error:
+                self.errors += 1
+            self.total_time += duration
+            self.last_time = duration
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'average_latency': (self.total_time / self.requests) if self.requests > 0 else 0.0,
+                'last_latency': self.last_time,
+            }
+
+
 class APIClient:
     """
     A client that fully speaks BEMAPI and can pull information from a remote server.
+    Connections are pooled per remote server and shared by every client in the process,
+    so that repeated calls to the same server don't pay for connection setup each time.
     """
 
     API_VERSION = 'v1'
 
+    # Seconds to wait for a connection to be made, and then for the server to respond.
+    CONNECT_TIMEOUT = 2
+    READ_TIMEOUT = 10
+
+    # Maximum number of requests that can be outstanding to one server at once. Anything
+    # beyond this waits up to CONNECT_TIMEOUT for a slot before giving up.
+    MAX_REQUESTS_PER_SERVER = 8
+
+    __connections: Dict[str, _ServerConnection] = {}
+    __connections_lock = threading.Lock()
+
     def __init__(self, base_uri: str, token: str, allow_stats: bool, allow_scores: bool) -> None:
         self.base_uri = base_uri
         self.token = token
         self.allow_stats = allow_stats
         self.allow_scores = allow_scores
 
+    @classmethod
+    def __connection(cls, base_uri: str) -> _ServerConnection:
+        with cls.__connections_lock:
+            if base_uri not in cls.__connections:
+                cls.__connections[base_uri] = _ServerConnection(cls.MAX_REQUESTS_PER_SERVER)
+            return cls.__connections[base_uri]
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns:
+            A dictionary keyed by remote server URI, containing the number of requests
+            made, the number of those that failed, and the average and most recent
+            latency in seconds, for every server this process has talked to.
+        """
+        with cls.__connections_lock:
+            connections = dict(cls.__connections)
+        return {uri: connection.stats() for uri, connection in connections.items()}
+
+    @classmethod
+    def close_all(cls) -> None:
+        """
+        Close every pooled connection and forget all metrics.
+        """
+        with cls.__connections_lock:
+            connections = list(cls.__connections.values())
+            cls.__connections = {}
+        for connection in connections:
+            connection.session.close()
+
     def __content_type_valid(self, content_type: str) -> bool:
         if ';' in content_type:
             left, right = content_type.split(';', 1)
@@ -67,20 +178,31 @@ class APIClient:
         headers = {
             'Authorization': f'Token {self.token}',
             'Content-Type': 'application/json; charset=utf-8',
+            'Accept-Encoding': 'gzip',
         }
         data = json.dumps(request_args).encode('utf8')
 
+        connection = self.__connection(self.base_uri)
+        if not connection.semaphore.acquire(timeout=self.CONNECT_TIMEOUT):
+            connection.record(0.0, True)
+            raise APIException('Too many outstanding requests to remote server!')
+
+        start = time.time()
         try:
-            r = requests.request(
+            r = connection.session.request(
                 'GET',
                 uri,
                 headers=headers,
                 data=data,
                 allow_redirects=False,
-                timeout=10,
+                timeout=(self.CONNECT_TIMEOUT, self.READ_TIMEOUT),
             )
         except Exception:
+            connection.record(time.time() - start, True)
             raise APIException('Failed to query remote server!')
+        finally:
+            connection.semaphore.release()
+        connection.record(time.time() - start, r.status_code != 200)
 
         # Verify that content type is in the form of "application/json; charset=utf-8".
         if not self.__content_type_valid(r.headers['content-type']):
@@ -228,6 +350,7 @@ class APIClient:
         ids: List[str],
         since: Optional[int]=None,
         until: Optional[int]=None,
+        suppress_errors: bool=True,
     ) -> List[Dict[str, Any]]:
         # Allow remote servers to be disabled
         if not self.allow_scores:
@@ -250,10 +373,19 @@ class APIClient:
             )
             return resp['records']
         except APIException:
+            if not suppress_errors:
+                raise
             # Couldn't talk to server, assume empty records
             return []
 
-    def get_statistics(self, game: str, version: int, idtype: str, ids: List[str]) -> List[Dict[str, Any]]:
+    def get_statistics(
+        self,
+        game: str,
+        version: int,
+        idtype: str,
+        ids: List[str],
+        suppress_errors: bool=True,
+    ) -> List[Dict[str, Any]]:
         # Allow remote servers to be disabled
         if not self.allow_stats:
             return []
@@ -270,6 +402,8 @@ class APIClient:
             )
             return resp['statistics']
         except APIException:
+            if not suppress_errors:
+                raise
             # Couldn't talk to server, assume empty statistics
             return []
 
@@ -1,6 +1,6 @@
 from typing import List, Optional, Dict, Any, Set
 
-from bemani.common import GameConstants, ValidatedDict, Parallel
+from bemani.common import GameConstants, ValidatedDict
 from bemani.data.api.base import BaseGlobalData
 from bemani.data.types import Item
 
@@ -60,7 +60,7 @@ class GlobalGameData(BaseGlobalData):
         Returns:
             A list of item objects.
         """
-        catalogs: List[Dict[str, List[Dict[str, Any]]]] = Parallel.call(
+        catalogs: List[Dict[str, List[Dict[str, Any]]]] = self.remote_call(
             [client.get_catalog for client in self.clients],
             game,
             version
@@ -2,7 +2,7 @@ from typing import List, Optional, Dict, Any, Tuple, Set
 
 from bemani.common import APIConstants, GameConstants, VersionConstants, DBConstants, Parallel
 from bemani.data.interfaces import APIProviderInterface
-from bemani.data.api.base import BaseGlobalData
+from bemani.data.api.base import BaseGlobalData, ServerRegistry
 from bemani.data.mysql.user import UserData
 from bemani.data.mysql.music import MusicData
 from bemani.data.remoteuser import RemoteUser
@@ -11,8 +11,16 @@ from bemani.data.types import UserID, Score, Song
 
 class GlobalMusicData(BaseGlobalData):
 
-    def __init__(self, api: APIProviderInterface, user: UserData, music: MusicData) -> None:
-        super().__init__(api)
+    def __init__(
+        self,
+        api: APIProviderInterface,
+        user: UserData,
+        music: MusicData,
+        remote_budget: Optional[float]=None,
+        remote_cache_ttl: Optional[int]=None,
+        registry: Optional[ServerRegistry]=None,
+    ) -> None:
+        super().__init__(api, remote_budget, remote_cache_ttl, registry)
         self.user = user
         self.music = music
 
@@ -458,7 +466,7 @@ class GlobalMusicData(BaseGlobalData):
     def get_score(self, game: str, version: int, userid: UserID, songid: int, songchart: int) -> Optional[Score]:
         # Helper function so we can iterate over all servers for a single card
         def get_scores_for_card(cardid: str) -> List[Score]:
-            return Parallel.flatten(Parallel.call(
+            return Parallel.flatten(self.remote_call(
                 [client.get_records for client in self.clients],
                 game,
                 version,
@@ -513,7 +521,7 @@ class GlobalMusicData(BaseGlobalData):
         relevant_cards = self.__get_cardids(userid)
         if RemoteUser.is_remote(userid):
             # No need to look up local score for this user
-            scores = Parallel.flatten(Parallel.call(
+            scores = Parallel.flatten(self.remote_call(
                 [client.get_records for client in self.clients],
                 game,
                 version,
@@ -526,7 +534,7 @@ class GlobalMusicData(BaseGlobalData):
         else:
             localscores, scores = Parallel.execute([
                 lambda: self.music.get_scores(game, version, userid, since, until),
-                lambda: Parallel.flatten(Parallel.call(
+                lambda: Parallel.flatten(self.remote_call(
                     [client.get_records for client in self.clients],
                     game,
                     version,
@@ -653,11 +661,17 @@ class GlobalMusicData(BaseGlobalData):
         else:
             songkey = [songid, songchart]
 
-        # Now, fetch all the scores remotely and locally
-        localcards, localscores, remotescores = Parallel.execute([
-            self.user.get_all_cards,
-            lambda: self.music.get_all_scores(game, version, userid, songid, songchart, since, until),
-            lambda: Parallel.flatten(Parallel.call(
+        def get_remote_scores() -> List[Dict[str, Any]]:
+            if since is None and until is None:
+                # Every score for a song changes slowly enough that it's worth caching.
+                return Parallel.flatten(self.cached_remote_call(
+                    'get_records',
+                    game,
+                    version,
+                    APIConstants.ID_TYPE_SONG,
+                    songkey,
+                ))
+            return Parallel.flatten(self.remote_call(
                 [client.get_records for client in self.clients],
                 game,
                 version,
@@ -665,11 +679,70 @@ class GlobalMusicData(BaseGlobalData):
                 songkey,
                 since,
                 until,
-            )),
+            ))
+
+        # Now, fetch all the scores remotely and locally
+        localcards, localscores, remotescores = Parallel.execute([
+            self.user.get_all_cards,
+            lambda: self.music.get_all_scores(game, version, userid, songid, songchart, since, until),
+            get_remote_scores,
         ])
 
         return self.__merge_global_scores(game, version, localcards, localscores, remotescores)
 
+    def __get_all_ranked_scores(self, game: str, version: int, songid: int, songchart: int) -> List[Tuple[UserID, Score]]:
+        # Remote servers can only give us every score, so we have to rank them ourselves.
+        return sorted(
+            self.get_all_scores(game, version, songid=songid, songchart=songchart),
+            key=lambda s: (s[1].points, s[1].timestamp),
+            reverse=True,
+        )
+
+    def get_ranked_scores(
+        self,
+        game: str,
+        version: int,
+        songid: int,
+        songchart: int,
+        limit: int,
+        offset: int=0,
+    ) -> List[Tuple[UserID, Score]]:
+        if len(self.clients) == 0:
+            # Nothing to merge, so the local index can answer this directly.
+            return self.music.get_ranked_scores(game, version, songid, songchart, limit, offset)
+
+        return self.__get_all_ranked_scores(game, version, songid, songchart)[offset:(offset + limit)]
+
+    def get_score_rank(self, game: str, version: int, userid: UserID, songid: int, songchart: int) -> Optional[int]:
+        if len(self.clients) == 0:
+            # Nothing to merge, so the local index can answer this directly.
+            return self.music.get_score_rank(game, version, userid, songid, songchart)
+
+        for rank, (scoreuserid, _) in enumerate(self.__get_all_ranked_scores(game, version, songid, songchart)):
+            if scoreuserid == userid:
+                return rank + 1
+        return None
+
+    def get_score_neighbors(
+        self,
+        game: str,
+        version: int,
+        userid: UserID,
+        songid: int,
+        songchart: int,
+        distance: int,
+    ) -> Tuple[Optional[int], List[Tuple[UserID, Score]]]:
+        if len(self.clients) == 0:
+            # Nothing to merge, so the local index can answer this directly.
+            return self.music.get_score_neighbors(game, version, userid, songid, songchart, distance)
+
+        scores = self.__get_all_ranked_scores(game, version, songid, songchart)
+        for index, (scoreuserid, _) in enumerate(scores):
+            if scoreuserid == userid:
+                start = max(index - distance, 0)
+                return (start + 1, scores[start:(index + distance + 1)])
+        return (None, [])
+
     def get_all_records(
         self,
         game: str,
@@ -689,8 +762,8 @@ class GlobalMusicData(BaseGlobalData):
         localcards, localscores, remotescores = Parallel.execute([
             self.user.get_all_cards,
             lambda: self.music.get_all_records(game, version, userlist, locationlist),
-            lambda: Parallel.flatten(Parallel.call(
-                [client.get_records for client in self.clients],
+            lambda: Parallel.flatten(self.cached_remote_call(
+                'get_records',
                 game,
                 version,
                 APIConstants.ID_TYPE_SERVER,
@@ -729,8 +802,8 @@ class GlobalMusicData(BaseGlobalData):
         """
 
         if songid is None and songchart is None:
-            statistics = Parallel.flatten(Parallel.call(
-                [client.get_statistics for client in self.clients],
+            statistics = Parallel.flatten(self.cached_remote_call(
+                'get_statistics',
                 game,
                 version,
                 APIConstants.ID_TYPE_SERVER,
@@ -741,8 +814,8 @@ class GlobalMusicData(BaseGlobalData):
                 ids = [songid]
             else:
                 ids = [songid, songchart]
-            statistics = Parallel.flatten(Parallel.call(
-                [client.get_statistics for client in self.clients],
+            statistics = Parallel.flatten(self.cached_remote_call(
+                'get_statistics',
                 game,
                 version,
                 APIConstants.ID_TYPE_SONG,
@@ -1016,7 +1089,7 @@ class GlobalMusicData(BaseGlobalData):
             # skip that for now.
             return []
 
-        catalogs: List[Dict[str, List[Dict[str, Any]]]] = Parallel.call(
+        catalogs: List[Dict[str, List[Dict[str, Any]]]] = self.remote_call(
             [client.get_catalog for client in self.clients],
             game,
             version
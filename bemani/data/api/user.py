@@ -3,7 +3,7 @@ from typing import List, Tuple, Optional, Dict, Any
 
 from bemani.common import APIConstants, GameConstants, ValidatedDict, Parallel
 from bemani.data.interfaces import APIProviderInterface
-from bemani.data.api.base import BaseGlobalData
+from bemani.data.api.base import BaseGlobalData, ServerRegistry
 from bemani.data.mysql.user import UserData
 from bemani.data.remoteuser import RemoteUser
 from bemani.data.types import UserID
@@ -11,8 +11,14 @@ from bemani.data.types import UserID
 
 class GlobalUserData(BaseGlobalData):
 
-    def __init__(self, api: APIProviderInterface, user: UserData) -> None:
-        super().__init__(api)
+    def __init__(
+        self,
+        api: APIProviderInterface,
+        user: UserData,
+        remote_budget: Optional[float]=None,
+        registry: Optional[ServerRegistry]=None,
+    ) -> None:
+        super().__init__(api, remote_budget, registry=registry)
         self.user = user
 
     def __format_ddr_profile(self, profile: ValidatedDict) -> Dict[str, Any]:
@@ -111,7 +117,7 @@ class GlobalUserData(BaseGlobalData):
         refid = self.user.get_refid(game, version, userid)
         extid = self.user.get_extid(game, version, userid)
 
-        profiles = Parallel.flatten(Parallel.call(
+        profiles = Parallel.flatten(self.remote_call(
             [client.get_profiles for client in self.clients],
             game,
             version,
@@ -167,7 +173,15 @@ class GlobalUserData(BaseGlobalData):
         else:
             return self.user.get_any_profile(game, version, userid)
 
-    def get_any_profiles(self, game: str, version: int, userids: List[UserID]) -> List[Tuple[UserID, Optional[ValidatedDict]]]:
+    def get_any_profiles(
+        self,
+        game: str,
+        version: int,
+        userids: List[UserID],
+        fields: Optional[List[str]]=None,
+    ) -> List[Tuple[UserID, Optional[ValidatedDict]]]:
+        # Remote servers always hand back whole profiles, so fields only narrows what
+        # we fetch for local users.
         if len(userids) == 0:
             return []
 
@@ -182,7 +196,7 @@ class GlobalUserData(BaseGlobalData):
 
         if len(remote_ids) == 0:
             # We only have local profiles here, just pass on to the underlying layer
-            return self.user.get_any_profiles(game, version, local_ids)
+            return self.user.get_any_profiles(game, version, local_ids, fields)
         else:
             # We have to fetch some local profiles and some remote profiles, and then
             # merge them together
@@ -192,8 +206,8 @@ class GlobalUserData(BaseGlobalData):
             }
 
             local_profiles, remote_profiles = Parallel.execute([
-                lambda: self.user.get_any_profiles(game, version, local_ids),
-                lambda: Parallel.flatten(Parallel.call(
+                lambda: self.user.get_any_profiles(game, version, local_ids, fields),
+                lambda: Parallel.flatten(self.remote_call(
                     [client.get_profiles for client in self.clients],
                     game,
                     version,
@@ -241,13 +255,13 @@ class GlobalUserData(BaseGlobalData):
 
             return local_profiles
 
-    def get_all_profiles(self, game: str, version: int) -> List[Tuple[UserID, ValidatedDict]]:
+    def get_all_profiles(self, game: str, version: int, fields: Optional[List[str]]=None) -> List[Tuple[UserID, ValidatedDict]]:
         # Fetch local and remote profiles, and then merge by adding remote profiles to local
         # profiles when we don't have a profile for that user ID yet.
         local_cards, local_profiles, remote_profiles = Parallel.execute([
             self.user.get_all_cards,
-            lambda: self.user.get_all_profiles(game, version),
-            lambda: Parallel.flatten(Parallel.call(
+            lambda: self.user.get_all_profiles(game, version, fields),
+            lambda: Parallel.flatten(self.remote_call(
                 [client.get_profiles for client in self.clients],
                 game,
                 version,
@@ -0,0 +1,101 @@
+import time
+from typing import Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+
+ValueType = TypeVar('ValueType')
+
+
+class TTLCache(Generic[ValueType]):
+    """
+    A small bounded cache whose entries expire after a fixed number of seconds. Meant
+    to be held at class level by data-layer objects so that it is shared by every
+    request a process handles. This is not shared between processes, so anything
+    cached here can be stale by up to the TTL when another process writes to the DB.
+    """
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        """
+        Initialize the cache.
+
+        Parameters:
+            ttl - Number of seconds an entry is good for after being put.
+            max_entries - Maximum number of entries to remember at once.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.__entries: Dict[Hashable, Tuple[float, ValueType]] = {}
+
+    def get(self, key: Hashable) -> Optional[ValueType]:
+        """
+        Look up an entry.
+
+        Parameters:
+            key - A hashable key, as previously given to put().
+
+        Returns:
+            The cached value if it is present and hasn't expired, or None.
+        """
+        entry = self.__entries.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires >= time.time():
+                self.hits += 1
+                return value
+            self.__entries.pop(key, None)
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: ValueType) -> None:
+        """
+        Remember an entry.
+
+        Parameters:
+            key - A hashable key.
+            value - The value to remember for this key.
+        """
+        if key not in self.__entries and len(self.__entries) >= self.max_entries:
+            # Evict the oldest entry, since dictionaries preserve insertion order.
+            try:
+                del self.__entries[next(iter(self.__entries))]
+            except (KeyError, StopIteration, RuntimeError):
+                # Another thread beat us to it, that's fine.
+                pass
+        self.__entries[key] = (time.time() + self.ttl, value)
+
+    def invalidate(self, key: Optional[Hashable]=None) -> None:
+        """
+        Forget entries.
+
+        Parameters:
+            key - If provided, only this entry is forgotten. Otherwise, every
+                  entry is forgotten.
+        """
+        if key is None:
+            self.__entries.clear()
+        else:
+            self.__entries.pop(key, None)
+
+    def invalidate_matching(self, predicate: Callable[[ValueType], bool]) -> None:
+        """
+        Forget every entry whose value matches a predicate.
+
+        Parameters:
+            predicate - Called with each cached value, returning True if that entry
+                        should be forgotten.
+        """
+        for key, (_, value) in list(self.__entries.items()):
+            if predicate(value):
+                self.__entries.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns:
+            A dictionary containing the number of entries, hits and misses.
+        """
+        return {
+            'entries': len(self.__entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
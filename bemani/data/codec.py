@@ -0,0 +1,107 @@
+import json
+from typing import Any, Dict
+
+try:
+    import orjson  # type: ignore
+except ImportError:
+    orjson = None
+
+
+class JsonCodec:
+    """
+    Serializes the dictionaries we store in JSON columns using the standard library.
+
+    Bytes are stored as an object with a single '__bytes__' key whose value is the
+    hex representation of the data. Those are turned back into bytes by an object hook
+    as they are decoded, so there is no separate pass over the decoded structure. Rows
+    written before this format used a list starting with '__bytes__' followed by each
+    byte as an integer, and those are still converted when they are found.
+    """
+
+    name = 'json'
+
+    @staticmethod
+    def _default(obj: Any) -> Any:
+        if isinstance(obj, bytes):
+            return {'__bytes__': obj.hex()}
+        raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+    @staticmethod
+    def _object_hook(obj: Dict[str, Any]) -> Any:
+        if len(obj) == 1 and isinstance(obj.get('__bytes__'), str):
+            return bytes.fromhex(obj['__bytes__'])
+        return obj
+
+    @staticmethod
+    def _fix(jd: Any) -> Any:
+        if type(jd) is dict:
+            if len(jd) == 1 and isinstance(jd.get('__bytes__'), str):
+                return bytes.fromhex(jd['__bytes__'])
+
+            # Fix each element in the dictionary.
+            for key in jd:
+                jd[key] = JsonCodec._fix(jd[key])
+            return jd
+
+        if type(jd) is list:
+            # Could be a legacy serialized bytestring, could be a normal list.
+            if len(jd) >= 1 and jd[0] == '__bytes__':
+                return bytes(jd[1:])
+
+            # Possibly one of these is a dictionary/list/serialized.
+            for i in range(len(jd)):
+                jd[i] = JsonCodec._fix(jd[i])
+            return jd
+
+        # Normal value, its deserialized version is itself.
+        return jd
+
+    def encode(self, data: Dict[str, Any]) -> str:
+        """
+        Given an arbitrary dict, serialize it to a JSON string.
+        """
+        return json.dumps(data, default=self._default)
+
+    def decode(self, data: str) -> Any:
+        """
+        Given a JSON string, deserialize it, restoring any bytes that were serialized.
+        """
+        if '"__bytes__"' not in data:
+            # Nothing was serialized specially, so we can take the fast path.
+            return json.loads(data)
+        if '["__bytes__"' in data:
+            # This was written using the legacy list format, so walk the whole thing.
+            return self._fix(json.loads(data))
+        return json.loads(data, object_hook=self._object_hook)
+
+
+class OrjsonCodec(JsonCodec):
+    """
+    Same storage format as JsonCodec, but using orjson which is considerably faster
+    when it is installed. Anything orjson refuses to encode, such as integers too large
+    for 64 bits, is handed to the standard library instead.
+    """
+
+    name = 'orjson'
+
+    def encode(self, data: Dict[str, Any]) -> str:
+        try:
+            return orjson.dumps(data, default=self._default, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+        except TypeError:
+            return super().encode(data)
+
+    def decode(self, data: str) -> Any:
+        if '"__bytes__"' not in data:
+            return orjson.loads(data)
+        # orjson has no object hook, and walking its output afterwards is slower than
+        # letting the standard library restore bytes as it decodes.
+        return super().decode(data)
+
+
+def default_codec() -> JsonCodec:
+    """
+    Returns the fastest codec available on this system.
+    """
+    if orjson is not None:
+        return OrjsonCodec()
+    return JsonCodec()
@@ -1,5 +1,8 @@
 import os
-from typing import Dict, Any
+import random
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 import alembic.config  # type: ignore
 from alembic.migration import MigrationContext  # type: ignore
@@ -11,10 +14,11 @@ from sqlalchemy.engine import Engine  # type: ignore
 from sqlalchemy.sql import text  # type: ignore
 from sqlalchemy.exc import ProgrammingError  # type: ignore
 
+from bemani.data.api.base import ServerRegistry
 from bemani.data.api.user import GlobalUserData
 from bemani.data.api.game import GlobalGameData
 from bemani.data.api.music import GlobalMusicData
-from bemani.data.mysql.base import metadata
+from bemani.data.mysql.base import ReplicaRouter, metadata
 from bemani.data.mysql.user import UserData
 from bemani.data.mysql.music import MusicData
 from bemani.data.mysql.machine import MachineData
@@ -28,6 +32,57 @@ class DBCreateException(Exception):
     pass
 
 
+class ReplicaPool:
+    """
+    A set of read replica engines which heavy read-only consumers can send plain SELECT
+    statements to. Replicas which have fallen too far behind the primary, or which we
+    can't reach, are skipped until they catch up.
+    """
+
+    # How often we re-check a replica's lag, in seconds.
+    LAG_CHECK_INTERVAL = 10
+
+    def __init__(self, engines: List[Engine], max_lag: int) -> None:
+        """
+        Initialize the pool.
+
+        Parameters:
+            engines - A list of engines, one per replica.
+            max_lag - Maximum number of seconds a replica can be behind the primary
+                      before we stop sending queries to it.
+        """
+        self.engines = engines
+        self.max_lag = max_lag
+        self.__checked: Dict[int, Tuple[float, bool]] = {}
+
+    def __usable(self, index: int) -> bool:
+        now = time.time()
+        checked = self.__checked.get(index)
+        if checked is not None and checked[0] + self.LAG_CHECK_INTERVAL > now:
+            return checked[1]
+
+        try:
+            with self.engines[index].connect() as conn:
+                status = conn.execute(text('SHOW SLAVE STATUS')).fetchone()
+            # A replica that isn't replicating reports no status or no lag at all.
+            lag = None if status is None else status['Seconds_Behind_Master']
+            usable = lag is not None and lag <= self.max_lag
+        except Exception:
+            usable = False
+        self.__checked[index] = (now, usable)
+        return usable
+
+    def choose(self) -> Optional[Engine]:
+        """
+        Returns a random replica engine which is caught up enough to use, or None if
+        every replica is lagging or down and the primary should be used instead.
+        """
+        usable = [self.engines[i] for i in range(len(self.engines)) if self.__usable(i)]
+        if len(usable) == 0:
+            return None
+        return random.choice(usable)
+
+
 class LocalProvider:
     """
     A wrapper object for implementing local data operations only. Right
@@ -63,18 +118,28 @@ class GlobalProvider:
     def __init__(
         self,
         local: LocalProvider,
+        remote_budget: Optional[float],
+        remote_cache_ttl: Optional[int],
+        registry: Optional[ServerRegistry],
     ) -> None:
         self.user = GlobalUserData(
             local.api,
             local.user,
+            remote_budget,
+            registry,
         )
         self.music = GlobalMusicData(
             local.api,
             local.user,
             local.music,
+            remote_budget,
+            remote_cache_ttl,
+            registry,
         )
         self.game = GlobalGameData(
             local.api,
+            remote_budget,
+            registry=registry,
         )
 
 
@@ -101,13 +166,27 @@ class Data:
         self.__config = config
         self.__session = scoped_session(session_factory)
         self.__url = Data.sqlalchemy_url(config)
-        self.__user = UserData(config, self.__session)
-        self.__music = MusicData(config, self.__session)
-        self.__machine = MachineData(config, self.__session)
-        self.__game = GameData(config, self.__session)
-        self.__network = NetworkData(config, self.__session)
-        self.__lobby = LobbyData(config, self.__session)
-        self.__api = APIData(config, self.__session)
+
+        # If we were given replicas, heavy reads can go to one of them until we write.
+        self.__replica_session = None
+        self.__router = None
+        replica_pool = config['database'].get('replica_pool')
+        replica_engine = replica_pool.choose() if replica_pool is not None else None
+        if replica_engine is not None:
+            self.__replica_session = scoped_session(sessionmaker(
+                bind=replica_engine,
+                autoflush=True,
+                autocommit=True,
+            ))
+            self.__router = ReplicaRouter(self.__replica_session)
+
+        self.__user = UserData(config, self.__session, self.__router)
+        self.__music = MusicData(config, self.__session, self.__router)
+        self.__machine = MachineData(config, self.__session, self.__router)
+        self.__game = GameData(config, self.__session, self.__router)
+        self.__network = NetworkData(config, self.__session, self.__router)
+        self.__lobby = LobbyData(config, self.__session, self.__router)
+        self.__api = APIData(config, self.__session, self.__router)
         self.local = LocalProvider(
             self.__user,
             self.__music,
@@ -117,7 +196,12 @@ class Data:
             self.__lobby,
             self.__api,
         )
-        self.remote = GlobalProvider(self.local)
+        self.remote = GlobalProvider(
+            self.local,
+            config.get('remote_budget', 2.0),
+            config.get('remote_cache_ttl', 300),
+            config['database'].get('server_registry'),
+        )
 
     @classmethod
     def sqlalchemy_url(cls, config: Dict[str, Any]) -> str:
@@ -128,8 +212,55 @@ class Data:
         return create_engine(  # type: ignore
             Data.sqlalchemy_url(config),
             pool_recycle=3600,
+            pool_size=config['database'].get('pool_size', 5),
+            max_overflow=config['database'].get('max_overflow', 10),
+            pool_timeout=config['database'].get('pool_timeout', 30),
         )
 
+    @classmethod
+    def create_replica_pool(cls, config: Dict[str, Any]) -> Optional[ReplicaPool]:
+        """
+        Create engines for any read replicas listed under 'replicas' in the database
+        config. Each replica only needs an address, and takes anything else it doesn't
+        specify from the primary's settings. Returns None if there are no replicas
+        configured.
+        """
+        replicas = config['database'].get('replicas', [])
+        if len(replicas) == 0:
+            return None
+
+        engines = []
+        for replica in replicas:
+            replica_config = {'database': {**config['database'], **replica}}
+            engines.append(Data.create_engine(replica_config))
+        return ReplicaPool(engines, config['database'].get('replica_max_lag', 5))
+
+    @classmethod
+    def create_server_registry(cls) -> ServerRegistry:
+        """
+        Create a registry of remote servers which can be shared by every Data object in
+        a server process, so that remote servers aren't looked up on every request.
+        """
+        return ServerRegistry()
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Run every query made inside the with block in a single transaction, committing
+        once at the end, or rolling everything back if an exception is raised. Outside
+        of this, every write is committed as soon as it is executed.
+        """
+        if self.__router is not None:
+            # Reads inside a transaction need to see the transaction's writes.
+            self.__router.pinned = True
+        self.__session.begin(subtransactions=True)
+        try:
+            yield
+        except Exception:
+            self.__session.rollback()
+            raise
+        self.__session.commit()
+
     def __exists(self) -> bool:
         # See if the DB was already created
         try:
@@ -204,6 +335,18 @@ class Data:
             'head',
         )
 
+    def release(self) -> None:
+        """
+        Return the current thread's connection to the pool. Unlike close, this
+        object can still be used afterwards, and will check out a connection
+        again when it next needs one. Use this when a Data object lives across
+        many requests.
+        """
+        if self.__session is not None:
+            self.__session.remove()
+        if self.__replica_session is not None:
+            self.__replica_session.remove()
+
     def close(self) -> None:
         """
         Close any open data connection.
@@ -212,3 +355,6 @@ class Data:
         if self.__session is not None:
             self.__session.close()
             self.__session = None
+        if self.__replica_session is not None:
+            self.__replica_session.close()
+            self.__replica_session = None
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, List, Tuple
 
 from bemani.data.types import Server
 
@@ -14,3 +14,53 @@ class APIProviderInterface(ABC):
         Returns:
             A list of Server objects sorted by add time.
         """
+
+    @abstractmethod
+    def get_server_version(self) -> int:
+        """
+        Look up the version stamp of the server list, which changes every time a server
+        is created, updated or destroyed.
+
+        Returns:
+            An integer version.
+        """
+
+    @abstractmethod
+    def get_remote_cache(self, keys: List[str]) -> Dict[str, Tuple[int, Any]]:
+        """
+        Given a list of cache keys, look up any cached remote responses.
+
+        Parameters:
+            keys - A list of strings identifying a server and the query sent to it.
+
+        Returns:
+            A dictionary keyed by cache key, whose values are a tuple of the timestamp
+            the response was fetched at and the response itself. Keys with nothing
+            cached are left out.
+        """
+
+    @abstractmethod
+    def put_remote_cache(self, key: str, timestamp: int, data: Any) -> None:
+        """
+        Given a cache key, store a response fetched from a remote server.
+
+        Parameters:
+            key - String identifying a server and the query sent to it.
+            timestamp - Integer timestamp the response was fetched at.
+            data - The response itself, which must be JSON serializable.
+        """
+
+    @abstractmethod
+    def claim_remote_cache_refresh(self, key: str, timeout: int) -> bool:
+        """
+        Given a cache key, claim the right to refresh it in the background, so that
+        only one process refreshes any given entry at once.
+
+        Parameters:
+            key - String identifying a server and the query sent to it.
+            timeout - Number of seconds after which an earlier claim is assumed to have
+                      failed and can be taken over.
+
+        Returns:
+            True if the caller should refresh the entry, False otherwise.
+        """
@@ -1,7 +1,7 @@
 import uuid
 from sqlalchemy import Table, Column  # type: ignore
-from sqlalchemy.types import String, Integer  # type: ignore
-from typing import Any, Dict, List, Optional
+from sqlalchemy.types import String, Integer, JSON  # type: ignore
+from typing import Any, Dict, List, Optional, Tuple
 
 from bemani.common import Time
 from bemani.data.mysql.base import BaseData, metadata
@@ -37,6 +37,34 @@ server = Table(  # type: ignore
     mysql_charset='utf8mb4',
 )
 
+"""
+Table holding a single row whose version is bumped every time a remote server is
+added, changed or removed, so server processes know when to reload the server list.
+"""
+server_version = Table(  # type: ignore
+    'server_version',
+    metadata,
+    Column('id', Integer, nullable=False, primary_key=True),
+    Column('version', Integer, nullable=False),
+    mysql_charset='utf8mb4',
+)
+
+"""
+Table for caching responses from remote servers, so that every server process can
+share them. The key is a hash of the server and the query sent to it. Refresh is the
+timestamp a process claimed the entry for refreshing, or zero if nobody has.
+"""
+remote_cache = Table(  # type: ignore
+    'remote_cache',
+    metadata,
+    Column('id', Integer, nullable=False, primary_key=True),
+    Column('cachekey', String(40), nullable=False, unique=True),
+    Column('timestamp', Integer, nullable=False, index=True),
+    Column('refresh', Integer, nullable=False),
+    Column('data', JSON, nullable=False),
+    mysql_charset='utf8mb4',
+)
+
 
 class APIData(APIProviderInterface, BaseData):
 
@@ -180,6 +208,7 @@ class APIData(APIProviderInterface, BaseData):
                 'token': token,
             },
         )
+        self.__bump_server_version()
         return cursor.lastrowid
 
     def get_server(self, serverid: int) -> Optional[Server]:
@@ -224,6 +253,7 @@ class APIData(APIProviderInterface, BaseData):
             config = config | 0x2
         sql = "UPDATE server SET uri = :uri, token = :token, config = :config WHERE id = :id"
         self.execute(sql, {'id': server.id, 'uri': server.uri, 'token': server.token, 'config': config})
+        self.__bump_server_version()
 
     def destroy_server(self, serverid: int) -> None:
         """
@@ -234,3 +264,90 @@ class APIData(APIProviderInterface, BaseData):
         """
         sql = "DELETE FROM server WHERE id = :id LIMIT 1"
         self.execute(sql, {'id': serverid})
+        self.__bump_server_version()
+
+    def __bump_server_version(self) -> None:
+        sql = "INSERT INTO server_version (id, version) VALUES (1, 1) ON DUPLICATE KEY UPDATE version = version + 1"
+        self.execute(sql)
+
+    def get_server_version(self) -> int:
+        """
+        Look up the version stamp of the server list, which changes every time a server
+        is created, updated or destroyed.
+
+        Returns:
+            An integer version, which is zero if no server has ever been changed.
+        """
+        sql = "SELECT version FROM server_version WHERE id = 1"
+        cursor = self.execute(sql)
+        if cursor.rowcount != 1:
+            return 0
+        return cursor.fetchone()['version']
+
+    def get_remote_cache(self, keys: List[str]) -> Dict[str, Tuple[int, Any]]:
+        """
+        Given a list of cache keys, look up any cached remote responses.
+
+        Parameters:
+            keys - A list of strings identifying a server and the query sent to it.
+
+        Returns:
+            A dictionary keyed by cache key, whose values are a tuple of the timestamp
+            the response was fetched at and the response itself. Keys with nothing
+            cached are left out.
+        """
+        if len(keys) == 0:
+            return {}
+
+        sql = "SELECT cachekey, timestamp, data FROM remote_cache WHERE cachekey IN :keys"
+        cursor = self.execute(sql, {'keys': tuple(keys)})
+        return {
+            result['cachekey']: (result['timestamp'], self.deserialize(result['data'])['data'])
+            for result in cursor.fetchall()
+        }
+
+    def put_remote_cache(self, key: str, timestamp: int, data: Any) -> None:
+        """
+        Given a cache key, store a response fetched from a remote server. This also
+        releases any refresh claim on the entry.
+
+        Parameters:
+            key - String identifying a server and the query sent to it.
+            timestamp - Integer timestamp the response was fetched at.
+            data - The response itself, which must be JSON serializable.
+        """
+        sql = (
+            "INSERT INTO remote_cache (cachekey, timestamp, refresh, data) VALUES (:key, :timestamp, 0, :data) " +
+            "ON DUPLICATE KEY UPDATE timestamp = VALUES(timestamp), refresh = 0, data = VALUES(data)"
+        )
+        # This is only a cache, so it's fine to keep it up to date in read-only mode.
+        self.execute(
+            sql,
+            {'key': key, 'timestamp': timestamp, 'data': self.serialize({'data': data})},
+            safe_write_operation=True,
+        )
+
+    def claim_remote_cache_refresh(self, key: str, timeout: int) -> bool:
+        """
+        Given a cache key, claim the right to refresh it in the background, so that
+        only one process refreshes any given entry at once.
+
+        Parameters:
+            key - String identifying a server and the query sent to it.
+            timeout - Number of seconds after which an earlier claim is assumed to have
+                      failed and can be taken over.
+
+        Returns:
+            True if the caller should refresh the entry, False otherwise.
+        """
+        now = Time.now()
+        sql = "UPDATE remote_cache SET refresh = :now WHERE cachekey = :key AND refresh < :expired"
+        cursor = self.execute(sql, {'key': key, 'now': now, 'expired': now - timeout}, safe_write_operation=True)
+        return cursor.rowcount == 1
+
+    def delete_remote_cache(self, oldest_timestamp: int) -> None:
+        """
+        Given a timestamp, delete every cached remote response fetched before then.
+        """
+        sql = "DELETE FROM remote_cache WHERE timestamp < :timestamp"
+        self.execute(sql, {'timestamp': oldest_timestamp}, safe_write_operation=True)
@@ -1,8 +1,8 @@
-import json
 import random
 from typing import Dict, Any, Optional
 
 from bemani.common import Time
+from bemani.data.codec import JsonCodec, default_codec
 
 from sqlalchemy.engine.base import Connection  # type: ignore
 from sqlalchemy.engine import CursorResult  # type: ignore
@@ -27,19 +27,42 @@ session = Table(  # type: ignore
 )
 
 
-class _BytesEncoder(json.JSONEncoder):
-    def default(self, obj: Any) -> Any:
-        if isinstance(obj, bytes):
-            # We're abusing lists here, we have a mixed type
-            return ['__bytes__'] + [b for b in obj]  # type: ignore
-        return json.JSONEncoder.default(self, obj)
+class ReplicaRouter:
+    """
+    Decides which queries made through a Data object can be sent to a read replica.
+    Only heavy reads that opt in by passing allow_replica to execute are ever sent to
+    the replica, since a replica may be behind and the next request has to see what
+    the last one wrote. Once anything writes or a transaction is started, everything
+    goes to the primary for the rest of the Data object's life.
+    """
+
+    def __init__(self, replica: Connection) -> None:
+        self.replica = replica
+        self.pinned = False
+
+    def route(self, sql: str, allow_replica: bool) -> Optional[Connection]:
+        """
+        Given a SQL string about to be executed and whether the caller can tolerate
+        replica lag, return the replica connection it should be sent to, or None if it
+        must go to the primary.
+        """
+        if not self.pinned:
+            statement = sql.lstrip().lower()
+            if statement.startswith('select ') and 'for update' not in statement and 'lock in share mode' not in statement:
+                return self.replica if allow_replica else None
+            self.pinned = True
+        return None
 
 
 class BaseData:
 
     SESSION_LENGTH = 32
 
-    def __init__(self, config: Dict[str, Any], conn: Connection) -> None:
+    # Codec used for every JSON column, shared by all data objects. Uses orjson when
+    # it is installed and the standard library otherwise.
+    codec: JsonCodec = default_codec()
+
+    def __init__(self, config: Dict[str, Any], conn: Connection, router: Optional[ReplicaRouter]=None) -> None:
         """
         Initialize any DB singleton.
 
@@ -50,17 +73,29 @@ class BaseData:
                      needs to look up configuration.
             conn - An established connection to the DB which will be used for all
                    queries.
+            router - An optional replica router, shared by every data object belonging
+                     to the same Data, which may send reads to a replica instead.
         """
         self.__config = config
         self.__conn = conn
-
-    def execute(self, sql: str, params: Optional[Dict[str, Any]]=None, safe_write_operation: bool=False) -> CursorResult:
+        self.__router = router
+
+    def execute(
+        self,
+        sql: str,
+        params: Optional[Dict[str, Any]]=None,
+        safe_write_operation: bool=False,
+        allow_replica: bool=False,
+    ) -> CursorResult:
         """
         Given a SQL string and some parameters, execute the query and return the result.
 
         Parameters:
             sql - The SQL statement to execute.
             params - Dictionary of parameters which will be substituted into the sql string.
+            allow_replica - Whether this read may be sent to a read replica, which can be
+                            a few seconds behind. Only heavy reads whose callers don't
+                            need to see recent writes should set this.
 
         Returns:
             A SQLAlchemy CursorResult object.
@@ -74,7 +109,12 @@ class BaseData:
             ]:
                 if write_statement in sql.lower() and not safe_write_operation:
                     raise Exception('Read-only mode is active!')
-        return self.__conn.execute(  # type: ignore
+        conn = self.__conn
+        if self.__router is not None:
+            replica = self.__router.route(sql, allow_replica)
+            if replica is not None:
+                conn = replica
+        return conn.execute(  # type: ignore
             text(sql),
             params if params is not None else {},
         )
@@ -83,7 +123,7 @@ class BaseData:
         """
         Given an arbitrary dict, serialize it to JSON.
         """
-        return json.dumps(data, cls=_BytesEncoder)
+        return self.codec.encode(data)
 
     def deserialize(self, data: Optional[str]) -> Dict[str, Any]:
         """
@@ -91,29 +131,7 @@ class BaseData:
         """
         if data is None:
             return {}
-
-        def fix(jd: Any) -> Any:
-            if type(jd) == dict:
-                # Fix each element in the dictionary.
-                for key in jd:
-                    jd[key] = fix(jd[key])
-                return jd
-
-            if type(jd) == list:
-                # Could be serialized by us, could be a normal list.
-                if len(jd) >= 1 and jd[0] == '__bytes__':
-                    # This is a serialized bytestring
-                    return bytes(jd[1:])
-
-                # Possibly one of these is a dictionary/list/serialized.
-                for i in range(len(jd)):
-                    jd[i] = fix(jd[i])
-                return jd
-
-            # Normal value, its deserialized version is itself.
-            return jd
-
-        return fix(json.loads(data))
+        return self.codec.decode(data)
 
     def _from_session(self, session: str, sesstype: str) -> Optional[int]:
         """
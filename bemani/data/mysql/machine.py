@@ -1,9 +1,11 @@
 from sqlalchemy import Table, Column, UniqueConstraint  # type: ignore
 from sqlalchemy.types import String, Integer, JSON  # type: ignore
 from sqlalchemy.dialects.mysql import BIGINT as BigInteger  # type: ignore
+import copy
 from typing import Optional, Dict, List, Tuple, Any
 
 from bemani.common import ValidatedDict
+from bemani.data.cache import TTLCache
 from bemani.data.mysql.base import BaseData, metadata
 from bemani.data.types import Machine, Arcade, UserID, ArcadeID
 
@@ -79,6 +81,12 @@ class ArcadeCreationException(Exception):
 
 class MachineData(BaseData):
 
+    # Every packet a game sends looks up its machine and arcade, so remember them
+    # for a short while. Other processes (such as the frontend) can't invalidate
+    # our copy, so keep the TTL short enough that operator changes show up quickly.
+    MACHINE_CACHE: TTLCache[Machine] = TTLCache(ttl=30, max_entries=4096)
+    ARCADE_CACHE: TTLCache[Arcade] = TTLCache(ttl=30, max_entries=1024)
+
     def from_port(self, port: int) -> Optional[str]:
         """
         Given a port, look up the PCBID attached to that port.
@@ -148,16 +156,24 @@ class MachineData(BaseData):
             return None
         return ArcadeID(arcadeid)
 
-    def get_machine(self, pcbid: str) -> Optional[Machine]:
+    def get_machine(self, pcbid: str, cached: bool=True) -> Optional[Machine]:
         """
         Given a PCBID, look up a machine.
 
         Parameters:
             pcbid - The PCBID as returned from a game.
+            cached - Whether a copy cached by this process may be returned. Callers that
+                     modify the machine and save it back with put_machine should pass
+                     False, so they don't overwrite changes made by other processes.
 
         Returns:
             A Machine object representing a machine, or None if not found.
         """
+        # Callers are free to modify what we return, so never hand out the cached copy.
+        machine = MachineData.MACHINE_CACHE.get(pcbid) if cached else None
+        if machine is not None:
+            return copy.deepcopy(machine)
+
         sql = "SELECT name, description, arcadeid, id, port, game, version, data FROM machine WHERE pcbid = :pcbid"
         cursor = self.execute(sql, {'pcbid': pcbid})
         if cursor.rowcount != 1:
@@ -165,7 +181,7 @@ class MachineData(BaseData):
             return None
 
         result = cursor.fetchone()
-        return Machine(
+        machine = Machine(
             result['id'],
             pcbid,
             result['name'],
@@ -176,6 +192,8 @@ class MachineData(BaseData):
             result['version'],
             self.deserialize(result['data']),
         )
+        MachineData.MACHINE_CACHE.put(pcbid, copy.deepcopy(machine))
+        return machine
 
     def get_all_machines(self, arcade: Optional[ArcadeID]=None) -> List[Machine]:
         """
@@ -230,6 +248,7 @@ class MachineData(BaseData):
                 'data': self.serialize(machine.data)
             },
         )
+        MachineData.MACHINE_CACHE.invalidate(machine.pcbid)
 
     def create_machine(self, pcbid: str, name: str='なし', description: str='', arcade: Optional[ArcadeID]=None) -> Machine:
         """
@@ -287,6 +306,7 @@ class MachineData(BaseData):
         """
         sql = "DELETE FROM `machine` WHERE pcbid = :pcbid LIMIT 1"
         self.execute(sql, {'pcbid': pcbid})
+        MachineData.MACHINE_CACHE.invalidate(pcbid)
 
     def create_arcade(self, name: str, description: str, data: Dict[str, Any], owners: List[UserID]) -> Arcade:
         """
@@ -315,16 +335,24 @@ class MachineData(BaseData):
             self.execute(sql, {'userid': owner, 'arcadeid': arcadeid})
         return self.get_arcade(arcadeid)
 
-    def get_arcade(self, arcadeid: ArcadeID) -> Optional[Arcade]:
+    def get_arcade(self, arcadeid: ArcadeID, cached: bool=True) -> Optional[Arcade]:
         """
         Given an arcade ID, look up the arcade.
 
         Parameters:
             arcadeid - The integer arcade ID, most likely returned from a get_machine query.
+            cached - Whether a copy cached by this process may be returned. Callers that
+                     modify the arcade and save it back with put_arcade should pass
+                     False, so they don't overwrite changes made by other processes.
 
         Returns:
             An Arcade object if this arcade was found, or None otherwise.
         """
+        # Callers are free to modify what we return, so never hand out the cached copy.
+        arcade = MachineData.ARCADE_CACHE.get(arcadeid) if cached else None
+        if arcade is not None:
+            return copy.deepcopy(arcade)
+
         sql = (
             "SELECT name, description, pin, data FROM arcade WHERE id = :id"
         )
@@ -338,7 +366,7 @@ class MachineData(BaseData):
         sql = "SELECT userid FROM arcade_owner WHERE arcadeid = :id"
         cursor = self.execute(sql, {'id': arcadeid})
 
-        return Arcade(
+        arcade = Arcade(
             arcadeid,
             result['name'],
             result['description'],
@@ -346,6 +374,8 @@ class MachineData(BaseData):
             self.deserialize(result['data']),
             [owner['userid'] for owner in cursor.fetchall()],
         )
+        MachineData.ARCADE_CACHE.put(arcadeid, copy.deepcopy(arcade))
+        return arcade
 
     def put_arcade(self, arcade: Arcade) -> None:
         """
@@ -375,6 +405,7 @@ class MachineData(BaseData):
         for owner in arcade.owners:
             sql = "INSERT INTO arcade_owner (userid, arcadeid) VALUES(:userid, :arcadeid)"
             self.execute(sql, {'userid': owner, 'arcadeid': arcade.id})
+        MachineData.ARCADE_CACHE.invalidate(arcade.id)
 
     def destroy_arcade(self, arcadeid: ArcadeID) -> None:
         """
@@ -390,6 +421,9 @@ class MachineData(BaseData):
         self.execute(sql, {'arcadeid': arcadeid})
         sql = "UPDATE `machine` SET arcadeid = NULL WHERE arcadeid = :arcadeid"
         self.execute(sql, {'arcadeid': arcadeid})
+        MachineData.ARCADE_CACHE.invalidate(arcadeid)
+        # Any number of machines could have been in this arcade.
+        MachineData.MACHINE_CACHE.invalidate()
 
     def get_all_arcades(self) -> List[Arcade]:
         """
@@ -1,10 +1,11 @@
-from sqlalchemy import Table, Column, UniqueConstraint  # type: ignore
+from sqlalchemy import Table, Column, Index, UniqueConstraint  # type: ignore
 from sqlalchemy.exc import IntegrityError  # type: ignore
 from sqlalchemy.types import String, Integer, JSON  # type: ignore
 from sqlalchemy.dialects.mysql import BIGINT as BigInteger  # type: ignore
-from typing import Optional, Dict, List, Tuple, Any
+import time
+from typing import Callable, Optional, Dict, List, Tuple, Any
 
-from bemani.common import Time
+from bemani.common import Time, ValidatedDict
 from bemani.data.exceptions import ScoreSaveException
 from bemani.data.mysql.base import BaseData, metadata
 from bemani.data.types import Score, Attempt, Song, UserID
@@ -31,6 +32,7 @@ score = Table(  # type: ignore
     Column('lid', Integer, nullable=False, index=True),
     Column('data', JSON, nullable=False),
     UniqueConstraint('userid', 'musicid', name='userid_musicid'),
+    Index('musicid_points_timestamp', 'musicid', 'points', 'timestamp'),
     mysql_charset='utf8mb4',
 )
 
@@ -54,6 +56,39 @@ score_history = Table(  # type: ignore
     mysql_charset='utf8mb4',
 )
 
+"""
+Table for storing the number of times a user has played a particular musicid. This
+is the same as counting their score_history entries, but is kept up to date as
+attempts are saved so that score lookups don't need to scan history.
+"""
+score_playcount = Table(  # type: ignore
+    'score_playcount',
+    metadata,
+    Column('userid', BigInteger(unsigned=True), nullable=False),
+    Column('musicid', Integer, nullable=False),
+    Column('plays', Integer, nullable=False),
+    UniqueConstraint('userid', 'musicid', name='userid_musicid'),
+    mysql_charset='utf8mb4',
+)
+
+"""
+Table for storing aggregate clear rates for a particular musicid. This is the same
+as classifying every score_history entry for that musicid, but is kept up to date
+as attempts are saved so that games don't need to scan history to show clear rates.
+Whether an attempt is a clear or full combo is decided by the game that saved it.
+"""
+score_statistics = Table(  # type: ignore
+    'score_statistics',
+    metadata,
+    Column('musicid', Integer, nullable=False),
+    Column('plays', Integer, nullable=False),
+    Column('clears', Integer, nullable=False),
+    Column('combos', Integer, nullable=False),
+    Column('points', BigInteger, nullable=False),
+    UniqueConstraint('musicid', name='musicid'),
+    mysql_charset='utf8mb4',
+)
+
 """
 Table for storing the mapping between game songid/chart and musicid for the score
 and score_history table. To find scores, you will want to join this table with
@@ -79,9 +114,68 @@ music = Table(  # type: ignore
     mysql_charset='utf8mb4',
 )
 
+"""
+Table for storing a generation counter per game, which is bumped every time the
+music table is imported for that game. Processes which cache the music table can
+compare this against what they loaded to know when their copy is out of date.
+"""
+music_generation = Table(  # type: ignore
+    'music_generation',
+    metadata,
+    Column('game', String(32), nullable=False),
+    Column('generation', Integer, nullable=False),
+    UniqueConstraint('game', name='game'),
+    mysql_charset='utf8mb4',
+)
+
 
 class MusicData(BaseData):
 
+    # Number of seconds between checks of a game's music generation.
+    MUSICID_CHECK_INTERVAL = 10
+
+    # Number of score history rows read at once when rebuilding clear rates.
+    CLEAR_RATE_BATCH = 10000
+
+    # Music ID lookups for each game, keyed by game. Each entry is the generation it
+    # was loaded at, the time the generation was last checked and the lookup itself.
+    MUSICID_CACHE: Dict[str, Tuple[Optional[int], float, Dict[Tuple[int, int, int], int]]] = {}
+
+    def __get_musicids(self, game: str) -> Dict[Tuple[int, int, int], int]:
+        """
+        Given a game, return a lookup of every version/songid/chart to its music ID. This
+        is loaded once per process and reloaded only when an import has bumped the
+        music generation for this game.
+
+        Parameters:
+            game - String representing a game series.
+
+        Returns:
+            A dictionary keyed by a version/songid/chart tuple, whose values are music IDs.
+        """
+        now = time.time()
+        generation, checked, musicids = MusicData.MUSICID_CACHE.get(game, (None, 0.0, {}))
+        if now - checked < MusicData.MUSICID_CHECK_INTERVAL:
+            return musicids
+
+        sql = "SELECT generation FROM music_generation WHERE game = :game"
+        cursor = self.execute(sql, {'game': game})
+        if cursor.rowcount == 1:
+            current = cursor.fetchone()['generation']
+        else:
+            # Nothing has been imported since the generation was tracked.
+            current = 0
+
+        if current != generation:
+            sql = "SELECT id, version, songid, chart FROM music WHERE game = :game"
+            cursor = self.execute(sql, {'game': game})
+            musicids = {
+                (result['version'], result['songid'], result['chart']): result['id']
+                for result in cursor.fetchall()
+            }
+        MusicData.MUSICID_CACHE[game] = (current, now, musicids)
+        return musicids
+
     def __get_musicid(self, game: str, version: int, songid: int, songchart: int) -> int:
         """
         Given a game/version/songid/chart, look up the unique music ID for this song.
@@ -95,6 +189,12 @@ class MusicData(BaseData):
         Returns:
             Integer representing music ID if found or raises an exception otherwise.
         """
+        musicids = self.__get_musicids(game)
+        musicid = musicids.get((version, songid, songchart))
+        if musicid is not None:
+            return musicid
+
+        # Not in our copy, so it could have been added outside of an import.
         sql = (
             "SELECT id FROM music WHERE songid = :songid AND chart = :chart AND game = :game AND version = :version"
         )
@@ -103,6 +203,7 @@ class MusicData(BaseData):
             # music doesn't exist
             raise Exception(f'Song {songid} chart {songchart} doesn\'t exist for game {game} version {version}')
         result = cursor.fetchone()
+        musicids[(version, songid, songchart)] = result['id']
         return result['id']
 
     def put_score(
@@ -178,6 +279,7 @@ class MusicData(BaseData):
         data: Dict[str, Any],
         new_record: bool,
         timestamp: Optional[int]=None,
+        statistics: Optional[Tuple[bool, bool]]=None,
     ) -> None:
         """
         Given a game/version/song/chart and user ID, save a single score attempt.
@@ -196,6 +298,8 @@ class MusicData(BaseData):
             data - Optional data that the game wishes to record along with the score.
             new_record - Whether this score was a new record or not.
             timestamp - Optional integer specifying when the attempt happened.
+            statistics - Optional tuple of whether this attempt was a clear and whether it was a
+                         full combo. If provided, the attempt is counted towards clear rates.
         """
         # First look up the song/chart from the music DB
         musicid = self.__get_musicid(game, version, songid, songchart)
@@ -224,6 +328,33 @@ class MusicData(BaseData):
                 f'There is already an attempt by {userid if userid is not None else 0} for music id {musicid} at {ts}'
             )
 
+        # Keep play counts in sync with the history we just added
+        if userid is not None:
+            sql = (
+                "INSERT INTO `score_playcount` (userid, musicid, plays) VALUES (:userid, :musicid, 1) " +
+                "ON DUPLICATE KEY UPDATE plays = plays + 1"
+            )
+            self.execute(sql, {'userid': userid, 'musicid': musicid})
+
+        # Keep clear rates in sync as well
+        if statistics is not None:
+            cleared, combo = statistics
+            sql = (
+                "INSERT INTO `score_statistics` (musicid, plays, clears, combos, points) " +
+                "VALUES (:musicid, 1, :clears, :combos, :points) " +
+                "ON DUPLICATE KEY UPDATE plays = plays + 1, clears = clears + VALUES(clears), " +
+                "combos = combos + VALUES(combos), points = points + VALUES(points)"
+            )
+            self.execute(
+                sql,
+                {
+                    'musicid': musicid,
+                    'clears': 1 if cleared else 0,
+                    'combos': 1 if combo else 0,
+                    'points': points,
+                },
+            )
+
     def get_score(self, game: str, version: int, userid: UserID, songid: int, songchart: int) -> Optional[Score]:
         """
         Look up a user's previous high score.
@@ -613,51 +744,51 @@ class MusicData(BaseData):
         Returns:
             A list of UserID, Score objects representing all high scores for a game.
         """
-        # First, construct the queries for grabbing the songid/chart
+        # First, figure out which music entry gives us the songid/chart for each score.
         if version is not None:
-            songidquery = (
-                'SELECT songid FROM music WHERE music.id = score.musicid AND game = :game AND version = :version'
-            )
-            chartquery = (
-                'SELECT chart FROM music WHERE music.id = score.musicid AND game = :game AND version = :version'
-            )
+            # We only care about this version, so we can filter on it directly.
+            musicjoin = 'music.id = score.musicid AND music.game = :game AND music.version = :version'
+            if songid is not None:
+                musicjoin = musicjoin + ' AND music.songid = :songid'
+            if songchart is not None:
+                musicjoin = musicjoin + ' AND music.chart = :songchart'
+            musicselect = ''
         else:
-            songidquery = (
-                'SELECT songid FROM music WHERE music.id = score.musicid AND game = :game ORDER BY version DESC LIMIT 1'
+            # Scores can be for any version, so display them using the newest version's songid/chart.
+            musicjoin = 'music.id = latest.id AND music.game = :game AND music.version = latest.version'
+            musicselect = (
+                'JOIN (SELECT id, MAX(version) AS version FROM music WHERE game = :game GROUP BY id) latest '
+                'ON latest.id = score.musicid '
             )
-            chartquery = (
-                'SELECT chart FROM music WHERE music.id = score.musicid AND game = :game ORDER BY version DESC LIMIT 1'
-            )
-
-        # Select statement for getting play count
-        playselect = (
-            'SELECT COUNT(timestamp) FROM score_history WHERE score_history.musicid = score.musicid AND score_history.userid = score.userid'
-        )
-
-        # Now, construct the inner select statement so we can choose which scores we care about
-        innerselect = (
-            'SELECT DISTINCT(id) FROM music WHERE game = :game'
-        )
-        if version is not None:
-            innerselect = innerselect + ' AND version = :version'
-        if songid is not None:
-            innerselect = innerselect + ' AND songid = :songid'
-        if songchart is not None:
-            innerselect = innerselect + ' AND chart = :songchart'
-
-        # Finally, construct the full query
-        sql = (
-            "SELECT ({}) AS songid, ({}) AS chart, id AS scorekey, points, timestamp, `update`, lid, data, userid, ({}) AS plays "
-            "FROM score WHERE musicid IN ({})"
-        ).format(songidquery, chartquery, playselect, innerselect)
 
         # Now, limit the query
+        conditions = []
+        if version is None and (songid is not None or songchart is not None):
+            # The song could have been found under a different songid/chart in any version.
+            innerselect = 'SELECT id FROM music WHERE game = :game'
+            if songid is not None:
+                innerselect = innerselect + ' AND songid = :songid'
+            if songchart is not None:
+                innerselect = innerselect + ' AND chart = :songchart'
+            conditions.append(f'score.musicid IN ({innerselect})')
         if userid is not None:
-            sql = sql + ' AND userid = :userid'
+            conditions.append('score.userid = :userid')
         if since is not None:
-            sql = sql + ' AND score.update >= :since'
+            conditions.append('score.update >= :since')
         if until is not None:
-            sql = sql + ' AND score.update < :until'
+            conditions.append('score.update < :until')
+
+        # Finally, construct the full query, joining against play counts rather than
+        # counting history for every score.
+        sql = (
+            "SELECT music.songid AS songid, music.chart AS chart, score.id AS scorekey, score.points AS points, "
+            "score.timestamp AS timestamp, score.update AS `update`, score.lid AS lid, score.data AS data, "
+            "score.userid AS userid, IFNULL(score_playcount.plays, 0) AS plays "
+            f"FROM score {musicselect}JOIN music ON {musicjoin} "
+            "LEFT JOIN score_playcount ON score_playcount.userid = score.userid AND score_playcount.musicid = score.musicid"
+        )
+        if len(conditions) > 0:
+            sql = sql + ' WHERE ' + ' AND '.join(conditions)
 
         # Now, query itself
         cursor = self.execute(sql, {
@@ -668,7 +799,7 @@ class MusicData(BaseData):
             'songchart': songchart,
             'since': since,
             'until': until,
-        })
+        }, allow_replica=True)
 
         # Objectify result
         scores = []
@@ -692,6 +823,143 @@ class MusicData(BaseData):
 
         return scores
 
+    def get_ranked_scores(
+        self,
+        game: str,
+        version: int,
+        songid: int,
+        songchart: int,
+        limit: int,
+        offset: int=0,
+    ) -> List[Tuple[UserID, Score]]:
+        """
+        Look up high scores for a single song/chart, best score first. Scores with equal points
+        are ranked by which was earned most recently. This is served by an index, so the cost
+        depends on the limit and offset, not on how many users have played the chart.
+
+        Parameters:
+            game - String representing a game series.
+            version - Integer representing which version of the game.
+            songid - ID of the song according to the game.
+            songchart - Chart number according to the game.
+            limit - Maximum number of scores to return.
+            offset - Number of scores to skip, so that 0 returns the top scores.
+
+        Returns:
+            A list of UserID, Score objects in rank order.
+        """
+        sql = (
+            "SELECT music.songid AS songid, music.chart AS chart, score.id AS scorekey, score.points AS points, "
+            "score.timestamp AS timestamp, score.update AS `update`, score.lid AS lid, score.data AS data, "
+            "score.userid AS userid, IFNULL(score_playcount.plays, 0) AS plays "
+            "FROM score JOIN music ON music.id = score.musicid AND music.game = :game AND music.version = :version "
+            "AND music.songid = :songid AND music.chart = :songchart "
+            "LEFT JOIN score_playcount ON score_playcount.userid = score.userid AND score_playcount.musicid = score.musicid "
+            "ORDER BY score.points DESC, score.timestamp DESC, score.id DESC LIMIT :limit OFFSET :offset"
+        )
+        cursor = self.execute(sql, {
+            'game': game,
+            'version': version,
+            'songid': songid,
+            'songchart': songchart,
+            'limit': limit,
+            'offset': offset,
+        })
+
+        scores = []
+        for result in cursor.fetchall():
+            scores.append(
+                (
+                    UserID(result['userid']),
+                    Score(
+                        result['scorekey'],
+                        result['songid'],
+                        result['chart'],
+                        result['points'],
+                        result['timestamp'],
+                        result['update'],
+                        result['lid'],
+                        result['plays'],
+                        self.deserialize(result['data']),
+                    )
+                )
+            )
+
+        return scores
+
+    def get_score_rank(self, game: str, version: int, userid: UserID, songid: int, songchart: int) -> Optional[int]:
+        """
+        Look up where a user's high score ranks on a single song/chart, using the same
+        ordering as get_ranked_scores().
+
+        Parameters:
+            game - String representing a game series.
+            version - Integer representing which version of the game.
+            userid - Integer representing a user. Usually looked up with UserData.
+            songid - ID of the song according to the game.
+            songchart - Chart number according to the game.
+
+        Returns:
+            The rank of the user's score, starting at 1, or None if they have no score.
+        """
+        sql = (
+            "SELECT score.id AS scorekey, score.musicid AS musicid, score.points AS points, score.timestamp AS timestamp "
+            "FROM score JOIN music ON music.id = score.musicid AND music.game = :game AND music.version = :version "
+            "AND music.songid = :songid AND music.chart = :songchart WHERE score.userid = :userid"
+        )
+        cursor = self.execute(sql, {'game': game, 'version': version, 'userid': userid, 'songid': songid, 'songchart': songchart})
+        if cursor.rowcount != 1:
+            # score doesn't exist
+            return None
+        result = cursor.fetchone()
+
+        sql = (
+            "SELECT COUNT(id) AS count FROM score WHERE musicid = :musicid AND (points > :points OR "
+            "(points = :points AND (timestamp > :timestamp OR (timestamp = :timestamp AND id > :scorekey))))"
+        )
+        cursor = self.execute(sql, {
+            'musicid': result['musicid'],
+            'points': result['points'],
+            'timestamp': result['timestamp'],
+            'scorekey': result['scorekey'],
+        })
+        return cursor.fetchone()['count'] + 1
+
+    def get_score_neighbors(
+        self,
+        game: str,
+        version: int,
+        userid: UserID,
+        songid: int,
+        songchart: int,
+        distance: int,
+    ) -> Tuple[Optional[int], List[Tuple[UserID, Score]]]:
+        """
+        Look up the high scores ranked around a user's high score on a single song/chart,
+        using the same ordering as get_ranked_scores().
+
+        Parameters:
+            game - String representing a game series.
+            version - Integer representing which version of the game.
+            userid - Integer representing a user. Usually looked up with UserData.
+            songid - ID of the song according to the game.
+            songchart - Chart number according to the game.
+            distance - Number of scores to include on either side of the user's score.
+
+        Returns:
+            A tuple of the rank of the first returned score, starting at 1, and a list of
+            UserID, Score objects in rank order. If the user has no score, the rank is None
+            and the list is empty.
+        """
+        rank = self.get_score_rank(game, version, userid, songid, songchart)
+        if rank is None:
+            return (None, [])
+        start = max(rank - distance, 1)
+        return (
+            start,
+            self.get_ranked_scores(game, version, songid, songchart, (rank - start) + distance + 1, start - 1),
+        )
+
     def get_all_records(
         self,
         game: str,
@@ -768,7 +1036,7 @@ class MusicData(BaseData):
             "score.lid AS lid, (select COUNT(score_history.timestamp) FROM score_history WHERE score_history.musicid = score.musicid) AS plays " +
             "FROM score, ({}) records WHERE records.userid = score.userid AND records.musicid = score.musicid"
         ).format(songidquery, chartquery, records_sql)
-        cursor = self.execute(sql, params)
+        cursor = self.execute(sql, params, allow_replica=True)
 
         scores = []
         for result in cursor.fetchall():
@@ -891,7 +1159,7 @@ class MusicData(BaseData):
 
         # Now, limit the query
         if userid is not None:
-            sql = sql + ' AND userid = :userid'
+            sql = sql + ' AND score.userid = :userid'
         if timelimit is not None:
             sql = sql + ' AND timestamp >= :timestamp'
         sql = sql + ' ORDER BY timestamp DESC'
@@ -910,7 +1178,7 @@ class MusicData(BaseData):
             'timestamp': timelimit,
             'limit': limit,
             'offset': offset,
-        })
+        }, allow_replica=True)
 
         # Now objectify the attempts
         attempts = []
@@ -932,3 +1200,95 @@ class MusicData(BaseData):
             )
 
         return attempts
+
+    def get_clear_rates(
+        self,
+        game: str,
+        version: int,
+        songid: Optional[int]=None,
+        songchart: Optional[int]=None,
+    ) -> Dict[int, Dict[int, Dict[str, int]]]:
+        """
+        Look up clear rates for a particular game version, as counted by put_attempt().
+
+        Parameters:
+            game - String representing a game series.
+            version - Integer representing which version of the game.
+            songid - Optional ID of the song according to the game to limit the lookup to.
+            songchart - Optional chart number according to the game to limit the lookup to.
+
+        Returns:
+            A dictionary keyed by songid, whos values are a dictionary keyed by chart,
+            whos values are a dictionary containing integer counts keyed by 'plays',
+            'clears', 'combos' and 'points'. Songs with no counted attempts are absent.
+        """
+        sql = (
+            "SELECT music.songid AS songid, music.chart AS chart, score_statistics.plays AS plays, " +
+            "score_statistics.clears AS clears, score_statistics.combos AS combos, score_statistics.points AS points " +
+            "FROM score_statistics, music WHERE music.id = score_statistics.musicid AND music.game = :game AND music.version = :version"
+        )
+        if songid is not None:
+            sql = sql + " AND music.songid = :songid"
+        if songchart is not None:
+            sql = sql + " AND music.chart = :songchart"
+        cursor = self.execute(sql, {'game': game, 'version': version, 'songid': songid, 'songchart': songchart}, allow_replica=True)
+
+        rates: Dict[int, Dict[int, Dict[str, int]]] = {}
+        for result in cursor.fetchall():
+            rates.setdefault(result['songid'], {})[result['chart']] = {
+                'plays': result['plays'],
+                'clears': result['clears'],
+                'combos': result['combos'],
+                'points': result['points'],
+            }
+        return rates
+
+    def rebuild_clear_rates(self, game: str, classify: Callable[[ValidatedDict], Optional[Tuple[bool, bool]]]) -> int:
+        """
+        Recount clear rates for every song in a game from score history. This is meant to
+        be run once for existing networks, since put_attempt() keeps them up to date afterwards.
+        Run it inside Data.transaction() so that nobody sees the counts half rebuilt, and with
+        cabinets offline, since attempts saved while it runs may not be counted.
+
+        Parameters:
+            game - String representing a game series.
+            classify - A callable which, given the data of an attempt, returns the same
+                       statistics tuple the game passes to put_attempt(), or None.
+
+        Returns:
+            The number of music IDs that clear rates were stored for.
+        """
+        # Score history can be enormous, so walk it in batches rather than loading it all.
+        sql = (
+            "SELECT id, musicid, points, data FROM score_history " +
+            "WHERE musicid IN (SELECT DISTINCT(id) FROM music WHERE game = :game) AND id > :lastid " +
+            "ORDER BY id ASC LIMIT :limit"
+        )
+        counts: Dict[int, Dict[str, int]] = {}
+        lastid = 0
+        while True:
+            cursor = self.execute(sql, {'game': game, 'lastid': lastid, 'limit': self.CLEAR_RATE_BATCH})
+            results = cursor.fetchall()
+            for result in results:
+                lastid = result['id']
+                statistics = classify(ValidatedDict(self.deserialize(result['data'])))
+                if statistics is None:
+                    continue
+                cleared, combo = statistics
+                count = counts.setdefault(result['musicid'], {'plays': 0, 'clears': 0, 'combos': 0, 'points': 0})
+                count['plays'] += 1
+                count['clears'] += 1 if cleared else 0
+                count['combos'] += 1 if combo else 0
+                count['points'] += result['points']
+            if len(results) < self.CLEAR_RATE_BATCH:
+                break
+
+        sql = "DELETE FROM score_statistics WHERE musicid IN (SELECT DISTINCT(id) FROM music WHERE game = :game)"
+        self.execute(sql, {'game': game})
+        sql = (
+            "INSERT INTO `score_statistics` (musicid, plays, clears, combos, points) " +
+            "VALUES (:musicid, :plays, :clears, :combos, :points)"
+        )
+        for musicid, count in counts.items():
+            self.execute(sql, {'musicid': musicid, **count})
+        return len(counts)
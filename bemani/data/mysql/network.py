@@ -276,7 +276,7 @@ class NetworkData(BaseData):
         sql = sql + "ORDER BY id DESC"
         if limit is not None:
             sql = sql + " LIMIT :limit"
-        cursor = self.execute(sql, {'userid': userid, 'arcadeid': arcadeid, 'event': event, 'limit': limit, 'since_id': since_id, 'until_id': until_id})
+        cursor = self.execute(sql, {'userid': userid, 'arcadeid': arcadeid, 'event': event, 'limit': limit, 'since_id': since_id, 'until_id': until_id}, allow_replica=True)
         events = []
         for result in cursor.fetchall():
             if result['userid'] is not None:
@@ -542,7 +542,41 @@ class UserData(BaseData):
         else:
             return None
 
-    def get_any_profiles(self, game: str, version: int, userids: List[UserID]) -> List[Tuple[UserID, Optional[ValidatedDict]]]:
+    def __profile_columns(self, fields: Optional[List[str]]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Given an optional list of top-level profile fields, return the SQL columns to select
+        for profile data along with any parameters those columns need. When no fields are
+        given, the whole profile is selected. Otherwise, only the requested fields are pulled
+        out of the profile by MySQL so we never transfer or decode the rest of the blob.
+        """
+        if fields is None:
+            return "profile.data AS data", {}
+        columns = [f"JSON_EXTRACT(profile.data, :field{i}) AS field{i}" for i in range(len(fields))]
+        params = {f'field{i}': f'$."{field}"' for i, field in enumerate(fields)}
+        return ", ".join(columns), params
+
+    def __profile_data(self, result: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+        """
+        Given a row selected using the columns from __profile_columns, return the profile data.
+        Fields that are not present in the profile are left out, just as they would be if the
+        whole profile was fetched.
+        """
+        if fields is None:
+            return self.deserialize(result['data'])
+        data: Dict[str, Any] = {}
+        for i, field in enumerate(fields):
+            value = result[f'field{i}']
+            if value is not None:
+                data[field] = self.codec.decode(value)
+        return data
+
+    def get_any_profiles(
+        self,
+        game: str,
+        version: int,
+        userids: List[UserID],
+        fields: Optional[List[str]]=None,
+    ) -> List[Tuple[UserID, Optional[ValidatedDict]]]:
         """
         Does the exact same thing as get_any_profile but across a list of users instead of one.
         Provided purely as a convenience function.
@@ -551,13 +585,55 @@ class UserData(BaseData):
             game - String identifier of the game looking up the user.
             version - Integer version of the game looking up the user.
             userids - List of Integer user IDs, as looked up by one of the above functions.
+            fields - Optional list of top-level profile fields to fetch. If provided, only these
+                     fields (along with refid, extid, game and version) are returned.
 
         Returns:
             A List of tuples containing a userid and a dictionary previously stored by a game class if found,
             or None otherwise.
         """
+        if len(userids) == 0:
+            return []
+
+        # First, figure out which version's profile we want for every user, preferring
+        # the requested version and falling back to the newest one they have.
+        sql = "SELECT userid, version, refid FROM refid WHERE game = :game AND userid IN :userids"
+        cursor = self.execute(sql, {'game': game, 'userids': tuple(userids)})
+        chosen: Dict[UserID, Tuple[int, str]] = {}
+        for result in cursor.fetchall():
+            userid = UserID(result['userid'])
+            if userid in chosen:
+                chosen_version = chosen[userid][0]
+                if chosen_version == version:
+                    continue
+                if result['version'] != version and result['version'] < chosen_version:
+                    continue
+            chosen[userid] = (result['version'], result['refid'])
+
+        # Now, grab all of those profiles at once.
+        profiles: Dict[UserID, ValidatedDict] = {}
+        if len(chosen) > 0:
+            columns, params = self.__profile_columns(fields)
+            sql = (
+                f"SELECT refid.userid AS userid, refid.version AS version, refid.refid AS refid, extid.extid AS extid, {columns} "
+                "FROM refid, extid, profile "
+                "WHERE refid.refid IN :refids AND extid.userid = refid.userid AND extid.game = refid.game "
+                "AND profile.refid = refid.refid"
+            )
+            params['refids'] = tuple(refid for _, refid in chosen.values())
+            cursor = self.execute(sql, params)
+            for result in cursor.fetchall():
+                profile = {
+                    'refid': result['refid'],
+                    'extid': result['extid'],
+                    'game': game,
+                    'version': result['version'],
+                }
+                profile.update(self.__profile_data(result, fields))
+                profiles[UserID(result['userid'])] = ValidatedDict(profile)
+
         return [
-            (userid, self.get_any_profile(game, version, userid))
+            (userid, profiles.get(userid))
             for userid in userids
         ]
 
@@ -578,24 +654,28 @@ class UserData(BaseData):
             profiles.append((result['game'], result['version']))
         return profiles
 
-    def get_all_profiles(self, game: str, version: int) -> List[Tuple[UserID, ValidatedDict]]:
+    def get_all_profiles(self, game: str, version: int, fields: Optional[List[str]]=None) -> List[Tuple[UserID, ValidatedDict]]:
         """
         Given a game/version, look up all user profiles for that game.
 
         Parameters:
             game - String identifier of the game we want all user profiles for.
             version - Integer version of the game we want all user profiles for.
+            fields - Optional list of top-level profile fields to fetch. If provided, only these
+                     fields (along with refid, extid, game and version) are returned.
 
         Returns:
             A list of (UserID, dictionaries) previously stored by a game class for each profile.
         """
+        columns, params = self.__profile_columns(fields)
         sql = (
-            "SELECT refid.userid AS userid, refid.refid AS refid, extid.extid AS extid, profile.data AS data "
+            f"SELECT refid.userid AS userid, refid.refid AS refid, extid.extid AS extid, {columns} "
             "FROM refid, profile, extid "
             "WHERE refid.game = :game AND refid.version = :version "
             "AND refid.refid = profile.refid AND extid.game = refid.game AND extid.userid = refid.userid"
         )
-        cursor = self.execute(sql, {'game': game, 'version': version})
+        params.update({'game': game, 'version': version})
+        cursor = self.execute(sql, params, allow_replica=True)
 
         profiles = []
         for result in cursor.fetchall():
@@ -605,7 +685,7 @@ class UserData(BaseData):
                 'game': game,
                 'version': version,
             }
-            profile.update(self.deserialize(result['data']))
+            profile.update(self.__profile_data(result, fields))
             profiles.append(
                 (
                     UserID(result['userid']),
@@ -630,7 +710,7 @@ class UserData(BaseData):
             "SELECT refid.userid AS userid FROM refid "
             "WHERE refid.game = :game AND refid.version = :version"
         )
-        cursor = self.execute(sql, {'game': game, 'version': version})
+        cursor = self.execute(sql, {'game': game, 'version': version}, allow_replica=True)
 
         return [UserID(result['userid']) for result in cursor.fetchall()]
 
@@ -650,7 +730,7 @@ class UserData(BaseData):
             "refid.userid AS userid FROM achievement, refid WHERE refid.game = :game AND "
             "refid.version = :version AND refid.refid = achievement.refid"
         )
-        cursor = self.execute(sql, {'game': game, 'version': version})
+        cursor = self.execute(sql, {'game': game, 'version': version}, allow_replica=True)
 
         achievements = []
         for result in cursor.fetchall():
@@ -889,7 +969,7 @@ class UserData(BaseData):
             "refid.userid AS userid FROM time_based_achievement, refid WHERE refid.game = :game AND "
             "refid.version = :version AND refid.refid = time_based_achievement.refid"
         )
-        cursor = self.execute(sql, {'game': game, 'version': version})
+        cursor = self.execute(sql, {'game': game, 'version': version}, allow_replica=True)
 
         achievements = []
         for result in cursor.fetchall():
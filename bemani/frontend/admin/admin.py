@@ -384,7 +384,7 @@ def listuser(userid: int) -> Dict[str, Any]:
 def updatearcade() -> Dict[str, Any]:
     # Attempt to look this arcade up
     new_values = request.get_json()['arcade']
-    arcade = g.data.local.machine.get_arcade(new_values['id'])
+    arcade = g.data.local.machine.get_arcade(new_values['id'], cached=False)
     if arcade is None:
         raise Exception('Unable to find arcade to update!')
 
@@ -697,7 +697,7 @@ def updatepcbid() -> Dict[str, Any]:
     if machine['port'] < 1 or machine['port'] > 65535:
         raise Exception('The specified port is out of range!')
 
-    current_machine = g.data.local.machine.get_machine(machine['pcbid'])
+    current_machine = g.data.local.machine.get_machine(machine['pcbid'], cached=False)
     current_machine.description = machine['description']
     current_machine.arcade = machine['arcade']
     current_machine.port = machine['port']
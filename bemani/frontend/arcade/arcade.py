@@ -287,7 +287,7 @@ def updatepin(arcadeid: int) -> Dict[str, Any]:
     pin = request.get_json()['pin']
 
     # Make sure the arcade is valid
-    arcade = g.data.local.machine.get_arcade(arcadeid)
+    arcade = g.data.local.machine.get_arcade(arcadeid, cached=False)
     if arcade is None:
         raise Exception('Unable to find arcade to update!')
     if g.userID not in arcade.owners:
@@ -313,7 +313,7 @@ def updatearcade(arcadeid: int, attribute: str) -> Dict[str, Any]:
 
     # Attempt to look this arcade up
     new_value = request.get_json()['value']
-    arcade = g.data.local.machine.get_arcade(arcadeid)
+    arcade = g.data.local.machine.get_arcade(arcadeid, cached=False)
     if arcade is None:
         raise Exception('Unable to find arcade to update!')
     if g.userID not in arcade.owners:
@@ -1,7 +1,7 @@
 import struct
-from typing import Optional, List, Dict, Any
+from functools import lru_cache
+from typing import Optional, Dict, Any
 
-from bemani.protocol.stream import InputStream, OutputStream
 from bemani.protocol.node import Node
 
 
@@ -11,6 +11,60 @@ class BinaryEncodingException(Exception):
     """
 
 
+# Precompiled big-endian structs for every node type, so that decoding a scalar
+# or composite value is a single unpack_from call.
+NODE_STRUCTS: Dict[int, struct.Struct] = {
+    nodetype: struct.Struct(f">{nodeinfo['enc']}") for nodetype, nodeinfo in Node.NODE_TYPES.items()
+}
+
+# Length prefix used by strings, binary blobs and arrays.
+LENGTH_STRUCT = struct.Struct('>I')
+
+# Lookup table from node name character to its 6-bit value
+NODE_NAME_LUT: Dict[str, int] = {ch: i for i, ch in enumerate(Node.NODE_NAME_CHARS)}
+
+
+@lru_cache(maxsize=4096)
+def pack_node_name(name: str) -> bytes:
+    """
+    Given a node name, pack it into a length byte followed by 6-bit characters
+    packed into 8-bit bytes, padded with zero bits. Packets repeat the same names
+    over and over, so the result is cached.
+
+    Parameters:
+        name - A string name which should be encoded as a node name
+
+    Returns:
+        A binary blob representing the encoded name
+    """
+    bits = 0
+    for ch in name:
+        bits = (bits << 6) | NODE_NAME_LUT[ch]
+
+    length = len(name)
+    binary_length = ((length * 6) + 7) // 8
+    bits <<= (binary_length * 8) - (length * 6)
+    return bytes([length]) + bits.to_bytes(binary_length, 'big')
+
+
+@lru_cache(maxsize=4096)
+def unpack_node_name(length: int, data: bytes) -> str:
+    """
+    Given a character length and the packed 6-bit characters, unpack the node
+    name. This is the inverse of pack_node_name, also cached.
+
+    Parameters:
+        length - The number of characters in the name
+        data - The packed name, without the length byte
+
+    Returns:
+        A string representing the name in ascii
+    """
+    bits = int.from_bytes(data, 'big') >> ((len(data) * 8) - (length * 6))
+    chars = Node.NODE_NAME_CHARS
+    return ''.join([chars[(bits >> (6 * (length - 1 - i))) & 0x3F] for i in range(length)])
+
+
 class PackedOrdering:
     """
     A class that helps us encapsulate Konami's batshit backtracking hole-fill algorithm.
@@ -38,208 +92,50 @@ class PackedOrdering:
         [1: byte] [2: string, length 3] [3: short] [4: byte]
     Packing would look like this (assuming all locations are a byte):
         1 4 0 0 2 2 2 2 2 2 2 0 3 3 0 0
+
+    Since things are only ever placed in the first unused 4 byte chunk, or in a partially filled
+    chunk of the same size, we don't need to track every byte. Instead, we track the end of the
+    packed data and the next free slots in the current byte and short chunks.
     """
 
-    def __init__(self, size: int, allow_expansion: bool=False) -> None:
+    def __init__(self) -> None:
         """
-        Initialize with a known size. If this is to be used to create a packing instead of deduce
-        a packing, then allow_expansion should be set to true and new holes will be created when
-        needed. If this is to be used for decoding a current packing, allow_expansion should be set
-        to False to ensure we don't choose locations outside the buffer.
-
-        Parameters:
-            size - Number of bytes to work with as an integer
-            allow_expansion - Boolean describing whether to add to the end of the order when needed
+        Initialize an empty ordering.
         """
-        self.order: List[int] = []
-        self.expand = allow_expansion
+        self.end = 0
+        self.__byte_pos = 0
+        self.__short_pos = 0
 
-        for i in range(size):
-            self.order.append(None)
-        self.__orderlen = size
-        self.__lastbyte = 0
-        self.__lastshort = 0
-        self.__lastint = 0
-
-    def __append_empty(self) -> None:
-        self.order.append(None)
-        self.__orderlen = self.__orderlen + 1
-
-    def mark_used(self, size: int, offset: int, round_to: int=1) -> None:
+    def next_location(self, size: int) -> int:
         """
-        Mark size bytes at offset as being used. If needed, round to the nearest byte/half/integer.
+        Return the location of the next value of a given size, marking the space it
+        takes up as used.
 
         Parameters:
-            size - Number of bytes to mark
-            offset - Offset into binary chunk to start marking
-            round_to - Optional integer specifying how many bytes to round to. Valid values are 1, 2 and 4
-        """
-        # Round to nearest value if needed
-        while (size & (round_to - 1)) != 0:
-            size = size + 1
-
-        # Expand buffer if needed
-        if self.expand:
-            while self.__orderlen < (size + offset):
-                self.__append_empty()
-
-        # Mark buffer as used
-        for i in range(size):
-            self.order[i + offset] = size
-
-    def get_next_byte(self) -> Optional[int]:
-        """
-        Returns an integer location where the next byte will be found/stored, respecting Konami logic.
-        Will return None if its not possible to find this integer a spot and we aren't expanding.
-        """
-        # If we expand for additions, make sure we've padded to a 4 byte boundary
-        if self.expand:
-            while (self.__orderlen & 3) != 0:
-                self.__append_empty()
-
-        for i in range(self.__lastbyte, self.__orderlen, 4):
-            if self.order[i] is not None:
-                # See if this has room for a byte
-                for j in range(0, 4):
-                    if self.order[i + j] == 1:
-                        # This is okay, we can pack after this
-                        continue
-                    elif self.order[i + j] is None:
-                        # This is open, pack here
-                        self.__lastbyte = i
-                        return i + j
-                    else:
-                        # This is something else, can't pack here
-                        break
-            else:
-                # Couldn't find optimal packing, pack here
-                self.__lastbyte = i
-                return i
-
-        if self.expand:
-            self.__lastbyte = self.__orderlen
-            return self.__orderlen
-        else:
-            return None
-
-    def get_next_short(self) -> Optional[int]:
-        """
-        Returns an integer location where the next short will be found/stored, respecting Konami logic.
-        Will return None if its not possible to find this integer a spot and we aren't expanding.
-        """
-        # If we expand for additions, make sure we've padded to a 4 byte boundary
-        if self.expand:
-            while (self.__orderlen & 3) != 0:
-                self.__append_empty()
-
-        for i in range(self.__lastshort, self.__orderlen, 4):
-            if self.order[i] is not None:
-                for j in range(0, 4, 2):
-                    if self.order[i + j] == 2 and self.order[i + j + 1] == 2:
-                        # This is okay, we can pack after this
-                        continue
-                    elif self.order[i + j] is None and self.order[i + j + 1] is None:
-                        # This is open, pack here
-                        self.__lastshort = i
-                        return i + j
-                    else:
-                        # This is something else, can't pack here
-                        break
-            else:
-                # Couldn't find optimal packing, pack here
-                self.__lastshort = i
-                return i
-
-        if self.expand:
-            self.__lastshort = self.__orderlen
-            return self.__orderlen
-        else:
-            return None
-
-    def get_next_int(self) -> Optional[int]:
-        """
-        Returns an integer location where the next integer will be found/stored, respecting Konami logic.
-        Will return None if its not possible to find this integer a spot and we aren't expanding.
-        """
-        # If we expand for additions, make sure we've padded to a 4 byte boundary
-        if self.expand:
-            while (self.__orderlen & 3) != 0:
-                self.__append_empty()
-
-        for i in range(self.__lastint, self.__orderlen, 4):
-            if self.order[i] is not None:
-                continue
-            if self.order[i + 1] is not None:
-                continue
-            if self.order[i + 2] is not None:
-                continue
-            if self.order[i + 3] is not None:
-                continue
-
-            self.__lastint = i
-            return i
-
-        if self.expand:
-            self.__lastint = self.__orderlen
-            return self.__orderlen
-        else:
-            return None
-
-    @staticmethod
-    def node_to_body_ordering(node: Node, include_children: bool=True, include_void: bool=False) -> List[Dict[str, Any]]:
-        """
-        Walk this node, attributes and children in the correct order to create a node
-        ordering for the purpose of mapping Node objects to their actual data
-        in a binary packet data chunk. We will use this to unpack data to determine the
-        values of nodes, or to create the data that goes with these nodes.
-
-        Paramters:
-            include_children - Whether this ordering should include children. Defaults to True.
-            include_void - Whether this ordering should include positions for void nodes. Defaults
-                           to false.
+            size - The size of the value in bytes, including any length prefix.
 
         Returns:
-            List of dictionary objects:
-                - type - 'attribute' or 'value' to specify that this position in the
-                         node walk is a string attribute or a node value
-                - node - This Node object, for the purpose of assignment
-                - name - The name of the attribute if type is 'attribute' or the name
-                         of the node if type is 'value'
-                - alignment - The alignment that this particular data object requiers
-        """
-        ordering = []
-
-        # Include the node itself if it has a value or we include voids
-        if node.data_length != 0 or include_void:
-            alignment = node.data_length
-            if alignment is None:
-                # Take care of string types
-                alignment = 4
-            if alignment > 4:
-                # Take care of 64 bit integers that are 32 bit aligned
-                alignment = 4
-
-            ordering.append({
-                'type': 'value',
-                'node': node,
-                'name': node.name,
-                'alignment': alignment,
-            })
-
-        order = sorted(node.attributes.keys())
-        for attr in order:
-            ordering.append({
-                'type': 'attribute',
-                'node': node,
-                'name': attr,
-                'alignment': 4,
-            })
-
-        if include_children:
-            for child in node.children:
-                ordering.extend(PackedOrdering.node_to_body_ordering(child))
-
-        return ordering
+            Integer offset into the body.
+        """
+        if size == 1:
+            if (self.__byte_pos & 3) == 0:
+                # Current byte chunk is full, start a new one
+                self.__byte_pos = self.end
+                self.end += 4
+            loc = self.__byte_pos
+            self.__byte_pos += 1
+        elif size == 2:
+            if (self.__short_pos & 3) == 0:
+                # Current short chunk is full, start a new one
+                self.__short_pos = self.end
+                self.end += 4
+            loc = self.__short_pos
+            self.__short_pos += 2
+        else:
+            # Everything else is 4 byte aligned and padded
+            loc = self.end
+            self.end += (size + 3) & ~3
+        return loc
 
 
 class BinaryDecoder:
@@ -256,36 +152,28 @@ class BinaryDecoder:
             - encoding - A string representing the text encoding for string elements. Should be either
                          'shift-jis', 'euc-jp' or 'utf-8'
         """
-        self.stream = InputStream(data)
+        self.data = data
+        self.pos = 0
         self.encoding = encoding
         self.executed = False
 
     def __read_node_name(self) -> str:
         """
-        Given the current position in the stream, read the 6-bit-byte packed string name of the
+        Given the current position in the data, read the 6-bit-byte packed string name of the
         node.
 
         Returns:
             A string representing the name in ascii
         """
-        length = self.stream.read_int()
-        binary_length = int(((length * 6) + 7) / 8)
-
-        def int_to_bin(integer: int) -> str:
-            val = bin(integer)[2:]
-            while len(val) < 8:
-                val = '0' + val
-
-            return val
-
-        data = ''
-        for i in range(binary_length):
-            data = data + int_to_bin(self.stream.read_int())
-        data_str = [data[i:(i + 6)] for i in range(0, len(data), 6)]
-        data_int = [int(val, 2) for val in data_str]
-        ret = ''.join([Node.NODE_NAME_CHARS[val] for val in data_int])
-        ret = ret[:length]
-        return ret
+        length = self.data[self.pos]
+        binary_length = ((length * 6) + 7) // 8
+        start = self.pos + 1
+        self.pos = start + binary_length
+        if self.pos > len(self.data):
+            raise BinaryEncodingException('Node name has insufficient data')
+        if length == 0:
+            return ''
+        return unpack_node_name(length, self.data[start:self.pos])
 
     def __read_node(self, node_type: int) -> Node:
         """
@@ -300,7 +188,8 @@ class BinaryDecoder:
         node = Node(name=name, type=node_type)
 
         while True:
-            child_type = self.stream.read_int()
+            child_type = self.data[self.pos]
+            self.pos += 1
 
             if child_type == Node.END_OF_NODE:
                 return node
@@ -314,7 +203,8 @@ class BinaryDecoder:
     def get_tree(self) -> Node:
         """
         Parse the header and body such that we can return a Node tree
-        representing the data passed to us.
+        representing the data passed to us. Both are parsed in a single
+        linear pass over the data.
 
         Returns:
             Node object
@@ -323,116 +213,115 @@ class BinaryDecoder:
             raise Exception("Logic error, should only call this once per instance")
         self.executed = True
 
-        # Read the header first
-        header_length = self.stream.read_int(4)
+        try:
+            # Read the header first
+            header_length = LENGTH_STRUCT.unpack_from(self.data, 0)[0]
+            self.pos = 4
 
-        root = self.__read_node(self.stream.read_int())
+            root_type = self.data[self.pos]
+            self.pos += 1
+            root = self.__read_node(root_type)
 
-        eod = self.stream.read_int()
-        if eod != Node.END_OF_DOCUMENT:
-            raise BinaryEncodingException(f'Unknown node type {eod} at end of document')
+            eod = self.data[self.pos]
+            if eod != Node.END_OF_DOCUMENT:
+                raise BinaryEncodingException(f'Unknown node type {eod} at end of document')
 
-        # Skip by any padding
-        while self.stream.pos < header_length + 4:
-            self.stream.read_byte()
+            # Skip by any padding
+            self.pos = header_length + 4
 
-        # Read the body next
-        body_length = self.stream.read_int(4)
+            # Read the body next
+            if self.pos + 4 <= len(self.data):
+                body_length = LENGTH_STRUCT.unpack_from(self.data, self.pos)[0]
+                self.pos += 4
+            else:
+                body_length = None
+        except (IndexError, struct.error):
+            raise BinaryEncodingException('Header has insufficient data')
 
         if body_length is not None and body_length > 0:
             # We have a body
-            body = self.stream.read_blob(body_length)
-            if body is None:
+            if self.pos + body_length > len(self.data):
                 raise BinaryEncodingException('Body has insufficient data')
 
-            ordering = PackedOrdering(body_length)
+            self.__body = memoryview(self.data)[self.pos:(self.pos + body_length)]
+            self.pos += body_length
+            self.__ordering = PackedOrdering()
 
-            values = PackedOrdering.node_to_body_ordering(root)
+            try:
+                self.__decode_values(root)
+            except struct.error:
+                raise BinaryEncodingException('Body has insufficient data')
 
-            for value in values:
-                node = value['node']
+        return root
 
-                if value['type'] == 'attribute':
-                    size = None
-                    enc = 's'
-                    dtype = 'str'
-                    array = False
-                    composite = False
-                else:
-                    size = node.data_length
-                    enc = node.data_encoding
-                    dtype = node.data_type
-                    array = node.is_array
-                    composite = node.is_composite
+    def __read_sized(self) -> bytes:
+        """
+        Read a length-prefixed blob out of the body at the next 4 byte aligned location.
 
-                if composite and array:
-                    raise Exception('Logic error, no support for composite arrays!')
+        Returns:
+            The raw bytes of the blob, not including the length prefix.
+        """
+        size = LENGTH_STRUCT.unpack_from(self.__body, self.__ordering.end)[0]
+        loc = self.__ordering.next_location(size + 4) + 4
+        if loc + size > len(self.__body):
+            raise BinaryEncodingException('Body has insufficient data')
+        return bytes(self.__body[loc:(loc + size)])
 
-                if not array:
-                    # Scalar value
-                    alignment = value['alignment']
-
-                    if alignment == 1:
-                        loc = ordering.get_next_byte()
-                    elif alignment == 2:
-                        loc = ordering.get_next_short()
-                    elif alignment == 4:
-                        loc = ordering.get_next_int()
-
-                    if size is None:
-                        # The size should be read from the first 4 bytes
-                        size = struct.unpack('>I', body[loc:(loc + 4)])[0]
-                        ordering.mark_used(size + 4, loc, round_to=4)
-                        loc = loc + 4
-
-                        decode_data = body[loc:(loc + size)]
-                        decode_value = f'>{size}{enc}'
-                    else:
-                        # The size is built-in
-                        ordering.mark_used(size, loc)
-
-                        decode_data = body[loc:(loc + size)]
-                        decode_value = f'>{enc}'
-
-                    if composite:
-                        val_list = list(struct.unpack(decode_value, decode_data))
-                        if value['type'] == 'attribute':
-                            raise Exception('Logic error, shouldn\'t have composite attribute type!')
-                        node.set_value(val_list)
-                        continue
-
-                    val = struct.unpack(decode_value, decode_data)[0]
-
-                    if dtype == 'str':
-                        # Need to convert this from encoding to standard string.
-                        # Also, need to lob off the trailing null.
-                        try:
-                            val = val[:-1].decode(self.encoding)
-                        except UnicodeDecodeError:
-                            # Nothing we can do here
-                            pass
-
-                    if value['type'] == 'attribute':
-                        node.set_attribute(value['name'], val)
-                    else:
-                        node.set_value(val)
-                else:
-                    # Array value
-                    loc = ordering.get_next_int()
+    def __read_string(self) -> Any:
+        """
+        Read a string out of the body, converting it from our text encoding.
 
-                    # The raw size in bytes
-                    length = struct.unpack('>I', body[loc:(loc + 4)])[0]
-                    elems = int(length / size)
+        Returns:
+            A string, or raw bytes if it could not be decoded.
+        """
+        # Need to convert this from encoding to standard string.
+        # Also, need to lob off the trailing null.
+        val = self.__read_sized()[:-1]
+        try:
+            return val.decode(self.encoding)
+        except UnicodeDecodeError:
+            # Nothing we can do here
+            return val
 
-                    ordering.mark_used(length + 4, loc, round_to=4)
-                    loc = loc + 4
-                    decode_data = body[loc:(loc + length)]
-                    decode_value = f'>{enc * elems}'
+    def __decode_values(self, node: Node) -> None:
+        """
+        Given a node, decode its value, attributes and the values of all of its children
+        from the body. Values are ordered by node value, then attributes sorted by name, then
+        each child in order, recursively.
 
-                    val = struct.unpack(decode_value, decode_data)
-                    node.set_value([v for v in val])
+        Parameters:
+            node - The Node to fill in values for.
+        """
+        size = node.data_length
+        if size != 0:
+            nodetype = node.type & (~Node.ARRAY_BIT)
 
-        return root
+            if node.is_array:
+                if node.is_composite:
+                    raise Exception('Logic error, no support for composite arrays!')
+
+                length = LENGTH_STRUCT.unpack_from(self.__body, self.__ordering.end)[0]
+                loc = self.__ordering.next_location(length + 4)
+
+                # Decode the whole array at once
+                node.set_value(list(struct.unpack_from(f'>{length // size}{node.data_encoding}', self.__body, loc + 4)))
+            elif size is None:
+                if nodetype == Node.NODE_TYPE_STR:
+                    node.set_value(self.__read_string())
+                else:
+                    node.set_value(self.__read_sized())
+            else:
+                unpacked = NODE_STRUCTS[nodetype].unpack_from(self.__body, self.__ordering.next_location(size))
+                if node.is_composite:
+                    node.set_value(list(unpacked))
+                else:
+                    node.set_value(unpacked[0])
+
+        for attr in sorted(node.attributes.keys()):
+            node.set_attribute(attr, self.__read_string())
+
+        for child in node.children:
+            self.__decode_values(child)
 
 
 class BinaryEncoder:
@@ -449,101 +338,130 @@ class BinaryEncoder:
             encoding - A string representing the text encoding for string elements. Should be either
                        'shift-jis', 'euc-jp' or 'utf-8'
         """
-        self.stream = OutputStream()
         self.encoding = encoding
         self.tree = tree
-        self.__body: List[int] = []
-        self.__body_len = 0
+        self.__header = bytearray()
+        self.__body = bytearray()
+        self.__ordering = PackedOrdering()
         self.executed = False
 
-        # Generate the characer LUT
-        self.char_lut: Dict[str, int] = {}
-        for i in range(len(Node.NODE_NAME_CHARS)):
-            self.char_lut[Node.NODE_NAME_CHARS[i]] = i
-
-    def __write_node_name(self, name: str) -> None:
+    def __reserve(self, size: int) -> int:
         """
-        Given the current position in the stream, write the 6-bit-byte packed string name of the
-        node.
+        Reserve room in the body for a value of a given size, growing the body buffer
+        if the value lands past the end of it.
 
         Parameters:
-            name - A string name which should be encoded as a node name
+            size - The size of the value in bytes, including any length prefix.
+
+        Returns:
+            Integer offset into the body where the value should be written.
+        """
+        loc = self.__ordering.next_location(size)
+        if self.__ordering.end > len(self.__body):
+            # Grow geometrically so that appending values stays linear overall.
+            self.__body.extend(bytes(max(self.__ordering.end - len(self.__body), len(self.__body))))
+        return loc
+
+    def __write_sized(self, data: bytes) -> None:
         """
-        def char_to_bin(ch: str) -> str:
-            index = self.char_lut[ch]
-            val = bin(index)[2:]
+        Write a length-prefixed blob into the body at the next 4 byte aligned location.
 
-            while len(val) < 6:
-                val = '0' + val
+        Parameters:
+            data - The raw bytes to write.
+        """
+        size = len(data)
+        loc = self.__reserve(size + 4)
+        LENGTH_STRUCT.pack_into(self.__body, loc, size)
+        self.__body[(loc + 4):(loc + 4 + size)] = data
 
-            return val[-6:]
+    def __write_string(self, name: str, val: Any) -> None:
+        """
+        Write a string into the body, converting it to our text encoding.
 
-        # Convert to six bit bytes
-        length = len(name)
-        data = ''.join([char_to_bin(c) for c in name])
+        Parameters:
+            name - The name of the node or attribute this belongs to, for error reporting.
+            val - The string to write.
+        """
+        if not isinstance(val, str):
+            raise BinaryEncodingException(
+                f'Node \'{name}\' has non-string value!',
+            )
 
-        # Pad out the rest with zeros
-        while (len(data) & 0x7) != 0:
-            data = data + '0'
+        # Need to convert this to encoding from standard string.
+        # Also, need to add the trailing null.
+        try:
+            valbytes = val.encode(self.encoding) + b'\0'
+        except UnicodeEncodeError:
+            raise BinaryEncodingException(
+                f'Node \'{name}\' has un-encodable string value \'{val}\''
+            )
+        self.__write_sized(valbytes)
 
-        # Convert to 8-bit bytes
-        data_chunks = [data[i:(i + 8)] for i in range(0, len(data), 8)]
-        data_int = [int(val, 2) for val in data_chunks]
+    def __write_value(self, node: Node) -> None:
+        """
+        Given a node with a value, write that value into the body.
 
-        # Output
-        self.stream.write_int(length)
-        for val in data_int:
-            self.stream.write_int(val)
+        Parameters:
+            node - A Node whose value should be encoded.
+        """
+        val = node.value
+        if val is None:
+            raise BinaryEncodingException(
+                f'Node \'{node.name}\' has invalid value None',
+            )
+
+        nodetype = node.type & (~Node.ARRAY_BIT)
+        size = node.data_length
+
+        if node.is_array:
+            if nodetype == Node.NODE_TYPE_BOOL:
+                val = [1 if v else 0 for v in val]
+
+            # Write out the header (number of bytes taken up) and every element at once
+            elems = len(val)
+            loc = self.__reserve((elems * size) + 4)
+            struct.pack_into(f'>I{elems}{node.data_encoding}', self.__body, loc, elems * size, *val)
+        elif nodetype == Node.NODE_TYPE_STR:
+            self.__write_string(node.name, val)
+        elif nodetype == Node.NODE_TYPE_BIN:
+            # Store raw binary
+            self.__write_sized(val)
+        elif node.is_composite:
+            # Array, but not, somewhat silly
+            NODE_STRUCTS[nodetype].pack_into(self.__body, self.__reserve(size), *val)
+        else:
+            if nodetype == Node.NODE_TYPE_BOOL:
+                val = 1 if val else 0
+            NODE_STRUCTS[nodetype].pack_into(self.__body, self.__reserve(size), val)
 
     def __write_node(self, node: Node) -> None:
         """
-        Given an integer node type, read the node's name, possible attributes
-        and children. Will return a Node representing this node. Note
-        that calling this on the first node should return a tree of all nodes.
+        Given a node, write its type, name, attributes and children to the header, and
+        its value, attribute values and the values of its children to the body. Both
+        are written in the same order, so a single walk of the tree handles both.
 
         Parameters:
             node - A Node which should be encoded.
         """
-        to_write = PackedOrdering.node_to_body_ordering(node, include_children=False, include_void=True)
-        for thing in to_write:
-            # First, write the type of this node out
-            if thing['type'] == 'value':
-                self.stream.write_int(thing['node'].type)
-            else:
-                self.stream.write_int(Node.ATTR_TYPE)
-            # Now, write the name out
-            self.__write_node_name(thing['name'])
+        # First, write the type and name of this node out
+        self.__header.append(node.type)
+        self.__header += pack_node_name(node.name)
+        if node.data_length != 0:
+            self.__write_value(node)
+
+        # Now, write the attributes out
+        attributes = node.attributes
+        for attr in sorted(attributes.keys()):
+            self.__header.append(Node.ATTR_TYPE)
+            self.__header += pack_node_name(attr)
+            self.__write_string(attr, attributes[attr])
 
         # Now, write out the children
         for child in node.children:
             self.__write_node(child)
 
         # Now, write out the end of node marker
-        self.stream.write_int(Node.END_OF_NODE)
-
-    def __add_data(self, data: bytes, length: int, offset: int) -> None:
-        """
-        Given some binary data, a length and an offset, add the data to the offset in the
-        output body. This function will ensure that any new bytes that aren't copied are
-        zero'd out. This includes bytes before the offset as well as any pad bytes after
-        the offset + length in order to pad this body to a 4 byte boundary.
-
-        Parameters:
-            data - A blob of binary data which should be copied into the output
-            length - Number of characters of data to copy
-            offset - Offset into the body to start copying
-        """
-        while self.__body_len < (length + offset):
-            self.__body.append(0)
-            self.__body_len = self.__body_len + 1
-
-        # Make sure its padded to 4 bytes
-        while (self.__body_len & 0x3) != 0:
-            self.__body.append(0)
-            self.__body_len = self.__body_len + 1
-
-        for i in range(length):
-            self.__body[offset + i] = data[i]
+        self.__header.append(Node.END_OF_NODE)
 
     def get_data(self) -> bytes:
         """
@@ -556,123 +474,21 @@ class BinaryEncoder:
             raise Exception("Logic error, should only call this once per instance")
         self.executed = True
 
-        # Generate the header first
+        # Generate the header and body at once
         self.__write_node(self.tree)
-        self.stream.write_int(Node.END_OF_DOCUMENT)
-        self.stream.write_pad(4)
-
-        header_length = len(self.stream.data)
-        header = self.stream.data[:]
-
-        # Generate the body
-        values = PackedOrdering.node_to_body_ordering(self.tree)
-        if len(values) > 0:
-            ordering = PackedOrdering(0, allow_expansion=True)
-
-            for value in values:
-                node = value['node']
-
-                if value['type'] == 'attribute':
-                    size = None
-                    enc = 's'
-                    dtype = 'str'
-                    array = False
-                    composite = False
-                    val = node.attribute(value['name'])
-                else:
-                    size = node.data_length
-                    enc = node.data_encoding
-                    dtype = node.data_type
-                    array = node.is_array
-                    composite = node.is_composite
-                    val = node.value
-
-                if val is None:
-                    raise BinaryEncodingException(
-                        f'Node \'{value["name"]}\' has invalid value None',
-                    )
-
-                if not array:
-                    # Scalar value
-                    alignment = value['alignment']
-
-                    if alignment == 1:
-                        loc = ordering.get_next_byte()
-                    elif alignment == 2:
-                        loc = ordering.get_next_short()
-                    elif alignment == 4:
-                        loc = ordering.get_next_int()
-
-                    if dtype == 'str':
-                        # Need to convert this to encoding from standard string.
-                        # Also, need to lob off the trailing null.
-                        if not isinstance(val, str):
-                            raise BinaryEncodingException(
-                                f'Node \'{value["name"]}\' has non-string value!',
-                            )
-
-                        try:
-                            valbytes = val.encode(self.encoding) + b'\0'
-                        except UnicodeEncodeError:
-                            raise BinaryEncodingException(
-                                f'Node \'{value["name"]}\' has un-encodable string value \'{val}\''
-                            )
-                        size = len(valbytes)
-                        self.__add_data(struct.pack('>I', size) + valbytes, size + 4, loc)
-                        ordering.mark_used(size + 4, loc, round_to=4)
-
-                        # We took care of this one
-                        continue
-                    elif dtype == 'bin':
-                        # Store raw binary
-                        size = len(val)
-                        self.__add_data(struct.pack('>I', size) + val, size + 4, loc)
-                        ordering.mark_used(size + 4, loc, round_to=4)
-
-                        # We took care of this one
-                        continue
-                    elif composite:
-                        # Array, but not, somewhat silly
-                        encode_value = f'>{enc}'
-                        self.__add_data(struct.pack(encode_value, *val), size, loc)
-                        ordering.mark_used(size, loc)
-
-                        # We took care of this one
-                        continue
-                    elif dtype == 'bool':
-                        val = 1 if val else 0
-
-                    # The size is built-in, emit it
-                    encode_value = f'>{enc}'
-                    self.__add_data(struct.pack(encode_value, val), size, loc)
-                    ordering.mark_used(size, loc)
-                else:
-                    # Array value
-                    loc = ordering.get_next_int()
-
-                    # The raw size in bytes
-                    elems = len(val)
-                    length = elems * size
-
-                    # Write out the header (number of bytes taken up)
-                    data = struct.pack('>I', length)
-                    encode_value = f'>{enc}'
-
-                    # Write out data one element at a time
-                    for v in val:
-                        if dtype == 'bool':
-                            data = data + struct.pack(encode_value, 1 if v else 0)
-                        else:
-                            data = data + struct.pack(encode_value, v)
+        self.__header.append(Node.END_OF_DOCUMENT)
+        while (len(self.__header) & 3) != 0:
+            self.__header.append(0)
 
-                    self.__add_data(data, length + 4, loc)
-                    ordering.mark_used(length + 4, loc, round_to=4)
+        # Lob off any extra room we reserved while growing the body
+        body_length = self.__ordering.end
+        del self.__body[body_length:]
 
         return b''.join([
-            struct.pack('>I', header_length),
-            header,
-            struct.pack('>I', self.__body_len),
-            bytes(self.__body),
+            LENGTH_STRUCT.pack(len(self.__header)),
+            self.__header,
+            LENGTH_STRUCT.pack(body_length),
+            self.__body,
         ])
 
 
@@ -1,7 +1,6 @@
 import ctypes
 import os
-from collections import defaultdict
-from typing import Generator, List, MutableMapping, Optional, Set, Tuple
+from typing import Dict, Generator, List, Optional, Tuple
 
 
 # Attempt to use the faster C++ libraries if they're available
@@ -54,7 +53,7 @@ class Lz77Decompress:
         self.pending_copy_pos: int = 0
         self.pending_copy_max: int = 0
         self.ringlength: int = backref or self.RING_LENGTH
-        self.ring: bytes = b'\x00' * self.ringlength
+        self.ring: bytearray = bytearray(self.ringlength)
 
     def __ring_read(self, copy_pos: int, copy_len: int) -> Generator[bytes, None, None]:
         """
@@ -71,7 +70,7 @@ class Lz77Decompress:
                 # Copy the whole thing out, we have enough space to do so
                 amount = copy_len
 
-            ret = self.ring[copy_pos:(copy_pos + amount)]
+            ret = bytes(self.ring[copy_pos:(copy_pos + amount)])
             self.__ring_write(ret)
             yield ret
 
@@ -92,7 +91,7 @@ class Lz77Decompress:
             if amount > (self.ringlength - self.write_pos):
                 amount = self.ringlength - self.write_pos
 
-            self.ring = self.ring[:self.write_pos] + bytedata[:amount] + self.ring[(self.write_pos + amount):]
+            self.ring[self.write_pos:(self.write_pos + amount)] = bytedata[:amount]
             bytedata = bytedata[amount:]
             self.write_pos = (self.write_pos + amount) % self.ringlength
 
@@ -159,6 +158,73 @@ class Lz77Decompress:
                 else:
                     raise Exception("Logic error!")
 
+    def decompress(self) -> bytes:
+        """
+        Decompress the entire stream in one go. This produces identical output
+        to joining the results of Lz77Decompress.decompress_bytes(), but rather
+        than maintaining a separate ringbuffer it writes everything into a single
+        output buffer which is prefixed with an empty ring's worth of zeros. That
+        way, every backref is a simple slice of the output we've already written,
+        including backrefs that point before the start of the data.
+
+        Returns:
+            Raw binary data.
+        """
+        data = memoryview(self.data)
+        datalen = len(data)
+        ringlength = self.ringlength
+        out = bytearray(ringlength)
+        pos = 0
+
+        while pos < datalen:
+            flags = data[pos]
+            pos += 1
+
+            flagpos = 0
+            while flagpos < 8:
+                if (flags >> flagpos) & 1 == self.FLAG_COPY:
+                    # Figure out how many copy flags are in a row, so we can
+                    # copy them out of the source in one chunk.
+                    amount = 1
+                    while flagpos + amount < 8 and (flags >> (flagpos + amount)) & 1 == self.FLAG_COPY:
+                        amount += 1
+                    out += data[pos:(pos + amount)]
+                    pos += amount
+                    flagpos += amount
+                    if pos >= datalen:
+                        # Nothing left to read, so no end of stream marker.
+                        return bytes(out[ringlength:])
+                else:
+                    if pos == datalen:
+                        return bytes(out[ringlength:])
+                    if pos + 1 == datalen:
+                        raise LzException('Unexpected EOF mid-backref')
+
+                    hi = data[pos]
+                    lo = data[pos + 1]
+                    pos += 2
+                    flagpos += 1
+
+                    copy_pos = (hi << 4) | (lo >> 4)
+                    if copy_pos == 0:
+                        return bytes(out[ringlength:])
+                    copy_len = (lo & 0xF) + 3
+
+                    # Backrefs that reach further than the ring wrap around it.
+                    if copy_pos > ringlength:
+                        copy_pos = copy_pos % ringlength or ringlength
+
+                    start = len(out) - copy_pos
+                    if copy_len <= copy_pos:
+                        out += out[start:(start + copy_len)]
+                    else:
+                        # This backref overlaps the data it is writing, so the
+                        # available chunk repeats until we've copied enough.
+                        chunk = out[start:]
+                        out += chunk * (copy_len // copy_pos) + chunk[:(copy_len % copy_pos)]
+
+        return bytes(out[ringlength:])
+
     def __read_backref(self) -> Generator[bytes, None, None]:
         """
         Read a backref chunk. Grab the copy length and copy position
@@ -215,75 +281,113 @@ class Lz77Compress:
     A class that can compress arbitrary binary data using the Lz77 protocol.
     Note that this does support overlapped backtracks, so for instance the
     string "abcabcabc" will be compressed properly (see unit tests for examples).
-    Great care has been taken in optimizing this and then we further optimize
-    by using Cython to build, netting us another 40% speed-up. This is important
-    because for any given packet we are decompressing and compressing at least
-    once, and if we use a proxy to direct traffic, possibly a second time.
+    Candidate backrefs are found using hash chains keyed by the next three bytes,
+    walking from the closest candidate to the furthest. How far down each chain
+    we are willing to walk is controlled by the compression level, trading off
+    compression ratio for speed. This is important because for any given packet
+    we are decompressing and compressing at least once, and if we use a proxy to
+    direct traffic, possibly a second time.
     """
 
     RING_LENGTH = 0x1000
 
-    LOOSE_COMPRESS_THRESHOLD = 1024 * 512
+    MAX_BACKREF = 18
+
+    LEVEL_FAST = 1
+    LEVEL_BEST = 2
+
+    # Maximum number of candidates to examine for each backref, per level.
+    CHAIN_DEPTH = {
+        LEVEL_FAST: 8,
+        LEVEL_BEST: RING_LENGTH,
+    }
 
     FLAG_COPY = 1
     FLAG_BACKREF = 0
 
-    def __init__(self, data: bytes, backref: Optional[int] = None) -> None:
+    def __init__(self, data: bytes, backref: Optional[int] = None, level: Optional[int] = None) -> None:
         """
         Initialize the object.
 
         Parameters:
             data - Binary blob representing the data to be decompressed.
+            backref - Optional size of the backref ring.
+            level - Optional compression level, either Lz77Compress.LEVEL_FAST or
+                    Lz77Compress.LEVEL_BEST. Defaults to LEVEL_BEST.
         """
         self.data: bytes = data
         self.read_pos: int = 0
         self.left: int = len(self.data)
         self.eof: bool = False
-        self.bytes_written: int = 0
         self.ringlength: int = backref or self.RING_LENGTH
-        self.locations: MutableMapping[int, Set[int]] = defaultdict(set)
-        self.starts: MutableMapping[bytes, Set[int]] = defaultdict(set)
-        self.last_start: Tuple[int, int, int] = (0, 0, 0)
+        self.chain_depth: int = self.CHAIN_DEPTH[level or self.LEVEL_BEST]
 
-        if len(data) > self.LOOSE_COMPRESS_THRESHOLD:
-            self.__ring_write = self.__ring_write_starts_only
-        else:
-            self.__ring_write = self.__ring_write_both
+        # Most recent position for a given three byte prefix, as well as the previous
+        # position with the same prefix for every position we've hashed so far.
+        self.head: Dict[int, int] = {}
+        self.prev: List[int] = [-1] * len(self.data)
+        self.hashed: int = 0
 
-    def __ring_write_starts_only(self, bytedata: bytes) -> None:
+    def __hash_until(self, pos: int) -> None:
         """
-        Write bytes into the backref ring.
+        Add every position before pos to the hash chains.
 
         Parameters:
-            byte - A byte to be written at the current write offset
+            pos - The position up to which (exclusive) we should hash.
         """
-        for byte in bytedata:
-            # Update the start locations hashmap if we're past the beginning
-            self.last_start = (self.last_start[1], self.last_start[2], byte)
-            if self.bytes_written >= 2:
-                self.starts[bytes(self.last_start)].add(self.bytes_written - 2)
+        data = self.data
+        head = self.head
+        prev = self.prev
 
-            # Keep track of the fact that we wrote this byte.
-            self.bytes_written += 1
+        for loc in range(self.hashed, min(pos, len(data) - 2)):
+            key = (data[loc] << 16) | (data[loc + 1] << 8) | data[loc + 2]
+            prev[loc] = head.get(key, -1)
+            head[key] = loc
+        self.hashed = max(self.hashed, pos)
 
-    def __ring_write_both(self, bytedata: bytes) -> None:
+    def __find_backref(self) -> Tuple[int, int]:
         """
-        Write bytes into the backref ring.
+        Find the longest backref for the data at the current read position.
 
-        Parameters:
-            byte - A byte to be written at the current write offset
+        Returns:
+            A tuple of the backref distance and length. If no backref was found,
+            the length will be zero.
         """
-        for byte in bytedata:
-            # Update the start locations hashmap if we're past the beginning
-            self.last_start = (self.last_start[1], self.last_start[2], byte)
-            if self.bytes_written >= 2:
-                self.starts[bytes(self.last_start)].add(self.bytes_written - 2)
+        data = self.data
+        prev = self.prev
+        pos = self.read_pos
+        self.__hash_until(pos)
+
+        # Figure out the maximum backref we can attempt to find
+        backref_amount = min(self.left, self.MAX_BACKREF)
+        earliest = max(0, pos - (self.ringlength - 1))
+
+        best_length = 0
+        best_distance = 0
+        depth = self.chain_depth
+        candidate = self.head.get((data[pos] << 16) | (data[pos + 1] << 8) | data[pos + 2], -1)
+
+        while candidate >= earliest and depth > 0:
+            depth -= 1
+
+            # If the candidate doesn't match at the current best length, it can't
+            # possibly be a better match, so skip checking the rest of it. We already
+            # know the first three bytes match because they hashed to this chain.
+            if data[candidate + best_length] == data[pos + best_length]:
+                length = 3
+                while length < backref_amount and data[candidate + length] == data[pos + length]:
+                    length += 1
+
+                if length > best_length:
+                    best_length = length
+                    best_distance = pos - candidate
+                    if length == backref_amount:
+                        # We found an ideal length, no need to keep searching.
+                        break
 
-            # Update the rest of the location hashmaps
-            self.locations[byte].add(self.bytes_written)
+            candidate = prev[candidate]
 
-            # Keep track of the fact that we wrote this byte.
-            self.bytes_written += 1
+        return best_distance, best_length
 
     def compress_bytes(self) -> Generator[bytes, None, None]:
         """
@@ -299,13 +403,9 @@ class Lz77Compress:
                 # Need to assemble and return the next chunk, which is a flag
                 # byte and then 8 instructions.
                 flags = 0x0
-                flagpos = -1
                 data: List[bytes] = [b""] * 8
 
-                for _ in range(8):
-                    # Track what flag we're generating data for
-                    flagpos += 1
-
+                for flagpos in range(8):
                     if self.left == 0:
                         # Output the end of stream marker, set EOF since we've succeeded
                         # in outputting all flags.
@@ -313,101 +413,28 @@ class Lz77Compress:
                         data[flagpos] = b"\x00\x00"
                         self.eof = True
                         break
-                    elif self.left < 3 or self.bytes_written < 3:
+
+                    if self.left < 3 or self.read_pos < 3:
                         # We either don't have enough data written to backref, or we
                         # don't have enough data in the stream that could be made into
                         # a backref.
-                        flags |= self.FLAG_COPY << flagpos
-
-                        chunk = self.data[self.read_pos:(self.read_pos + 1)]
-                        data[flagpos] = chunk
-                        self.__ring_write(chunk)
+                        copy_amount = 0
+                    else:
+                        backref_pos, copy_amount = self.__find_backref()
 
-                        self.read_pos += 1
-                        self.left -= 1
-                        continue
-
-                    # Figure out the maximum backref we can attempt to find
-                    backref_amount = min(self.left, 18)
-
-                    # Iterate over all spots where the first byte equals, and is in range.
-                    earliest = max(0, self.bytes_written - (self.ringlength - 1))
-                    index = self.data[self.read_pos:(self.read_pos + 3)]
-                    updated_backref_locations: Set[int] = set(
-                        absolute_pos for absolute_pos in self.starts[index]
-                        if absolute_pos >= earliest
-                    )
-                    self.starts[index] = updated_backref_locations
-                    possible_backref_locations: List[int] = list(updated_backref_locations)
-
-                    # Output the data as a copy if we couldn't find a backref
-                    if not possible_backref_locations:
+                    if copy_amount == 0:
+                        # Output the data as a copy since we couldn't find a backref
                         flags |= self.FLAG_COPY << flagpos
-
-                        chunk = self.data[self.read_pos:(self.read_pos + 1)]
-                        data[flagpos] = chunk
-                        self.__ring_write(chunk)
-
+                        data[flagpos] = self.data[self.read_pos:(self.read_pos + 1)]
                         self.read_pos += 1
                         self.left -= 1
-                        continue
-
-                    # Now, find the longest actual backref of our possibilities. We know
-                    # we're going to write at least these three bytes, so append it to the
-                    # output buffer.
-                    start_write_size = self.bytes_written
-                    self.__ring_write(index)
-                    copy_amount = 3
-                    while copy_amount < backref_amount:
-                        # First, let's see if we have any 3-wide chunks to consume.
-                        index = self.data[(self.read_pos + copy_amount):(self.read_pos + copy_amount + 3)]
-                        locations = self.starts[index]
-                        new_backref_locations: List[int] = [
-                            absolute_pos for absolute_pos in possible_backref_locations
-                            if absolute_pos + copy_amount in locations
-                        ]
-
-                        if new_backref_locations:
-                            # Mark that we're copying an extra byte from the backref.
-                            self.__ring_write(index)
-                            copy_amount += 3
-                            possible_backref_locations = new_backref_locations
-                        else:
-                            # Check our existing locations to figure out if we still have
-                            # longest prefixes of 1 or 2 left.
-                            while copy_amount < backref_amount:
-                                locations = self.locations[self.data[self.read_pos + copy_amount]]
-                                new_backref_locations = [
-                                    absolute_pos for absolute_pos in possible_backref_locations
-                                    if absolute_pos + copy_amount in locations
-                                ]
-
-                                # If we have no longest prefixes, that means that any of the
-                                # previous prefixes are good enough.
-                                if not new_backref_locations:
-                                    break
-
-                                # Mark that we're copying an extra byte from the backref.
-                                self.__ring_write(self.data[(self.read_pos + copy_amount):(self.read_pos + copy_amount + 1)])
-                                copy_amount += 1
-                                possible_backref_locations = new_backref_locations
-
-                            # Either we looped above in the inner while, or we didn't. Either way,
-                            # we don't have any more to check since there were no more 3-long backref
-                            # locations.
-                            break
-
-                    # Now that we have a list of candidates, arbitrarily pick the
-                    # first one as our candidate and output it.
-                    absolute_pos = possible_backref_locations[0]
-                    backref_pos = start_write_size - absolute_pos
-
-                    lo = (copy_amount - 3) & 0xF | ((backref_pos & 0xF) << 4)
-                    hi = (backref_pos >> 4) & 0xFF
-                    flags |= self.FLAG_BACKREF << flagpos
-                    data[flagpos] = bytes([hi, lo])
-                    self.read_pos += copy_amount
-                    self.left -= copy_amount
+                    else:
+                        lo = (copy_amount - 3) & 0xF | ((backref_pos & 0xF) << 4)
+                        hi = (backref_pos >> 4) & 0xFF
+                        flags |= self.FLAG_BACKREF << flagpos
+                        data[flagpos] = bytes([hi, lo])
+                        self.read_pos += copy_amount
+                        self.left -= copy_amount
 
                 yield bytes([flags]) + b"".join(data)
 
@@ -452,14 +479,17 @@ class Lz77:
                 raise LzException("Unknown exception in C++ code!")
         else:
             lz = Lz77Decompress(data, backref=self.backref)
-            return b''.join(lz.decompress_bytes())
+            return lz.decompress()
 
-    def compress(self, data: bytes) -> bytes:
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
         """
         Given a binary blob, return a new binary blob representing the compressed data.
 
         Parameters:
             data - Raw binary data.
+            level - Optional compression level, either Lz77Compress.LEVEL_FAST or
+                    Lz77Compress.LEVEL_BEST. Only honored by the python compressor,
+                    since the C++ compressor is always fast enough to search exhaustively.
 
         Returns:
             L7zz-compressed binary data.
@@ -481,5 +511,5 @@ class Lz77:
             else:
                 raise LzException("Unknown exception in C++ code!")
         else:
-            lz = Lz77Compress(data, backref=self.backref)
+            lz = Lz77Compress(data, backref=self.backref, level=level)
             return b''.join(lz.compress_bytes())
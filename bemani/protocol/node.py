@@ -1,6 +1,7 @@
 import copy
 import struct
-from typing import Any, Dict, List, Optional, Union
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 
 class NodeException(Exception):
@@ -9,6 +10,22 @@ class NodeException(Exception):
     """
 
 
+@lru_cache(maxsize=1024)
+def split_path(path: str) -> Tuple[str, ...]:
+    """
+    Given a slash-separated path to a child node, split it into the name of each
+    node along the way. Handlers look up the same handful of paths on every request,
+    so the result is cached.
+
+    Parameters:
+        path - String path, such as 'player/info/name'.
+
+    Returns:
+        A tuple of node names.
+    """
+    return tuple(path.split('/'))
+
+
 class Node:
     """
     An object representing one node in the tree structure of a packet. Nodes can have a number of
@@ -16,6 +33,19 @@ class Node:
     supported for a node to not have a value or children. This also includes a decent amount of
     constructor helper classmethods to make constructing a tree from source code easier.
     """
+    # Responses can be made up of tens of thousands of nodes, so don't pay for a
+    # per-instance dictionary.
+    __slots__ = (
+        '__name',
+        '__array',
+        '__translated_type',
+        '__type',
+        '__attrs',
+        '__value',
+        '__children',
+        '__child_index',
+    )
+
     NODE_NAME_CHARS = "0123456789:ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
 
     NODE_TYPE_VOID = 1
@@ -554,6 +584,7 @@ class Node:
         self.__attrs: Dict[str, str] = {}
         self.__value: Any = None
         self.__children: List[Node] = []
+        self.__child_index: Optional[Dict[str, Node]] = None
 
         if name is not None:
             self.set_name(name)
@@ -699,6 +730,28 @@ class Node:
             raise NodeException('Invalid child')
 
         self.__children.append(child)
+        self.__child_index = None
+
+    def __find_child(self, name: str) -> Optional['Node']:
+        """
+        Find an immediate child by name, using an index of children by name that is
+        built the first time we look up a child and thrown away when a child is added.
+
+        Parameters:
+            name - String name of the child to find.
+
+        Returns:
+            The first Node with this name if one was found, or None if not.
+        """
+        index = self.__child_index
+        if index is None:
+            index = {}
+            for child in self.__children:
+                if child.__name not in index:
+                    index[child.__name] = child
+            self.__child_index = index
+
+        return index.get(name)
 
     def child(self, name: str) -> Optional['Node']:
         """
@@ -712,18 +765,13 @@ class Node:
         Returns:
             A Node if a child was found by name, or None if not.
         """
-        tree = name.split('/', 1)
-        for child in self.__children:
-            if child.name == tree[0]:
-                if len(tree) == 1:
-                    # We don't have any more nodes to traverse.
-                    return child
-                else:
-                    # We have more nodes, try to get the next.
-                    return child.child(tree[1])
-
-        # There was no child by this name, return None.
-        return None
+        node: Optional[Node] = self
+        for part in split_path(name):
+            node = node.__find_child(part)
+            if node is None:
+                # There was no child by this name, return None.
+                return None
+        return node
 
     def child_value(self, name: str) -> Optional[Any]:
         """
@@ -846,6 +894,13 @@ class Node:
         Returns:
             A mixed value corresponding to this node's value. The returned value will be of the correct data type.
         """
+        if self.__translated_type['int']:
+            # Fast path for the most common node types
+            if self.__array or self.__translated_type['composite']:
+                return [int(v) for v in self.__value]
+            else:
+                return int(self.__value)
+
         def str_to_val(string: Union[str, bytes]) -> Any:
             if self.__translated_type['name'] == 'bool':
                 return True if string == 'true' else False
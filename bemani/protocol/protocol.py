@@ -1,8 +1,10 @@
 import binascii
 import hashlib
+from functools import lru_cache
 from typing import Optional
 
-from bemani.protocol.lz77 import Lz77
+from bemani.protocol.lz77 import Lz77, Lz77Compress
+from bemani.protocol.rc4 import RC4
 from bemani.protocol.binary import BinaryEncoding
 from bemani.protocol.xml import XmlEncoding
 from bemani.protocol.node import Node
@@ -14,6 +16,29 @@ class EAmuseException(Exception):
     """
 
 
+@lru_cache(maxsize=1024)
+def _derive_key(encryption_key: str) -> bytes:
+    """
+    Given an encryption key as returned from a HTTP request, derive the actual
+    RC4 key. The request and its response share the same key, so this is cached
+    in order to only hash once per exchange.
+
+    Parameters:
+        encryption_key - A string encryption key in the form 1-xxyyzzww-aabb.
+
+    Returns:
+        binary string representing the RC4 key
+    """
+    # Key is concatenated with the shared secret above
+    version, first, second = encryption_key.split('-')
+    key = binascii.unhexlify((first + second).encode('ascii')) + EAmuseProtocol.SHARED_SECRET
+
+    # Next, key is sent through MD5 to derive the real key
+    m = hashlib.md5()
+    m.update(key)
+    return m.digest()
+
+
 class EAmuseProtocol:
     """
     A wrapper object that encapsulates encoding/decoding the E-Amusement protocol by Konami.
@@ -23,6 +48,10 @@ class EAmuseProtocol:
     XML = 1
     BINARY = 2
 
+    # Responses larger than this are compressed with a shallower backref search,
+    # since the search time grows with the size of the data.
+    FAST_COMPRESSION_THRESHOLD = 64 * 1024
+
     SHIFT_JIS_LEGACY = "shift-jis-legacy"
     SHIFT_JIS = "shift-jis"
     EUC_JP = "euc-jp"
@@ -47,24 +76,8 @@ class EAmuseProtocol:
         Returns:
             binary string representing the encrypted/decrypted data
         """
-        S = list(range(256))
-        j = 0
-        out = []
-
-        # KSA Phase
-        for i in range(256):
-            j = (j + S[i] + key[i % len(key)]) & 0xFF
-            S[i], S[j] = S[j], S[i]
-
-        # PRGA Phase
-        i = j = 0
-        for char in data:
-            i = (i + 1) & 0xFF
-            j = (j + S[i]) & 0XFF
-            S[i], S[j] = S[j], S[i]
-            out.append(char ^ S[(S[i] + S[j]) & 0xFF])
-
-        return bytes(out)
+        rc4 = RC4()
+        return rc4.crypt(data, key)
 
     def __decrypt(self, encryption_key: str, data: bytes) -> bytes:
         """
@@ -83,14 +96,7 @@ class EAmuseProtocol:
             return None
 
         if encryption_key:
-            # Key is concatenated with the shared secret above
-            version, first, second = encryption_key.split('-')
-            key = binascii.unhexlify((first + second).encode('ascii')) + EAmuseProtocol.SHARED_SECRET
-
-            # Next, key is sent through MD5 to derive the real key
-            m = hashlib.md5()
-            m.update(key)
-            key = m.digest()
+            key = _derive_key(encryption_key)
         else:
             key = None
 
@@ -169,8 +175,12 @@ class EAmuseProtocol:
                 return data
             elif compression == 'lz77':
                 # This is a compressed new-style packet
+                if len(data) > EAmuseProtocol.FAST_COMPRESSION_THRESHOLD:
+                    level = Lz77Compress.LEVEL_FAST
+                else:
+                    level = Lz77Compress.LEVEL_BEST
                 lz = Lz77()
-                return lz.compress(data)
+                return lz.compress(data, level=level)
             else:
                 raise EAmuseException(f'Unknown compression {compression}')
 
@@ -281,6 +291,29 @@ class EAmuseProtocol:
         Returns:
             A blob of data representing the encoded packet.
         """
+        data = self.encode_tree(tree, text_encoding, packet_encoding)
+        return self.encode_body(compression, encryption, data)
+
+    def encode_tree(
+        self,
+        tree: Node,
+        text_encoding: Optional[str]=None,
+        packet_encoding: Optional[int]=None,
+    ) -> bytes:
+        """
+        Given a response, encode it without compressing or encrypting it. The result
+        can be handed to encode_body(), and is safe to reuse for identical responses.
+
+        Parameters:
+            tree - A Node object representing the root of the tree to encode.
+            text_encoding - A text encoding to use. If not provided, uses the text encoding of the
+                            last decoded packet. See __encode for values.
+            packet_encpding - A packet encoding to use. If not provided, uses the packet encoding
+                              of the last decoded packet. See __encode for values.
+
+        Returns:
+            A blob of data representing the encoded, uncompressed and unencrypted packet.
+        """
         # Either auto-set response based on request, or explicitly override in parameters
         if text_encoding is None:
             text_encoding = self.last_text_encoding
@@ -296,6 +329,20 @@ class EAmuseProtocol:
         self.last_text_encoding = None
         self.last_packet_encoding = None
 
-        data = self.__encode(tree, text_encoding, packet_encoding)
+        return self.__encode(tree, text_encoding, packet_encoding)
+
+    def encode_body(self, compression: Optional[str], encryption: Optional[str], data: bytes) -> bytes:
+        """
+        Given an already encoded response from encode_tree(), compress and encrypt it.
+
+        Parameters:
+            compression - A string specifying the compression type, should be 'lz77' or 'none'.
+                          The python value None can also be passed in.
+            encryption - A string specifying the encryption key, or None if no encryption.
+            data - A binary string representing the encoded packet.
+
+        Returns:
+            A blob of data representing the encoded packet.
+        """
         data = self.__compress(compression, data)
         return self.__encrypt(encryption, data)
@@ -0,0 +1,44 @@
+#include <stdint.h>
+
+extern "C"
+{
+    int rc4_crypt(uint8_t *indata, unsigned int inlen, uint8_t *key, unsigned int keylen, uint8_t *outdata)
+    {
+        if (keylen == 0)
+        {
+            // We cannot run the key schedule without a key.
+            return -1;
+        }
+
+        uint8_t S[256];
+        for (unsigned int i = 0; i < 256; i++)
+        {
+            S[i] = (uint8_t)i;
+        }
+
+        // KSA Phase
+        uint8_t j = 0;
+        for (unsigned int i = 0; i < 256; i++)
+        {
+            j = (uint8_t)(j + S[i] + key[i % keylen]);
+            uint8_t tmp = S[i];
+            S[i] = S[j];
+            S[j] = tmp;
+        }
+
+        // PRGA Phase
+        uint8_t x = 0;
+        uint8_t y = 0;
+        for (unsigned int loc = 0; loc < inlen; loc++)
+        {
+            x = (uint8_t)(x + 1);
+            y = (uint8_t)(y + S[x]);
+            uint8_t tmp = S[x];
+            S[x] = S[y];
+            S[y] = tmp;
+            outdata[loc] = indata[loc] ^ S[(uint8_t)(S[x] + S[y])];
+        }
+
+        return inlen;
+    }
+}
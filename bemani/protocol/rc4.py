@@ -0,0 +1,133 @@
+import ctypes
+import os
+from typing import Dict, Tuple
+
+
+# Attempt to use the faster C++ libraries if they're available
+try:
+    clib = None
+    clib_path = os.path.dirname(os.path.abspath(__file__))
+    files = [f for f in os.listdir(clib_path) if f.startswith("rc4alt") and f.endswith(".so")]
+    if len(files) > 0:
+        clib = ctypes.cdll.LoadLibrary(os.path.join(clib_path, files[0]))
+        clib.rc4_crypt.argtypes = (ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p)
+        clib.rc4_crypt.restype = ctypes.c_int
+except Exception:
+    clib = None
+
+
+class RC4Exception(Exception):
+    """
+    An exception thrown when we encounter an error with RC4 encryption/decryption.
+    """
+
+
+class RC4:
+    """
+    A wrapper class encapsulating RC4 encryption and decryption. If the C++
+    implementation is compiled, this defers to it. Otherwise, it falls back to
+    a python implementation which generates the keystream once per key and
+    caches it. Since a response is always encrypted with the same key that
+    the request was decrypted with, the response only pays for the keystream
+    bytes it needs beyond the length of the request.
+    """
+
+    # Maximum number of keys whose keystream we remember.
+    KEYSTREAM_CACHE_SIZE = 64
+
+    # Maximum length of keystream we will remember per key, so that a single
+    # huge packet can't balloon our memory usage.
+    KEYSTREAM_CACHE_LENGTH = 1024 * 1024
+
+    # Mapping of key to generated keystream as well as the PRGA state (S, i, j)
+    # needed to extend that keystream further.
+    __keystreams: Dict[bytes, Tuple[bytes, bytes, int, int]] = {}
+
+    def crypt(self, data: bytes, key: bytes) -> bytes:
+        """
+        Given a data blob and a key blob, perform RC4 encryption/decryption.
+
+        Parameters:
+            data - Binary string representing data to be encrypted/decrypted
+            key - Binary string representing the key to use
+
+        Returns:
+            binary string representing the encrypted/decrypted data
+        """
+        if not key:
+            raise RC4Exception("Cannot encrypt/decrypt with an empty key!")
+        if not data:
+            return b''
+
+        if clib is not None:
+            outbuf = ctypes.create_string_buffer(len(data))
+            result = clib.rc4_crypt(data, len(data), key, len(key), outbuf)
+            if result >= 0:
+                return outbuf.raw
+            elif result == -1:
+                raise RC4Exception("Cannot encrypt/decrypt with an empty key!")
+            else:
+                raise RC4Exception("Unknown exception in C++ code!")
+        else:
+            # XOR the whole keystream in one go by treating both blobs as big
+            # integers, which is much faster than a per-byte python loop.
+            length = len(data)
+            keystream = self.__keystream(key, length)
+            return (
+                int.from_bytes(data, 'little') ^ int.from_bytes(keystream[:length], 'little')
+            ).to_bytes(length, 'little')
+
+    def __keystream(self, key: bytes, length: int) -> bytes:
+        """
+        Given a key and a length, return at least that many bytes of keystream,
+        reusing and extending any previously generated keystream for this key.
+
+        Parameters:
+            key - Binary string representing the key to use
+            length - Integer number of keystream bytes required
+
+        Returns:
+            binary string representing the keystream
+        """
+        cached = RC4.__keystreams.get(key)
+        if cached is not None:
+            keystream, state, i, j = cached
+            if len(keystream) >= length:
+                return keystream
+            S = bytearray(state)
+        else:
+            keystream = b''
+            S = bytearray(range(256))
+            j = 0
+
+            # KSA Phase
+            keylen = len(key)
+            for i in range(256):
+                j = (j + S[i] + key[i % keylen]) & 0xFF
+                S[i], S[j] = S[j], S[i]
+
+            i = j = 0
+
+        # PRGA Phase, continuing from wherever we left off last time
+        out = bytearray(length - len(keystream))
+        for loc in range(len(out)):
+            i = (i + 1) & 0xFF
+            si = S[i]
+            j = (j + si) & 0xFF
+            sj = S[j]
+            S[i] = sj
+            S[j] = si
+            out[loc] = S[(si + sj) & 0xFF]
+        keystream = keystream + out
+
+        if length <= self.KEYSTREAM_CACHE_LENGTH:
+            if key not in RC4.__keystreams and len(RC4.__keystreams) >= self.KEYSTREAM_CACHE_SIZE:
+                # Evict the oldest key, since dictionaries preserve insertion order.
+                try:
+                    del RC4.__keystreams[next(iter(RC4.__keystreams))]
+                except (KeyError, StopIteration, RuntimeError):
+                    # Another thread beat us to it, that's fine.
+                    pass
+            RC4.__keystreams[key] = (keystream, bytes(S), i, j)
+
+        return keystream
@@ -139,6 +139,17 @@ class OutputStream:
         self.__data_len = self.__data_len + 1
         self.__formatted_data = None
 
+    def write_blob(self, blob: bytes) -> None:
+        """
+        Write a binary blob to the end of the output stream.
+
+        Parameters:
+            A binary string that should be appended to the current stream.
+        """
+        self.__data.append(blob)
+        self.__data_len = self.__data_len + len(blob)
+        self.__formatted_data = None
+
     def write_int(self, integer: int, size: int=1, is_unsigned: bool=True) -> None:
         """
         Write an integer to the end of the output stream.
@@ -1,9 +1,11 @@
 import copy
+import re
 import struct
-from typing import Any, Dict, Iterator, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.parsers import expat
 
 from bemani.protocol.stream import InputStream
-from bemani.protocol.node import Node
+from bemani.protocol.node import Node, NodeException
 
 
 class XmlEncodingException(Exception):
@@ -330,6 +332,198 @@ class XmlDecoder:
                     node = node + c
 
 
+class XmlExpatDecoder:
+    """
+    An XML parser built on expat, which is much faster than XmlDecoder on large
+    documents. It produces an identical Node tree for well-formed documents,
+    including leaving the value of self-closing elements such as <a __type="str"/>
+    unset, where <a __type="str"></a> gets an empty value. Expat is strict, so
+    anything it can't handle raises an XmlEncodingException and the caller is
+    expected to fall back to XmlDecoder, which is far more lenient.
+
+    Expat also normalizes carriage returns in text, whitespace in attribute values
+    and resolves every character reference, none of which XmlDecoder does. Documents
+    where that would make a difference are refused the same way, so they are parsed
+    by XmlDecoder instead.
+    """
+
+    XML_DECLARATION = re.compile(rb'^\s*<\?xml(.*?)\?>', re.DOTALL)
+    XML_ENCODING = re.compile(rb'encoding\s*=\s*["\']([^"\']*)["\']')
+    XML_NORMALIZED = re.compile(rb'[\r\t]|&#|<[^<>]*=\s*(?:"[^"<>]*\n|\'[^\'<>]*\n)')
+
+    # Converters for individual values, keyed by node data type. Anything
+    # not listed here is an integer type.
+    CONVERTERS: Dict[str, Callable[[str], Any]] = {
+        'bool': lambda val: val.lower() not in ['0', 'false'],
+        'float': float,
+        'double': float,
+    }
+
+    def __init__(self, data: bytes, encoding: str) -> None:
+        """
+        Initialize the XML decoder.
+
+        Parameters:
+            data - String XML data which should be decoded into Nodes.
+            encoding - The expected encoding of the XML.
+        """
+        self.data = data
+        self.root: Optional[Node] = None
+        self.current: List[Node] = []
+        self.text: List[str] = []
+        self.encoding = encoding
+        self.document = b''
+        self.parser: Optional[expat.XMLParserType] = None
+
+    def __start_element(self, tag: str, attributes: Dict[str, str]) -> None:
+        """
+        Called by expat when we encounter an element open tag. Creates a new node
+        with the specified name and attributes.
+
+        Parameters:
+            tag - The string tag name.
+            attributes - A dictionary keyed by attribute name and whose values are the
+                         already unescaped string attribute values.
+        """
+        self.__flush_text()
+
+        data_type = attributes.pop('__type', None)
+        array = attributes.pop('__count', None) is not None
+
+        if data_type is None:
+            # Special case for nodes that don't have a type
+            node = Node(name=tag, type=Node.NODE_TYPE_VOID)
+        else:
+            type_int = Node.typename_to_type(data_type)
+            if type_int is None:
+                raise XmlEncodingException(f'Invalid node type {data_type} for node {tag}')
+
+            node = Node(name=tag, type=type_int, array=array)
+
+        for attr, val in attributes.items():
+            node.set_attribute(attr, val)
+
+        self.current.append(node)
+
+    def __end_element(self, tag: str) -> None:
+        """
+        Called by expat when we encounter an element close tag, including right after
+        __start_element for empty elements.
+
+        Parameters:
+            tag - The string tag name.
+        """
+        if not self.__self_closing():
+            self.__flush_text()
+
+        node = self.current.pop()
+        if len(self.current) == 0:
+            self.root = node
+        else:
+            self.current[-1].add_child(node)
+
+    def __character_data(self, text: str) -> None:
+        """
+        Called by expat with chunks of text, which may be split at arbitrary points.
+        Buffer it up until the next tag, the same place XmlDecoder would handle it.
+
+        Parameters:
+            text - Already unescaped and decoded text.
+        """
+        self.text.append(text)
+
+    def __self_closing(self) -> bool:
+        """
+        Figure out whether the element expat just closed was written as <a/> rather
+        than <a></a>. XmlDecoder only hands text to a node when it sees a tag while
+        that node is open, so self-closing elements never get a value. Expat reports
+        the close of a self-closing element just past its "/>", whereas a separate
+        close tag always follows the start tag's ">", some text or a child.
+        """
+        if self.text or self.current[-1].children:
+            return False
+        end = self.parser.CurrentByteIndex
+        return self.document[(end - 2):end] == b'/>'
+
+    def __flush_text(self) -> None:
+        """
+        Convert any text we've seen since the last tag into the current node's value,
+        converting whole arrays at once based on the node's type.
+        """
+        value = ''.join(self.text)
+        self.text = []
+
+        if len(self.current) == 0:
+            return
+
+        node = self.current[-1]
+        data_type = node.data_type
+
+        if data_type == 'void':
+            # We can't handle this
+            return
+
+        if data_type == 'str':
+            if node.value is None:
+                node.set_value(value)
+            else:
+                node.set_value(node.value + value)
+        elif data_type == 'bin':
+            # Convert from a hex string, ignoring any spaces
+            binary = bytes.fromhex(''.join(value.split()))
+            if node.value is None:
+                node.set_value(binary)
+            else:
+                node.set_value(node.value + binary)
+        elif data_type == 'ip4':
+            node.set_value(value)
+        else:
+            converter = self.CONVERTERS.get(data_type, int)
+            if node.is_array or node.is_composite:
+                node.set_value(list(map(converter, value.split())))
+            else:
+                node.set_value(converter(value))
+
+    def get_tree(self) -> Node:
+        """
+        Parse the XML document into nodes.
+
+        Returns:
+            A Node object representing the root of the XML document.
+        """
+        data = self.data
+
+        # Expat doesn't understand most of the encodings that games use, so find
+        # the encoding ourselves and hand expat a decoded document.
+        declaration = self.XML_DECLARATION.match(data)
+        if declaration is not None:
+            encoding = self.XML_ENCODING.search(declaration.group(1))
+            if encoding is not None:
+                self.encoding = encoding.group(1).decode('ascii')
+            data = data[declaration.end():]
+
+        # None of the encodings we support can have these bytes inside a multi-byte
+        # character, so it is safe to look for them before decoding.
+        if self.XML_NORMALIZED.search(data) is not None:
+            raise XmlEncodingException('Document contains text that expat would normalize')
+
+        parser = expat.ParserCreate('utf-8')
+        parser.buffer_text = True
+        parser.StartElementHandler = self.__start_element
+        parser.EndElementHandler = self.__end_element
+        parser.CharacterDataHandler = self.__character_data
+        self.parser = parser
+
+        try:
+            # Hand expat UTF-8 ourselves so that its byte offsets index into self.document.
+            self.document = data.decode(self.encoding).encode('utf-8')
+            parser.Parse(self.document, True)
+        except (expat.ExpatError, LookupError, UnicodeError, ValueError, NodeException) as e:
+            raise XmlEncodingException(f'Failed to parse XML: {e}')
+
+        return self.root
+
+
 class XmlEncoder:
     def __init__(self, tree: Node, encoding: str) -> None:
         """
@@ -508,6 +702,15 @@ class XmlEncoding:
         self.encoding = 'shift-jis'
 
         # Decode property/value
+        try:
+            fast = XmlExpatDecoder(data, self.encoding)
+            tree = fast.get_tree()
+            self.encoding = fast.encoding
+            return tree
+        except XmlEncodingException:
+            # Fall back to the hand-rolled parser, which copes with malformed packets
+            pass
+
         try:
             xml = XmlDecoder(data, self.encoding)
             tree = xml.get_tree()
@@ -1,6 +1,16 @@
 # vim: set fileencoding=utf-8
+import gzip
+import json
+import requests
+import socket
+import threading
+import time
 import unittest
+from typing import List
+from unittest.mock import Mock, patch
 
+from bemani.api.app import app, after_request, jsonify_response
+from bemani.common import GameConstants, VersionConstants
 from bemani.data.api.client import APIClient
 
 
@@ -19,3 +29,103 @@ class TestAPIClient(unittest.TestCase):
         self.assertTrue(client._APIClient__content_type_valid('application/json;charset=UTF-8'))
         self.assertTrue(client._APIClient__content_type_valid('application/json;charset = UTF-8'))
         self.assertTrue(client._APIClient__content_type_valid('application/json; charset = UTF-8'))
+
+    def make_response(self, data: object, status: int=200) -> Mock:
+        response = Mock()
+        response.status_code = status
+        response.headers = {'content-type': 'application/json; charset=utf-8'}
+        response.json.return_value = data
+        return response
+
+    def test_pooled_sessions(self) -> None:
+        APIClient.close_all()
+        self.addCleanup(APIClient.close_all)
+        sessions = []
+
+        def request(session: requests.Session, *args: object, **kwargs: object) -> Mock:
+            sessions.append(session)
+            return self.make_response({'profile': [{'name': 'PLAYER'}]})
+
+        with patch.object(requests.Session, 'request', autospec=True, side_effect=request) as mock:
+            one = APIClient('https://127.0.0.1/', 'token', False, True)
+            two = APIClient('https://127.0.0.1/', 'token', False, True)
+            other = APIClient('https://127.0.0.2/', 'token', False, True)
+            for client in [one, two, other]:
+                self.assertEqual(client.get_profiles(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, 'card', []), [{'name': 'PLAYER'}])
+
+        # Clients for the same server share a connection pool, and we ask for compression.
+        self.assertIs(sessions[0], sessions[1])
+        self.assertIsNot(sessions[0], sessions[2])
+        self.assertEqual(mock.call_args[1]['headers']['Accept-Encoding'], 'gzip')
+        self.assertEqual(mock.call_args[1]['timeout'], (APIClient.CONNECT_TIMEOUT, APIClient.READ_TIMEOUT))
+
+        stats = APIClient.stats()
+        self.assertEqual(stats['https://127.0.0.1/']['requests'], 2)
+        self.assertEqual(stats['https://127.0.0.1/']['errors'], 0)
+        self.assertEqual(stats['https://127.0.0.2/']['requests'], 1)
+
+    def test_error_metrics(self) -> None:
+        APIClient.close_all()
+        self.addCleanup(APIClient.close_all)
+        client = APIClient('https://127.0.0.1', 'token', False, True)
+
+        with patch.object(requests.Session, 'request', side_effect=requests.exceptions.ConnectionError()):
+            self.assertEqual(client.get_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, 'card', []), [])
+        with patch.object(requests.Session, 'request', return_value=self.make_response({'error': 'Bad'}, 500)):
+            self.assertEqual(client.get_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, 'card', []), [])
+
+        stats = APIClient.stats()['https://127.0.0.1']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['errors'], 2)
+
+    def test_retries(self) -> None:
+        APIClient.close_all()
+        self.addCleanup(APIClient.close_all)
+
+        def serve(sock: socket.socket, behavior: str, connections: List[str]) -> None:
+            while True:
+                try:
+                    conn, _ = sock.accept()
+                except OSError:
+                    return
+                connections.append(behavior)
+                conn.recv(65536)
+                if behavior == 'reset':
+                    # Close with a reset, like a server dropping a stale keep-alive connection.
+                    conn.setsockopt(socket.SOL_SOCKET, socket.SO_LINGER, b'\x01\x00\x00\x00\x00\x00\x00\x00')
+                else:
+                    time.sleep(2.0)
+                conn.close()
+
+        for behavior, attempts in [('hang', 1), ('reset', 2)]:
+            connections: List[str] = []
+            sock = socket.socket()
+            sock.bind(('127.0.0.1', 0))
+            sock.listen()
+            self.addCleanup(sock.close)
+            threading.Thread(target=serve, args=(sock, behavior, connections), daemon=True).start()
+
+            # A hung server should only cost us the read timeout once, but a reset connection is worth another try.
+            client = APIClient(f'http://127.0.0.1:{sock.getsockname()[1]}', 'token', False, True)
+            start = time.time()
+            with patch.object(APIClient, 'READ_TIMEOUT', 0.5):
+                self.assertEqual(client.get_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, 'card', []), [])
+            self.assertLess(time.time() - start, 1.0)
+            self.assertEqual(len(connections), attempts)
+
+    def test_compressed_responses(self) -> None:
+        data = {'records': [{'song': songid, 'chart': 0, 'points': 1000} for songid in range(100)]}
+
+        with app.test_request_context(headers={'Accept-Encoding': 'gzip, deflate'}):
+            response = after_request(jsonify_response(data))
+            self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+            self.assertEqual(json.loads(gzip.decompress(response.get_data())), data)
+
+            # Small responses aren't worth compressing.
+            response = after_request(jsonify_response({'name': 'server'}))
+            self.assertNotIn('Content-Encoding', response.headers)
+
+        with app.test_request_context():
+            response = after_request(jsonify_response(data))
+            self.assertNotIn('Content-Encoding', response.headers)
+            self.assertEqual(json.loads(response.get_data()), data)
@@ -1,7 +1,19 @@
 # vim: set fileencoding=utf-8
+import random
+import time
 import unittest
+from typing import Any, Dict, List
+from unittest.mock import Mock
 
-from bemani.data.mysql.base import BaseData
+from bemani.data.codec import JsonCodec, OrjsonCodec, orjson
+from bemani.data.mysql.base import BaseData, ReplicaRouter
+from bemani.tests.helpers import ExtendedTestCase
+
+
+def codecs() -> List[JsonCodec]:
+    if orjson is not None:
+        return [JsonCodec(), OrjsonCodec()]
+    return [JsonCodec()]
 
 
 class TestBaseData(unittest.TestCase):
@@ -29,10 +41,36 @@ class TestBaseData(unittest.TestCase):
             'bytes': b'\x01\x02\x03\x04\x05',
         }
 
-        serialized = data.serialize(testdict)
-        self.assertEqual(serialized, '{"bytes": ["__bytes__", 1, 2, 3, 4, 5]}')
+        serialized = JsonCodec().encode(testdict)
+        self.assertEqual(serialized, '{"bytes": {"__bytes__": "0102030405"}}')
         self.assertEqual(data.deserialize(serialized), testdict)
 
+    def test_legacy_byte_deserialize(self) -> None:
+        data = BaseData({}, None)
+
+        # Rows written before bytes were stored as hex should still load.
+        for codec in codecs():
+            data.codec = codec
+            self.assertEqual(
+                data.deserialize('{"bytes": ["__bytes__", 1, 2, 3, 4, 5], "list": [["__bytes__"], {"a": ["__bytes__", 6]}]}'),
+                {'bytes': b'\x01\x02\x03\x04\x05', 'list': [b'', {'a': b'\x06'}]},
+            )
+
+    def test_codecs_agree(self) -> None:
+        testdict: Dict[Any, Any] = {
+            'name': 'テスト',
+            'bytes': b'\x00\xff',
+            'nested': [{'bytes': b'\x01'}, [b'\x02', 3]],
+            'notbytes': {'__bytes__': 5},
+            'huge': 2 ** 70,
+            3: 'intkey',
+        }
+        expected = {k if isinstance(k, str) else str(k): v for k, v in testdict.items()}
+
+        for codec in codecs():
+            for other in codecs():
+                self.assertEqual(other.decode(codec.encode(testdict)), expected)
+
     def test_deep_byte_serialize(self) -> None:
         data = BaseData({}, None)
 
@@ -46,3 +84,88 @@ class TestBaseData(unittest.TestCase):
         }
 
         self.assertEqual(data.deserialize(data.serialize(testdict)), testdict)
+
+    def test_replica_routing(self) -> None:
+        primary = Mock()
+        replica = Mock()
+        router = ReplicaRouter(replica)
+        data = BaseData({'database': {}}, primary, router)
+
+        # Only reads that allow it go to the replica.
+        data.execute("SELECT id FROM user WHERE id = :id", {'id': 1}, allow_replica=True)
+        data.execute("  select id FROM user", allow_replica=True)
+        data.execute("SELECT id FROM session WHERE session = :session", {'session': 'abc'})
+        data.execute("SELECT id FROM user WHERE id = 1 FOR UPDATE", allow_replica=True)
+        self.assertEqual(replica.execute.call_count, 2)
+        self.assertEqual(primary.execute.call_count, 2)
+
+        # Once we lock or write anything, we should read our own writes from the primary.
+        data.execute("UPDATE user SET pin = '1234' WHERE id = 1")
+        data.execute("SELECT pin FROM user WHERE id = 1", allow_replica=True)
+        self.assertEqual(replica.execute.call_count, 2)
+        self.assertEqual(primary.execute.call_count, 4)
+
+        # Data objects without a router only ever use the primary.
+        data = BaseData({'database': {}}, primary)
+        data.execute("SELECT id FROM user", allow_replica=True)
+        self.assertEqual(primary.execute.call_count, 5)
+
+
+class TestBaseDataBenchmark(ExtendedTestCase):
+    """
+    Round trips profiles shaped like the largest ones that game classes store through
+    every available codec. Run with -v to see timings.
+    """
+
+    def assertRoundTrips(self, name: str, profile: Dict[str, Any]) -> None:
+        iterations = 10
+        for codec in codecs():
+            start = time.time()
+            for _ in range(iterations):
+                data = codec.encode(profile)
+            encode_time = (time.time() - start) / iterations
+
+            start = time.time()
+            for _ in range(iterations):
+                newprofile = codec.decode(data)
+            decode_time = (time.time() - start) / iterations
+
+            self.assertEqual(profile, newprofile)
+            if self.verbose:
+                print(f"{name} ({codec.name}): {len(data)} bytes, encode {encode_time * 1000:.2f}ms, decode {decode_time * 1000:.2f}ms")
+
+    def test_iidx_ghosts(self) -> None:
+        # Rival ghosts are stored as raw bytes, one per chart.
+        profile = {
+            'name': 'PLAYER',
+            'pid': 51,
+            'sp': {'dan': 15, 'rank': 18},
+            'ghosts': [
+                {'musicid': musicid, 'chart': musicid % 6, 'ghost': bytes(random.randrange(256) for _ in range(64))}
+                for musicid in range(1000, 1500)
+            ],
+        }
+        self.assertRoundTrips('IIDX ghosts', profile)
+
+    def test_sdvx_items(self) -> None:
+        profile = {
+            'name': 'PLAYER',
+            'packet': 12345,
+            'block': 6789,
+            'items': [
+                {'type': itemtype, 'id': itemid, 'param': random.randint(0, 100)}
+                for itemtype in range(10)
+                for itemid in range(500)
+            ],
+        }
+        self.assertRoundTrips('SDVX items', profile)
+
+    def test_jubeat_emblems(self) -> None:
+        profile = {
+            'name': 'PLAYER',
+            'emblem': [1, 2, 3, 4, 5],
+            'emblem_list': [random.randint(0, 0xFFFFFFFF) for _ in range(96)],
+            'music_list': [random.randint(0, 0xFFFFFFFF) for _ in range(64)],
+            'last': {'emblem': [random.randint(0, 1000) for _ in range(5)]},
+        }
+        self.assertRoundTrips('Jubeat emblems', profile)
@@ -0,0 +1,272 @@
+# vim: set fileencoding=utf-8
+import random
+import time
+from unittest.mock import Mock
+
+from bemani.backend.ddr.ddrace import DDRAce
+from bemani.backend.iidx.rootage import IIDXRootage
+from bemani.backend.jubeat.clan import JubeatClan
+from bemani.backend.popn.usaneko import PopnMusicUsaNeko
+from bemani.backend.sdvx.vividwave import SoundVoltexVividWave
+from bemani.common import ValidatedDict
+from bemani.data import Score
+from bemani.protocol import EAmuseProtocol, Node
+from bemani.protocol.binary import BinaryEncoding
+from bemani.tests.helpers import ExtendedTestCase
+
+
+class TestBinaryEncoderBenchmark(ExtendedTestCase):
+    """
+    Encodes some of the largest responses that game classes emit and verifies that
+    they survive a round trip. Run with -v to see timings. Score data is generated
+    from a fixed seed so that timings are comparable between runs.
+    """
+
+    SEED = 1234
+
+    def assertEncodes(self, name: str, tree: Node) -> None:
+        start = time.time()
+        data = BinaryEncoding().encode(tree, encoding=EAmuseProtocol.SHIFT_JIS)
+        encode_time = time.time() - start
+
+        start = time.time()
+        newtree = BinaryEncoding().decode(data)
+        decode_time = time.time() - start
+
+        self.assertEqual(tree, newtree)
+        if self.verbose:
+            print(f"{name}: {len(data)} bytes, encode {encode_time * 1000:.2f}ms, decode {decode_time * 1000:.2f}ms")
+
+    def test_iidx_getrank(self) -> None:
+        # A player and five rivals who have each played every chart of every song.
+        rng = random.Random(self.SEED)
+        scores = [
+            Score(
+                0,
+                musicid,
+                chart,
+                rng.randint(0, 4000),
+                1234567890,
+                1234567890,
+                0,
+                1,
+                {
+                    'clear_status': rng.choice([
+                        IIDXRootage.CLEAR_STATUS_NO_PLAY,
+                        IIDXRootage.CLEAR_STATUS_FAILED,
+                        IIDXRootage.CLEAR_STATUS_CLEAR,
+                        IIDXRootage.CLEAR_STATUS_FULL_COMBO,
+                    ]),
+                    'miss_count': rng.randint(0, 100),
+                },
+            )
+            for musicid in range(1000, 3000)
+            for chart in range(7)
+        ]
+        data = Mock()
+        data.remote.music.get_scores.return_value = scores
+        data.local.music.get_most_played.return_value = [(musicid, 100) for musicid in range(1000, 1020)]
+        game = IIDXRootage(data, {}, Mock())
+
+        request = Node.void('IIDX26music')
+        request.set_attribute('cltype', str(IIDXRootage.GAME_CLTYPE_SINGLE))
+        request.set_attribute('iidxid', '12345678')
+        for rivalid in range(5):
+            request.set_attribute(f'iidxid{rivalid}', '12345678')
+
+        self.assertEncodes("IIDX music.getrank", game.handle_IIDX26music_getrank_request(request))
+
+    def test_sdvx_load_m(self) -> None:
+        # A player who has played every chart of every song.
+        rng = random.Random(self.SEED)
+        scores = [
+            Score(
+                0,
+                musicid,
+                chart,
+                rng.randint(0, 10000000),
+                1234567890,
+                1234567890,
+                0,
+                1,
+                {
+                    'clear_type': rng.choice([
+                        SoundVoltexVividWave.CLEAR_TYPE_FAILED,
+                        SoundVoltexVividWave.CLEAR_TYPE_CLEAR,
+                        SoundVoltexVividWave.CLEAR_TYPE_HARD_CLEAR,
+                        SoundVoltexVividWave.CLEAR_TYPE_ULTIMATE_CHAIN,
+                        SoundVoltexVividWave.CLEAR_TYPE_PERFECT_ULTIMATE_CHAIN,
+                    ]),
+                    'grade': rng.choice([
+                        SoundVoltexVividWave.GRADE_D,
+                        SoundVoltexVividWave.GRADE_B,
+                        SoundVoltexVividWave.GRADE_AA,
+                        SoundVoltexVividWave.GRADE_AAA_PLUS,
+                        SoundVoltexVividWave.GRADE_S,
+                    ]),
+                    'stats': {
+                        'btn_rate': rng.randint(0, 10000),
+                        'long_rate': rng.randint(0, 10000),
+                        'vol_rate': rng.randint(0, 10000),
+                    },
+                },
+            )
+            for musicid in range(1, 1500)
+            for chart in range(5)
+        ]
+        data = Mock()
+        data.remote.music.get_scores.return_value = scores
+        game = SoundVoltexVividWave(data, {}, Mock())
+
+        request = Node.void('game')
+        request.add_child(Node.string('refid', '0123456789ABCDEF'))
+
+        self.assertEncodes("SDVX game.sv5_load_m", game.handle_game_sv5_load_m_request(request))
+
+    def test_jubeat_gametop_mdata(self) -> None:
+        # A player who has played every normal and hard mode chart of every song, with ghosts.
+        rng = random.Random(self.SEED)
+        scores = [
+            Score(
+                0,
+                musicid,
+                chart,
+                rng.randint(0, 1000000),
+                1234567890,
+                1234567890,
+                0,
+                rng.randint(1, 50),
+                {
+                    'clear_count': rng.randint(0, 10),
+                    'full_combo_count': rng.randint(0, 5),
+                    'excellent_count': rng.randint(0, 1),
+                    'ghost': [rng.randint(0, 255) for _ in range(30)],
+                },
+            )
+            for musicid in range(10000000, 10001200)
+            for chart in range(6)
+        ]
+        data = Mock()
+        data.remote.music.get_scores.return_value = scores
+        game = JubeatClan(data, {}, Mock())
+
+        self.assertEncodes(
+            "Jubeat gametop.get_mdata",
+            game.format_scores(Mock(), ValidatedDict({'extid': 12345678}), scores),
+        )
+
+    def test_ddr_userload(self) -> None:
+        # A player who has played every single and double chart of every song.
+        rng = random.Random(self.SEED)
+        scores = [
+            Score(
+                musicid * 10 + chart,
+                musicid,
+                chart,
+                rng.randint(0, 1000000),
+                1234567890,
+                1234567890,
+                0,
+                rng.randint(1, 50),
+                {
+                    'rank': rng.choice([
+                        DDRAce.RANK_E,
+                        DDRAce.RANK_C,
+                        DDRAce.RANK_A,
+                        DDRAce.RANK_AA_PLUS,
+                        DDRAce.RANK_AAA,
+                    ]),
+                    'halo': rng.choice([
+                        DDRAce.HALO_NONE,
+                        DDRAce.HALO_GOOD_FULL_COMBO,
+                        DDRAce.HALO_GREAT_FULL_COMBO,
+                        DDRAce.HALO_PERFECT_FULL_COMBO,
+                        DDRAce.HALO_MARVELOUS_FULL_COMBO,
+                    ]),
+                },
+            )
+            for musicid in range(1000, 2500)
+            for chart in [
+                DDRAce.CHART_SINGLE_BEGINNER,
+                DDRAce.CHART_SINGLE_BASIC,
+                DDRAce.CHART_SINGLE_DIFFICULT,
+                DDRAce.CHART_SINGLE_EXPERT,
+                DDRAce.CHART_SINGLE_CHALLENGE,
+                DDRAce.CHART_DOUBLE_BASIC,
+                DDRAce.CHART_DOUBLE_DIFFICULT,
+                DDRAce.CHART_DOUBLE_EXPERT,
+                DDRAce.CHART_DOUBLE_CHALLENGE,
+            ]
+        ]
+        data = Mock()
+        data.remote.music.get_scores.return_value = scores
+        data.local.user.get_achievements.return_value = []
+        game = DDRAce(data, {}, Mock())
+
+        request = Node.void('playerdata')
+        requestdata = Node.void('data')
+        request.add_child(requestdata)
+        requestdata.add_child(Node.string('mode', 'userload'))
+        requestdata.add_child(Node.string('refid', '0123456789ABCDEF'))
+        requestdata.add_child(Node.string('ddrcode', '12345678'))
+
+        self.assertEncodes("DDR playerdata.usergamedata_advanced", game.handle_playerdata_usergamedata_advanced_request(request))
+
+    def test_popn_read_score(self) -> None:
+        # A player who has played every chart of every song.
+        rng = random.Random(self.SEED)
+        scores = [
+            Score(
+                0,
+                musicid,
+                chart,
+                rng.randint(0, 100000),
+                1234567890,
+                1234567890,
+                0,
+                rng.randint(1, 50),
+                {
+                    'medal': rng.choice([
+                        PopnMusicUsaNeko.PLAY_MEDAL_CIRCLE_FAILED,
+                        PopnMusicUsaNeko.PLAY_MEDAL_EASY_CLEAR,
+                        PopnMusicUsaNeko.PLAY_MEDAL_STAR_CLEARED,
+                        PopnMusicUsaNeko.PLAY_MEDAL_DIAMOND_FULL_COMBO,
+                        PopnMusicUsaNeko.PLAY_MEDAL_PERFECT,
+                    ]),
+                },
+            )
+            for musicid in range(1, 1800)
+            for chart in [
+                PopnMusicUsaNeko.CHART_TYPE_EASY,
+                PopnMusicUsaNeko.CHART_TYPE_NORMAL,
+                PopnMusicUsaNeko.CHART_TYPE_HYPER,
+                PopnMusicUsaNeko.CHART_TYPE_EX,
+            ]
+        ]
+        data = Mock()
+        data.remote.music.get_scores.return_value = scores
+        game = PopnMusicUsaNeko(data, {}, Mock())
+
+        request = Node.void('player24')
+        request.add_child(Node.string('ref_id', '0123456789ABCDEF'))
+
+        self.assertEncodes("Pop'n player24.read_score", game.handle_player24_read_score_request(request))
+
+    def test_profile(self) -> None:
+        # Deeply nested profile with a mix of every common node type, similar to a jubeat gametop.
+        root = Node.void('gametop')
+        player = Node.void('player')
+        root.add_child(player)
+        player.add_child(Node.string('name', 'PLAYER'))
+        player.add_child(Node.s32('jid', 12345678))
+        for itemid in range(2000):
+            item = Node.void('item')
+            item.set_attribute('id', str(itemid))
+            item.add_child(Node.u8('type', itemid % 256))
+            item.add_child(Node.s16('param', itemid % 1000))
+            item.add_child(Node.bool('unlocked', itemid % 2 == 0))
+            item.add_child(Node.s32_array('stats', [itemid, -itemid, 0, 1]))
+            item.add_child(Node.u64('time', 1234567890000 + itemid))
+            player.add_child(item)
+
+        self.assertEncodes("Profile", root)
@@ -0,0 +1,130 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import MagicMock, Mock, patch
+
+from bemani.backend import Base, Dispatch
+from bemani.backend.sdvx import SoundVoltexFactory
+from bemani.backend.cache import ResponseCache
+from bemani.data import Arcade, Machine
+from bemani.protocol import EAmuseProtocol, Node
+
+
+class TestDispatch(unittest.TestCase):
+
+    def setUp(self) -> None:
+        SoundVoltexFactory.register_all()
+        ResponseCache.invalidate()
+
+    def make_dispatch(self, name: str='Machine') -> Dispatch:
+        data = Mock()
+        data.local.machine.get_machine.return_value = Machine(1, '0123456789ABCDEF0123', name, '', None, 10000, None, None, {})
+        config = {
+            'server': {
+                'address': '127.0.0.1',
+                'keepalive': '127.0.0.1',
+                'port': 80,
+                'https': False,
+                'enforce_pcbid': False,
+            },
+            'client': {
+                'address': '10.0.0.1',
+            },
+            'paseli': {
+                'enabled': True,
+                'infinite': True,
+            },
+        }
+        return Dispatch(config, data, False)
+
+    def make_request(self, service: str, method: str) -> Node:
+        root = Node.void('call')
+        root.set_attribute('model', 'KFC:J:A:A:2017010100')
+        root.set_attribute('srcid', '0123456789ABCDEF0123')
+        request = Node.void(service)
+        request.set_attribute('method', method)
+        root.add_child(request)
+        return root
+
+    def encode(self, dispatch: Dispatch, request: Node) -> bytes:
+        proto = EAmuseProtocol()
+        proto.last_text_encoding = EAmuseProtocol.SHIFT_JIS
+        proto.last_packet_encoding = EAmuseProtocol.BINARY
+        return dispatch.handle_encoded(request, proto)
+
+    def test_handle_encoded(self) -> None:
+        dispatch = self.make_dispatch()
+        request = self.make_request('facility', 'get')
+
+        expected = EAmuseProtocol().encode_tree(
+            dispatch.handle(request),
+            EAmuseProtocol.SHIFT_JIS,
+            EAmuseProtocol.BINARY,
+        )
+        self.assertEqual(self.encode(dispatch, request), expected)
+
+    def test_response_cache(self) -> None:
+        dispatch = self.make_dispatch()
+        request = self.make_request('facility', 'get')
+        first = self.encode(dispatch, request)
+
+        # A second request shouldn't need to look up the machine again for the handler.
+        calls = dispatch._Dispatch__data.local.machine.get_machine.call_count  # type: ignore
+        self.assertEqual(self.encode(dispatch, request), first)
+        self.assertEqual(dispatch._Dispatch__data.local.machine.get_machine.call_count, calls + 1)  # type: ignore
+
+        # Changing the machine's settings should not serve a stale response.
+        renamed = self.encode(self.make_dispatch('Renamed'), request)
+        self.assertNotEqual(renamed, first)
+        self.assertIn(b'Renamed', renamed)
+
+        # Explicit invalidation should throw away the cached response.
+        ResponseCache.invalidate('0123456789ABCDEF0123')
+        dispatch = self.make_dispatch()
+        self.assertEqual(self.encode(dispatch, request), first)
+        calls = dispatch._Dispatch__data.local.machine.get_machine.call_count  # type: ignore
+        self.assertEqual(calls, 2)
+
+    def test_response_cache_invalidate(self) -> None:
+        ResponseCache.put('first', '0123456789ABCDEF0123', b'first')
+        ResponseCache.put('second', '0123456789ABCDEF0123', b'second')
+        ResponseCache.put('other', '3210FEDCBA9876543210', b'other')
+
+        # Only the given machine's responses should be thrown away.
+        ResponseCache.invalidate('0123456789ABCDEF0123')
+        self.assertEqual(ResponseCache.get('first'), None)
+        self.assertEqual(ResponseCache.get('second'), None)
+        self.assertEqual(ResponseCache.get('other'), b'other')
+
+        ResponseCache.invalidate()
+        self.assertEqual(ResponseCache.get('other'), None)
+
+    def test_long_lived(self) -> None:
+        dispatch = self.make_dispatch()
+        data = dispatch._Dispatch__data  # type: ignore
+        config = dispatch._Dispatch__config  # type: ignore
+        data.local.machine.get_machine.return_value = Machine(1, '0123456789ABCDEF0123', 'Machine', '', 5, 10000, None, None, {})
+        data.local.machine.get_arcade.return_value = Arcade(5, 'Arcade', '', '0000', {'paseli_enabled': False, 'mask_services_url': True}, [])
+
+        # The client address is given per request, and arcade overrides shouldn't
+        # leak into the config shared between requests.
+        response = dispatch.handle(self.make_request('facility', 'get'), '192.168.1.2')
+        self.assertEqual(response.child_value('facility/portfw/globalip'), b'\xc0\xa8\x01\x02')
+        response = dispatch.handle(self.make_request('pcbtracker', 'alive'), '192.168.1.3')
+        self.assertEqual(response.child('pcbtracker').attribute('ecenable'), '0')
+        self.assertEqual(config['client']['address'], '10.0.0.1')
+        self.assertTrue(config['paseli']['enabled'])
+        self.assertNotIn('uri', config['server'])
+
+    def test_transactional_requests(self) -> None:
+        dispatch = self.make_dispatch()
+        data = dispatch._Dispatch__data  # type: ignore
+        data.transaction.return_value = MagicMock()
+
+        # Only requests that the game class opts in should be run in a transaction.
+        dispatch.handle(self.make_request('pcbtracker', 'alive'))
+        self.assertEqual(data.transaction.call_count, 0)
+        with patch.object(Base, 'transactional_requests', {('pcbtracker', 'alive')}):
+            response = dispatch.handle(self.make_request('pcbtracker', 'alive'))
+        self.assertEqual(data.transaction.call_count, 1)
+        self.assertEqual(data.transaction.return_value.__exit__.call_count, 1)
+        self.assertIsNotNone(response.child('pcbtracker'))
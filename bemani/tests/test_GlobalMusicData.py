@@ -0,0 +1,251 @@
+# vim: set fileencoding=utf-8
+import threading
+import time
+import unittest
+from typing import Any, Dict, List, Set, Tuple
+from unittest.mock import Mock, patch
+
+from flask import request
+from werkzeug.serving import make_server
+
+from bemani.api import app
+from bemani.api.objects import RecordsObject
+from bemani.common import GameConstants, Time, VersionConstants
+from bemani.data import Server, UserID
+from bemani.data.api.client import APIClient
+from bemani.data.api.music import GlobalMusicData
+from bemani.data.interfaces import APIProviderInterface
+
+
+class CacheAPI(APIProviderInterface):
+    """
+    Stands in for APIData, keeping the remote cache in memory.
+    """
+
+    def __init__(self, servers: List[Server]) -> None:
+        self.servers = servers
+        self.cache: Dict[str, Dict[str, Any]] = {}
+
+    def get_all_servers(self) -> List[Server]:
+        return self.servers
+
+    def get_server_version(self) -> int:
+        return 0
+
+    def get_remote_cache(self, keys: List[str]) -> Dict[str, Tuple[int, Any]]:
+        return {key: (self.cache[key]['timestamp'], self.cache[key]['data']) for key in keys if key in self.cache}
+
+    def put_remote_cache(self, key: str, timestamp: int, data: Any) -> None:
+        self.cache[key] = {'timestamp': timestamp, 'refresh': 0, 'data': data}
+
+    def claim_remote_cache_refresh(self, key: str, timeout: int) -> bool:
+        if key in self.cache and self.cache[key]['refresh'] < Time.now() - timeout:
+            self.cache[key]['refresh'] = Time.now()
+            return True
+        return False
+
+
+class TestGlobalMusicData(unittest.TestCase):
+    """
+    Runs our own BEMAPI server on a few local ports to stand in for remote servers,
+    each of which can be told to answer slowly.
+    """
+
+    def setUp(self) -> None:
+        APIClient.close_all()
+        self.addCleanup(APIClient.close_all)
+
+        # How long each port should sleep before answering, for each request it gets.
+        self.delays: Dict[int, List[float]] = {}
+        self.requests: Dict[int, int] = {}
+        # Ports which fail every request, and an offset added to every score so we can
+        # tell fresh responses from old ones.
+        self.broken: Set[int] = set()
+        self.generation = 0
+
+        def data(config: Dict[str, Any]) -> Mock:
+            data = Mock()
+            data.local.api.validate_client.return_value = True
+            return data
+
+        def fetch(obj: RecordsObject, idtype: str, ids: List[Any], params: Dict[str, Any]) -> List[Dict[str, Any]]:
+            port = int(request.host.split(':')[1])
+            count = self.requests.get(port, 0)
+            self.requests[port] = count + 1
+            delays = self.delays.get(port, [])
+            time.sleep(delays[count] if count < len(delays) else 0.0)
+            if port in self.broken:
+                raise Exception('Server is broken!')
+            return [{
+                'cards': [f'E0040000{port:08d}' if idtype == 'server' else 'E004000000000001'],
+                'song': 1000,
+                'chart': 0,
+                'points': port + self.generation,
+                'timestamp': 10,
+                'updated': 10,
+                'status': 'nc',
+            }]
+
+        patchers: List[Any] = [
+            patch('bemani.api.app.Data', side_effect=data),
+            patch.object(RecordsObject, 'fetch_v1', autospec=True, side_effect=fetch),
+            patch.dict('bemani.api.app.config', {'support': {GameConstants.IIDX: True}}),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.servers = []
+        for _ in range(3):
+            server = make_server('127.0.0.1', 0, app, threaded=True)
+            thread = threading.Thread(target=server.serve_forever, daemon=True)
+            thread.start()
+            self.addCleanup(server.server_close)
+            self.addCleanup(server.shutdown)
+            self.servers.append(server)
+
+    def make_servers(self) -> List[Server]:
+        return [
+            Server(pos, 0, f'http://127.0.0.1:{server.server_port}', 'token', True, True)
+            for pos, server in enumerate(self.servers)
+        ]
+
+    def make_data(self, remote_budget: float) -> GlobalMusicData:
+        api = Mock()
+        api.get_all_servers.return_value = self.make_servers()
+        user = Mock()
+        user.get_cards.return_value = ['E004000000000001']
+        music = Mock()
+        music.get_score.return_value = None
+        return GlobalMusicData(api, user, music, remote_budget)
+
+    def make_cached_data(self, api: CacheAPI) -> GlobalMusicData:
+        user = Mock()
+        user.get_all_cards.return_value = []
+        music = Mock()
+        music.get_all_records.return_value = []
+        return GlobalMusicData(api, user, music, 5.0, 300)
+
+    def get_records(self, data: GlobalMusicData) -> List[int]:
+        records = data.get_all_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL)
+        return sorted(score.points for _, score in records)
+
+    def age_cache(self, api: CacheAPI) -> None:
+        for entry in api.cache.values():
+            entry['timestamp'] -= 600
+
+    def get_points(self, data: GlobalMusicData) -> int:
+        score = data.get_score(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, UserID(1), 1000, 0)
+        self.assertIsNotNone(score)
+        return score.points
+
+    def test_all_servers(self) -> None:
+        data = self.make_data(5.0)
+        self.assertEqual(self.get_points(data), max(server.server_port for server in self.servers))
+
+    def test_partial_results(self) -> None:
+        # The server with the best score is too slow, so we should go ahead with the rest.
+        slowest = max(self.servers, key=lambda server: server.server_port)
+        self.delays[slowest.server_port] = [3.0, 3.0]
+        data = self.make_data(1.0)
+
+        start = time.time()
+        points = self.get_points(data)
+        self.assertLess(time.time() - start, 2.0)
+        self.assertEqual(points, max(server.server_port for server in self.servers if server is not slowest))
+
+    def test_hedged_request(self) -> None:
+        # The first request to this server stalls, but a second copy answers right away.
+        slowest = max(self.servers, key=lambda server: server.server_port)
+        self.delays[slowest.server_port] = [3.0]
+        data = self.make_data(1.0)
+
+        start = time.time()
+        points = self.get_points(data)
+        self.assertLess(time.time() - start, 2.0)
+        self.assertEqual(points, slowest.server_port)
+        self.assertEqual(self.requests[slowest.server_port], 2)
+
+    def test_cached_records(self) -> None:
+        api = CacheAPI(self.make_servers())
+        ports = sorted(server.server_port for server in self.servers)
+
+        # The first request has to ask every server.
+        self.assertEqual(self.get_records(self.make_cached_data(api)), ports)
+        self.assertEqual(len(api.cache), 3)
+
+        # A later request, even from another data object, should be served entirely from cache.
+        self.generation = 100000
+        self.assertEqual(self.get_records(self.make_cached_data(api)), ports)
+        self.assertEqual(self.requests, {port: 1 for port in ports})
+
+    def test_server_changed(self) -> None:
+        api = CacheAPI(self.make_servers())
+        ports = sorted(server.server_port for server in self.servers)
+        self.get_records(self.make_cached_data(api))
+
+        # Once scores stop being shared with a server, its cached records shouldn't be used.
+        api.servers[0].allow_scores = False
+        self.assertEqual(len(self.get_records(self.make_cached_data(api))), 2)
+
+        # A new token means asking again rather than trusting what the old one was given.
+        api.servers[0].allow_scores = True
+        api.servers[1].token = 'newtoken'
+        self.generation = 100000
+        records = self.get_records(self.make_cached_data(api))
+        changed = api.servers[1].uri.split(':')[2]
+        self.assertEqual(records, sorted(
+            port + (100000 if str(port) == changed else 0) for port in ports
+        ))
+
+    def test_stale_records(self) -> None:
+        api = CacheAPI(self.make_servers())
+        ports = sorted(server.server_port for server in self.servers)
+        self.get_records(self.make_cached_data(api))
+
+        # Once entries are stale, we should get them back right away and refresh them behind the scenes.
+        self.age_cache(api)
+        self.generation = 100000
+        for server in self.servers:
+            self.delays[server.server_port] = [0.0, 0.5]
+        start = time.time()
+        self.assertEqual(self.get_records(self.make_cached_data(api)), ports)
+        self.assertLess(time.time() - start, 0.5)
+
+        # The next request in this process should save and use the refreshed entries.
+        expected = [port + 100000 for port in ports]
+        deadline = time.time() + 5.0
+        while True:
+            records = self.get_records(self.make_cached_data(api))
+            if records == expected or time.time() > deadline:
+                break
+            time.sleep(0.1)
+        self.assertEqual(records, expected)
+        self.assertEqual(self.requests, {port: 2 for port in ports})
+
+    def test_remote_failure(self) -> None:
+        api = CacheAPI(self.make_servers())
+        ports = sorted(server.server_port for server in self.servers)
+        broken = ports[0]
+        self.broken.add(broken)
+
+        # A server that fails with nothing cached is left out, and isn't cached as empty.
+        self.assertEqual(self.get_records(self.make_cached_data(api)), ports[1:])
+        self.assertEqual(len(api.cache), 2)
+
+        # Once it is cached, a failing server keeps being served from the stale entry.
+        self.broken = set()
+        self.assertEqual(self.get_records(self.make_cached_data(api)), ports)
+        self.broken.add(broken)
+        self.age_cache(api)
+        self.generation = 100000
+        self.get_records(self.make_cached_data(api))
+
+        expected = [broken] + [port + 100000 for port in ports[1:]]
+        deadline = time.time() + 5.0
+        while True:
+            records = self.get_records(self.make_cached_data(api))
+            if records == expected or time.time() > deadline:
+                break
+            time.sleep(0.1)
+        self.assertEqual(records, expected)
@@ -6,6 +6,7 @@ from unittest.mock import Mock
 from typing import List
 
 from bemani.backend.iidx.pendual import IIDXPendual
+from bemani.common import ValidatedDict
 from bemani.data import Score
 
 
@@ -70,3 +71,33 @@ class TestIIDXPendual(unittest.TestCase):
             self.__make_score([random.randint(0, 10) for _ in range(64)]),
         ], 64)
         self.assertEqual(sum(struct.unpack('b' * 64, ghost)), 0)
+
+    def test_clear_statistics(self) -> None:
+        self.assertIsNone(IIDXPendual.get_clear_statistics(ValidatedDict({'clear_status': IIDXPendual.CLEAR_STATUS_NO_PLAY})))
+        self.assertEqual(IIDXPendual.get_clear_statistics(ValidatedDict({})), (False, False))
+        self.assertEqual(IIDXPendual.get_clear_statistics(ValidatedDict({'clear_status': IIDXPendual.CLEAR_STATUS_FAILED})), (False, False))
+        self.assertEqual(IIDXPendual.get_clear_statistics(ValidatedDict({'clear_status': IIDXPendual.CLEAR_STATUS_HARD_CLEAR})), (True, False))
+        self.assertEqual(IIDXPendual.get_clear_statistics(ValidatedDict({'clear_status': IIDXPendual.CLEAR_STATUS_FULL_COMBO})), (True, True))
+
+    def test_clear_rates(self) -> None:
+        data = Mock()
+        data.local.music.get_clear_rates.return_value = {
+            1: {0: {'plays': 5, 'clears': 3, 'combos': 1, 'points': 5000}},
+        }
+        data.remote.music.get_clear_rates.return_value = {
+            1: {0: {'plays': 2, 'clears': 2, 'combos': 2}, 1: {'plays': 1, 'clears': 0, 'combos': 0}},
+        }
+        base = IIDXPendual(data, {}, Mock())
+
+        self.assertEqual(
+            base.get_clear_rates(2, 3),
+            {
+                1: {
+                    0: {'total': 7, 'clears': 5, 'fcs': 3},
+                    1: {'total': 1, 'clears': 0, 'fcs': 0},
+                },
+                2: {
+                    3: {'total': 0, 'clears': 0, 'fcs': 0},
+                },
+            },
+        )
@@ -0,0 +1,105 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import Mock, patch
+
+from bemani.data.mysql.machine import MachineData
+from bemani.data.types import Arcade, ArcadeID, Machine
+from bemani.tests.helpers import FakeCursor
+
+
+class TestMachineData(unittest.TestCase):
+
+    def setUp(self) -> None:
+        MachineData.MACHINE_CACHE.invalidate()
+        MachineData.ARCADE_CACHE.invalidate()
+
+    def make_machine(self, name: str) -> FakeCursor:
+        return FakeCursor([{
+            'id': 1,
+            'name': name,
+            'description': '',
+            'arcadeid': 5,
+            'port': 10000,
+            'game': None,
+            'version': None,
+            'data': '{"foo": "bar"}',
+        }])
+
+    def test_machine_cache(self) -> None:
+        machine = MachineData({}, None)
+        machine.execute = Mock(return_value=self.make_machine('Cabinet'))  # type: ignore
+        hits = MachineData.MACHINE_CACHE.hits
+
+        # Only the first lookup should hit the DB.
+        first = machine.get_machine('0123456789ABCDEF0123')
+        second = machine.get_machine('0123456789ABCDEF0123')
+        self.assertEqual(machine.execute.call_count, 1)
+        self.assertEqual(MachineData.MACHINE_CACHE.hits, hits + 1)
+        self.assertEqual(repr(first), repr(second))
+
+        # Modifying what we got back shouldn't modify the cache.
+        second.data['foo'] = 'baz'
+        self.assertEqual(machine.get_machine('0123456789ABCDEF0123').data['foo'], 'bar')
+
+        # Writing the machine should invalidate it.
+        machine.put_machine(second)
+        machine.execute = Mock(return_value=self.make_machine('Renamed'))  # type: ignore
+        self.assertEqual(machine.get_machine('0123456789ABCDEF0123').name, 'Renamed')
+        machine.destroy_machine('0123456789ABCDEF0123')
+        machine.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        self.assertIsNone(machine.get_machine('0123456789ABCDEF0123'))
+
+    def test_machine_cache_expires(self) -> None:
+        machine = MachineData({}, None)
+        machine.execute = Mock(return_value=self.make_machine('Cabinet'))  # type: ignore
+
+        with patch('bemani.data.cache.time.time', return_value=1000.0):
+            machine.get_machine('0123456789ABCDEF0123')
+            machine.get_machine('0123456789ABCDEF0123')
+        self.assertEqual(machine.execute.call_count, 1)
+
+        with patch('bemani.data.cache.time.time', return_value=1000.0 + MachineData.MACHINE_CACHE.ttl + 1):
+            machine.get_machine('0123456789ABCDEF0123')
+        self.assertEqual(machine.execute.call_count, 2)
+
+    def test_uncached_lookup(self) -> None:
+        machine = MachineData({}, None)
+        machine.execute = Mock(return_value=self.make_machine('Cabinet'))  # type: ignore
+        machine.get_machine('0123456789ABCDEF0123')
+
+        # Another process renamed it, so anything that saves the machine back has to see that.
+        machine.execute = Mock(return_value=self.make_machine('Renamed'))  # type: ignore
+        self.assertEqual(machine.get_machine('0123456789ABCDEF0123').name, 'Cabinet')
+        self.assertEqual(machine.get_machine('0123456789ABCDEF0123', cached=False).name, 'Renamed')
+        self.assertEqual(machine.execute.call_count, 1)
+
+        machine.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'name': 'Arcade', 'description': '', 'pin': '0000', 'data': '{}'}]),
+            FakeCursor([]),
+            FakeCursor([{'name': 'Arcade', 'description': '', 'pin': '1234', 'data': '{}'}]),
+            FakeCursor([]),
+        ])
+        machine.get_arcade(ArcadeID(5))
+        self.assertEqual(machine.get_arcade(ArcadeID(5), cached=False).pin, '1234')
+        self.assertEqual(machine.execute.call_count, 4)
+
+    def test_arcade_cache(self) -> None:
+        machine = MachineData({}, None)
+        machine.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'name': 'Arcade', 'description': '', 'pin': '0000', 'data': '{"paseli_enabled": true}'}]),
+            FakeCursor([{'userid': 1}]),
+        ])
+
+        arcade = machine.get_arcade(ArcadeID(5))
+        self.assertEqual(repr(machine.get_arcade(ArcadeID(5))), repr(arcade))
+        self.assertEqual(machine.execute.call_count, 2)
+
+        # Destroying an arcade unlinks its machines, so both caches should be dropped.
+        MachineData.MACHINE_CACHE.put('0123456789ABCDEF0123', Machine(1, '0123456789ABCDEF0123', '', '', ArcadeID(5), 10000, None, None, {}))
+        machine.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        machine.destroy_arcade(ArcadeID(5))
+        self.assertIsNone(MachineData.ARCADE_CACHE.get(ArcadeID(5)))
+        self.assertIsNone(MachineData.MACHINE_CACHE.get('0123456789ABCDEF0123'))
+
+        machine.put_arcade(Arcade(ArcadeID(6), 'Other', '', '0000', {}, []))
+        self.assertIsNone(machine.get_arcade(ArcadeID(6)))
@@ -0,0 +1,214 @@
+# vim: set fileencoding=utf-8
+import time
+import unittest
+from unittest.mock import Mock, patch
+from typing import Optional, Tuple
+
+from bemani.common import ValidatedDict
+from bemani.data.mysql.music import MusicData
+from bemani.data.types import UserID
+from bemani.tests.helpers import FakeCursor
+
+
+class TestMusicData(unittest.TestCase):
+
+    def setUp(self) -> None:
+        MusicData.MUSICID_CACHE.clear()
+
+    def test_musicid_cache(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'generation': 3}]),
+            FakeCursor([
+                {'id': 5, 'version': 1, 'songid': 10, 'chart': 2},
+                {'id': 6, 'version': 1, 'songid': 11, 'chart': 0},
+            ]),
+            FakeCursor([]),
+            FakeCursor([]),
+        ])
+
+        # The whole game's music IDs should be loaded once and then reused.
+        with patch('bemani.data.mysql.music.time.time', return_value=1000.0):
+            self.assertEqual(len(music.get_all_versions_of_song('game', 1, 10, 2)), 0)
+            self.assertEqual(len(music.get_all_versions_of_song('game', 1, 11, 0)), 0)
+        calls = [call[0] for call in music.execute.call_args_list]
+        self.assertEqual(len(calls), 4)
+        self.assertEqual(calls[2][1], {'musicid': 5})
+        self.assertEqual(calls[3][1], {'musicid': 6})
+
+        # Once the check interval passes, an unchanged generation shouldn't reload.
+        music.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'generation': 3}]),
+            FakeCursor([]),
+        ])
+        with patch('bemani.data.mysql.music.time.time', return_value=1000.0 + MusicData.MUSICID_CHECK_INTERVAL):
+            music.get_all_versions_of_song('game', 1, 10, 2)
+        self.assertEqual(music.execute.call_count, 2)
+        self.assertEqual(music.execute.call_args[0][1], {'musicid': 5})
+
+        # An import bumps the generation, so we should pick up new music IDs.
+        music.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'generation': 4}]),
+            FakeCursor([{'id': 7, 'version': 1, 'songid': 10, 'chart': 2}]),
+            FakeCursor([]),
+        ])
+        with patch('bemani.data.mysql.music.time.time', return_value=1000.0 + MusicData.MUSICID_CHECK_INTERVAL * 2):
+            music.get_all_versions_of_song('game', 1, 10, 2)
+        self.assertEqual(music.execute.call_args[0][1], {'musicid': 7})
+
+    def test_musicid_cache_miss(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([]),
+            FakeCursor([]),
+            FakeCursor([{'id': 8}]),
+            FakeCursor([]),
+            FakeCursor([]),
+        ])
+
+        # Songs missing from the loaded music IDs should be looked up and remembered.
+        music.get_all_versions_of_song('game', 1, 12, 3)
+        music.get_all_versions_of_song('game', 1, 12, 3)
+        self.assertEqual(music.execute.call_count, 5)
+        self.assertEqual(music.execute.call_args[0][1], {'musicid': 8})
+
+    def test_put_attempt_playcount(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(return_value=FakeCursor([{'id': 5}]))  # type: ignore
+        MusicData.MUSICID_CACHE['game'] = (0, time.time(), {(1, 10, 2): 5})
+
+        # Attempts by a user should bump that user's play count.
+        music.put_attempt('game', 1, UserID(1), 10, 2, 0, 12345, {}, False, timestamp=1234567890)
+        sql, params = music.execute.call_args_list[-1][0]
+        self.assertIn('score_playcount', sql)
+        self.assertEqual(params, {'userid': 1, 'musicid': 5})
+
+        # Anonymous attempts shouldn't.
+        music.execute.reset_mock()
+        music.put_attempt('game', 1, None, 10, 2, 0, 12345, {}, False, timestamp=1234567890)
+        self.assertEqual(music.execute.call_count, 1)
+        self.assertNotIn('score_playcount', music.execute.call_args_list[-1][0][0])
+
+    def test_put_attempt_statistics(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        MusicData.MUSICID_CACHE['game'] = (0, time.time(), {(1, 10, 2): 5})
+
+        # Attempts with statistics should be counted towards clear rates.
+        music.put_attempt('game', 1, None, 10, 2, 0, 12345, {}, False, timestamp=1234567890, statistics=(True, False))
+        sql, params = music.execute.call_args[0]
+        self.assertIn('score_statistics', sql)
+        self.assertEqual(params, {'musicid': 5, 'clears': 1, 'combos': 0, 'points': 12345})
+
+        # Attempts without them shouldn't.
+        music.execute.reset_mock()
+        music.put_attempt('game', 1, None, 10, 2, 0, 12345, {}, False, timestamp=1234567891)
+        self.assertNotIn('score_statistics', music.execute.call_args[0][0])
+
+    def test_get_clear_rates(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(return_value=FakeCursor([  # type: ignore
+            {'songid': 10, 'chart': 0, 'plays': 5, 'clears': 3, 'combos': 1, 'points': 5000},
+            {'songid': 10, 'chart': 1, 'plays': 2, 'clears': 0, 'combos': 0, 'points': 100},
+        ]))
+
+        self.assertEqual(
+            music.get_clear_rates('game', 1, songid=10),
+            {
+                10: {
+                    0: {'plays': 5, 'clears': 3, 'combos': 1, 'points': 5000},
+                    1: {'plays': 2, 'clears': 0, 'combos': 0, 'points': 100},
+                },
+            },
+        )
+        sql, params = music.execute.call_args[0]
+        self.assertNotIn('score_history', sql)
+        self.assertEqual(params['songid'], 10)
+
+    def test_rebuild_clear_rates(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([
+                {'id': 1, 'musicid': 5, 'points': 100, 'data': '{"clear": 0}'},
+                {'id': 2, 'musicid': 5, 'points': 200, 'data': '{"clear": 1}'},
+                {'id': 4, 'musicid': 5, 'points': 300, 'data': '{"clear": 2}'},
+            ]),
+            FakeCursor([
+                {'id': 7, 'musicid': 6, 'points': 400, 'data': '{}'},
+            ]),
+            FakeCursor([]),
+            FakeCursor([]),
+        ])
+
+        def classify(data: ValidatedDict) -> Optional[Tuple[bool, bool]]:
+            if 'clear' not in data:
+                return None
+            return (data.get_int('clear') >= 1, data.get_int('clear') >= 2)
+
+        # History should be read in batches, picking up after the last row we saw.
+        with patch.object(MusicData, 'CLEAR_RATE_BATCH', 3):
+            self.assertEqual(music.rebuild_clear_rates('game', classify), 1)
+        self.assertEqual(music.execute.call_args_list[0][0][1]['lastid'], 0)
+        self.assertEqual(music.execute.call_args_list[1][0][1]['lastid'], 4)
+        self.assertIn('DELETE', music.execute.call_args_list[2][0][0])
+        self.assertEqual(
+            music.execute.call_args_list[3][0][1],
+            {'musicid': 5, 'plays': 3, 'clears': 2, 'combos': 1, 'points': 600},
+        )
+
+    def test_get_score_rank(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'scorekey': 100, 'musicid': 5, 'points': 12345, 'timestamp': 1234567890}]),
+            FakeCursor([{'count': 6}]),
+            FakeCursor([]),
+        ])
+
+        # Our rank is one more than the number of scores ranked above ours.
+        self.assertEqual(music.get_score_rank('game', 1, UserID(1), 10, 2), 7)
+        sql, params = music.execute.call_args[0]
+        self.assertIn('COUNT', sql)
+        self.assertEqual(params, {'musicid': 5, 'points': 12345, 'timestamp': 1234567890, 'scorekey': 100})
+
+        # No score means no rank.
+        self.assertIsNone(music.get_score_rank('game', 1, UserID(2), 10, 2))
+
+    def test_get_score_neighbors(self) -> None:
+        music = MusicData({}, None)
+        music.get_ranked_scores = Mock(return_value=[])  # type: ignore
+
+        # Neighbors are centered on our rank unless that would run off the top.
+        for rank, start, limit, offset in [(7, 3, 9, 2), (2, 1, 6, 0)]:
+            music.get_score_rank = Mock(return_value=rank)  # type: ignore
+            self.assertEqual(music.get_score_neighbors('game', 1, UserID(1), 10, 2, 4), (start, []))
+            music.get_ranked_scores.assert_called_with('game', 1, 10, 2, limit, offset)
+
+        music.get_score_rank = Mock(return_value=None)  # type: ignore
+        self.assertEqual(music.get_score_neighbors('game', 1, UserID(1), 10, 2, 4), (None, []))
+
+    def test_get_all_scores(self) -> None:
+        music = MusicData({}, None)
+        music.execute = Mock(return_value=FakeCursor([{  # type: ignore
+            'userid': 1,
+            'scorekey': 100,
+            'songid': 10,
+            'chart': 2,
+            'points': 12345,
+            'timestamp': 1234567890,
+            'update': 1234567891,
+            'lid': 3,
+            'plays': 7,
+            'data': '{"medal": 1}',
+        }]))
+
+        for version in [None, 1]:
+            scores = music.get_all_scores('game', version, songid=10)
+            self.assertEqual(len(scores), 1)
+            userid, score = scores[0]
+            self.assertEqual(userid, 1)
+            self.assertEqual((score.id, score.chart, score.plays, score.data), (10, 2, 7, {'medal': 1}))
+
+            # Play counts should come from the maintained counts, not from history.
+            sql = music.execute.call_args[0][0]
+            self.assertNotIn('score_history', sql)
+            self.assertIn('score_playcount', sql)
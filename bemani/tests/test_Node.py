@@ -0,0 +1,100 @@
+# vim: set fileencoding=utf-8
+import time
+import tracemalloc
+import unittest
+from unittest.mock import Mock
+
+from bemani.backend.sdvx.heavenlyhaven import SoundVoltexHeavenlyHaven
+from bemani.data import Score
+from bemani.protocol import Node
+from bemani.tests.helpers import ExtendedTestCase
+
+
+class TestNode(unittest.TestCase):
+
+    def test_child_lookup(self) -> None:
+        root = Node.void('root')
+        first = Node.void('node')
+        first.add_child(Node.u8('value', 1))
+        second = Node.void('node')
+        second.add_child(Node.u8('value', 2))
+        second.add_child(Node.u8('other', 3))
+        root.add_child(first)
+        root.add_child(second)
+
+        # The first child by a given name wins, even for paths.
+        self.assertIs(root.child('node'), first)
+        self.assertEqual(root.child_value('node/value'), 1)
+        self.assertIsNone(root.child('node/other'))
+        self.assertIsNone(root.child('missing'))
+        self.assertIsNone(root.child('node/value/missing'))
+
+    def test_child_lookup_after_add(self) -> None:
+        root = Node.void('root')
+        self.assertIsNone(root.child('node'))
+
+        # Adding a child after a lookup should make it visible to further lookups.
+        node = Node.s32('node', 5)
+        root.add_child(node)
+        self.assertIs(root.child('node'), node)
+        root.add_child(Node.s32('node', 6))
+        self.assertEqual(root.child_value('node'), 5)
+
+    def test_slots(self) -> None:
+        with self.assertRaises(AttributeError):
+            Node.void('root').extra = 'value'  # type: ignore
+
+
+class TestNodeBenchmark(ExtendedTestCase):
+    """
+    Measures memory and lookup time of an SDVX score load response. Run with -v
+    to see the measurements.
+    """
+
+    def test_sdvx_load_m(self) -> None:
+        scores = [
+            Score(
+                0,
+                musicid,
+                chart,
+                9000000 + musicid,
+                1234567890,
+                1234567890,
+                0,
+                1,
+                {
+                    'clear_type': SoundVoltexHeavenlyHaven.CLEAR_TYPE_CLEAR,
+                    'grade': SoundVoltexHeavenlyHaven.GRADE_AAA,
+                    'stats': {
+                        'btn_rate': 100,
+                        'long_rate': 100,
+                        'vol_rate': 100,
+                    },
+                },
+            )
+            for musicid in range(1, 1500)
+            for chart in range(5)
+        ]
+        data = Mock()
+        data.remote.music.get_scores.return_value = scores
+        game = SoundVoltexHeavenlyHaven(data, {}, Mock())
+
+        request = Node.void('game')
+        request.add_child(Node.string('refid', '0123456789ABCDEF'))
+
+        tracemalloc.start()
+        root = game.handle_game_sv4_load_m_request(request)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        music = root.child('music')
+        self.assertEqual(len(music.children), len(scores))
+
+        start = time.time()
+        for _ in range(10000):
+            self.assertEqual(root.child_value('music/info/param')[0], 1)
+        lookup_time = time.time() - start
+
+        if self.verbose:
+            print(f"Peak memory building {len(scores)} scores: {peak / 1024:.0f}KB")
+            print(f"10000 path lookups: {lookup_time * 1000:.2f}ms")
@@ -1,7 +1,14 @@
 # vim: set fileencoding=utf-8
+import concurrent.futures
+import threading
+import time
 import unittest
+from unittest.mock import Mock, patch
 
-from bemani.common import Parallel
+from bemani.common import GameConstants, Parallel, VersionConstants
+from bemani.data import Server, UserID
+from bemani.data.api.client import APIClient
+from bemani.data.api.music import GlobalMusicData
 
 
 class TestParallel(unittest.TestCase):
@@ -93,3 +100,72 @@ class TestParallel(unittest.TestCase):
     def test_flatten(self) -> None:
         results = Parallel.flatten([[1, 2, 3], [4, 5, 6], [7, 8, 9], []])
         self.assertEqual(results, [1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_exception(self) -> None:
+        def fun(x: int) -> int:
+            if x == 3:
+                raise ValueError('Bad value!')
+            return x
+
+        with self.assertRaises(ValueError):
+            Parallel.map(fun, [1, 2, 3, 4, 5])
+
+    def test_nested(self) -> None:
+        # Nest deeper and wider than the executor has threads, which would deadlock if
+        # callers only waited for the executor to get to their work.
+        def fun(depth: int) -> int:
+            if depth == 0:
+                return 1
+            return sum(Parallel.map(fun, [depth - 1] * 4))
+
+        self.assertEqual(Parallel.execute([lambda: fun(3) for _ in range(Parallel.MAX_WORKERS * 2)]), [64] * Parallel.MAX_WORKERS * 2)
+
+    def test_timeout(self) -> None:
+        started = []
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def fun(x: int) -> int:
+            started.append(x)
+            release.wait(5)
+            return x
+
+        start = time.time()
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            Parallel.map(fun, list(range(Parallel.MAX_WORKERS * 4)), timeout=0.2)
+        self.assertLess(time.time() - start, 5)
+
+        # Anything that hadn't started when we timed out should never run.
+        release.set()
+        time.sleep(0.2)
+        self.assertLess(len(started), Parallel.MAX_WORKERS * 4)
+
+    def test_remote_score_thread_count(self) -> None:
+        Parallel.shutdown()
+        api = Mock()
+        api.get_all_servers.return_value = [
+            Server(serverid, 0, f'https://127.0.0.{serverid}', 'token', True, True)
+            for serverid in range(1, 4)
+        ]
+        user = Mock()
+        user.get_cards.return_value = ['E004000000000001', 'E004000000000002']
+        music = Mock()
+        music.get_score.return_value = None
+        data = GlobalMusicData(api, user, music)
+
+        original_start = threading.Thread.start
+        started = []
+
+        def start(thread: threading.Thread) -> None:
+            started.append(thread)
+            original_start(thread)
+
+        with patch.object(APIClient, 'get_records', return_value=[]) as get_records:
+            with patch.object(threading.Thread, 'start', autospec=True, side_effect=start):
+                for _ in range(10):
+                    data.get_score(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, UserID(1), 1000, 0)
+
+        # Each lookup fans out to every server for every card, which used to start a
+        # new thread for every callable. Now threads are shared and bounded.
+        self.assertEqual(get_records.call_count, 10 * 3 * 2)
+        self.assertLessEqual(len(started), Parallel.MAX_WORKERS + GlobalMusicData.MAX_REMOTE_CALLS)
@@ -40,3 +40,22 @@ class TestRC4Cipher(unittest.TestCase):
 
         plaintext = proto._EAmuseProtocol__rc4_crypt(cyphertext, key)
         self.assertEqual(data, plaintext)
+
+    def test_keystream_reuse(self) -> None:
+        key = bytes([random.randint(0, 255) for _ in range(16)])
+        short = bytes([random.randint(0, 255) for _ in range(512)])
+        long = bytes([random.randint(0, 255) for _ in range(4 * 1024)])
+        proto = EAmuseProtocol()
+
+        # Encrypting a short blob followed by a longer one with the same key
+        # should extend the keystream instead of restarting it.
+        shortcypher = proto._EAmuseProtocol__rc4_crypt(short, key)
+        longcypher = proto._EAmuseProtocol__rc4_crypt(long, key)
+        self.assertEqual(short, proto._EAmuseProtocol__rc4_crypt(shortcypher, key))
+        self.assertEqual(long, proto._EAmuseProtocol__rc4_crypt(longcypher, key))
+
+        # Prefix of the keystream should be identical regardless of length.
+        self.assertEqual(
+            proto._EAmuseProtocol__rc4_crypt(long[:512], key),
+            longcypher[:512],
+        )
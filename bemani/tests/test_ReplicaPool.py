@@ -0,0 +1,41 @@
+# vim: set fileencoding=utf-8
+import unittest
+from typing import Any, Optional
+from unittest.mock import MagicMock, patch
+
+from bemani.data.data import ReplicaPool
+
+
+class TestReplicaPool(unittest.TestCase):
+
+    def make_engine(self, lag: Optional[int], down: bool=False) -> Any:
+        engine = MagicMock()
+        conn = engine.connect.return_value.__enter__.return_value
+        if down:
+            conn.execute.side_effect = Exception('Lost connection to MySQL server')
+        else:
+            conn.execute.return_value.fetchone.return_value = {'Seconds_Behind_Master': lag}
+        return engine
+
+    def test_choose(self) -> None:
+        caught_up = self.make_engine(1)
+        pool = ReplicaPool([self.make_engine(60), caught_up, self.make_engine(None), self.make_engine(0, down=True)], 5)
+
+        # Only the replica that is caught up should ever be picked.
+        for _ in range(10):
+            self.assertIs(pool.choose(), caught_up)
+
+    def test_lag_rechecked(self) -> None:
+        engine = self.make_engine(60)
+        pool = ReplicaPool([engine], 5)
+
+        with patch('bemani.data.data.time.time', return_value=1000.0):
+            self.assertIsNone(pool.choose())
+            self.assertIsNone(pool.choose())
+        self.assertEqual(engine.connect.call_count, 1)
+
+        # Once it has caught up, we should notice on the next check.
+        engine.connect.return_value.__enter__.return_value.execute.return_value.fetchone.return_value = {'Seconds_Behind_Master': 0}
+        with patch('bemani.data.data.time.time', return_value=1000.0 + ReplicaPool.LAG_CHECK_INTERVAL):
+            self.assertIs(pool.choose(), engine)
+        self.assertEqual(engine.connect.call_count, 2)
@@ -0,0 +1,53 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import Mock, patch
+
+from bemani.data import Server
+from bemani.data.api.base import ServerRegistry
+
+
+class TestServerRegistry(unittest.TestCase):
+
+    def test_version_rechecked(self) -> None:
+        api = Mock()
+        api.get_server_version.return_value = 1
+        api.get_all_servers.return_value = [Server(1, 0, 'http://server1', 'token', True, True)]
+        registry = ServerRegistry()
+
+        with patch('bemani.data.api.base.time.time', return_value=1000.0):
+            clients = registry.clients(api)
+            self.assertIs(registry.clients(api), clients)
+        self.assertEqual(api.get_server_version.call_count, 1)
+        self.assertEqual(api.get_all_servers.call_count, 1)
+
+        # Once it's time to check again, an unchanged version shouldn't reload anything.
+        with patch('bemani.data.api.base.time.time', return_value=1000.0 + ServerRegistry.CHECK_INTERVAL):
+            self.assertIs(registry.clients(api), clients)
+        self.assertEqual(api.get_server_version.call_count, 2)
+        self.assertEqual(api.get_all_servers.call_count, 1)
+
+    def test_servers_changed(self) -> None:
+        api = Mock()
+        api.get_server_version.return_value = 1
+        api.get_all_servers.return_value = [
+            Server(1, 0, 'http://server1', 'token', True, True),
+            Server(2, 0, 'http://server2', 'token', True, True),
+        ]
+        registry = ServerRegistry()
+
+        with patch('bemani.data.api.base.time.time', return_value=1000.0):
+            server1, server2 = registry.clients(api)
+
+        # Changing one server should only replace that server's client.
+        api.get_server_version.return_value = 2
+        api.get_all_servers.return_value = [
+            Server(1, 0, 'http://server1', 'token', True, True),
+            Server(2, 0, 'http://server2', 'token', True, False),
+            Server(3, 0, 'http://server3', 'token', True, True),
+        ]
+        with patch('bemani.data.api.base.time.time', return_value=1000.0 + ServerRegistry.CHECK_INTERVAL):
+            clients = registry.clients(api)
+        self.assertEqual([client.base_uri for client in clients], ['http://server1', 'http://server2', 'http://server3'])
+        self.assertIs(clients[0], server1)
+        self.assertIsNot(clients[1], server2)
+        self.assertFalse(clients[1].allow_scores)
@@ -0,0 +1,82 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import Mock
+
+from bemani.data.mysql.user import UserData
+from bemani.data.types import UserID
+from bemani.tests.helpers import FakeCursor
+
+
+class TestUserData(unittest.TestCase):
+
+    def test_get_any_profiles(self) -> None:
+        user = UserData({}, None)
+        user.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([
+                # User 1 has the requested version, as well as a newer one.
+                {'userid': 1, 'version': 3, 'refid': 'A3'},
+                {'userid': 1, 'version': 2, 'refid': 'A2'},
+                # User 2 only has older versions, so we should get the newest.
+                {'userid': 2, 'version': 1, 'refid': 'B1'},
+                {'userid': 2, 'version': 0, 'refid': 'B0'},
+            ]),
+            FakeCursor([
+                {'userid': 1, 'version': 2, 'refid': 'A2', 'extid': 1111, 'data': '{"name": "ONE"}'},
+                {'userid': 2, 'version': 1, 'refid': 'B1', 'extid': 2222, 'data': '{"name": "TWO"}'},
+            ]),
+        ])
+
+        profiles = user.get_any_profiles('game', 2, [UserID(2), UserID(3), UserID(1)])
+
+        # Two queries no matter how many users we ask for.
+        self.assertEqual(user.execute.call_count, 2)
+        self.assertEqual(set(user.execute.call_args_list[1][0][1]['refids']), {'A2', 'B1'})
+
+        self.assertEqual([userid for userid, _ in profiles], [2, 3, 1])
+        self.assertEqual(profiles[0][1], {'refid': 'B1', 'extid': 2222, 'game': 'game', 'version': 1, 'name': 'TWO'})
+        self.assertIsNone(profiles[1][1])
+        self.assertEqual(profiles[2][1], {'refid': 'A2', 'extid': 1111, 'game': 'game', 'version': 2, 'name': 'ONE'})
+
+    def test_get_any_profiles_empty(self) -> None:
+        user = UserData({}, None)
+        user.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+
+        self.assertEqual(user.get_any_profiles('game', 2, []), [])
+        self.assertEqual(user.get_any_profiles('game', 2, [UserID(1)]), [(1, None)])
+        self.assertEqual(user.execute.call_count, 1)
+
+    def test_get_any_profiles_fields(self) -> None:
+        user = UserData({}, None)
+        user.execute = Mock(side_effect=[  # type: ignore
+            FakeCursor([{'userid': 1, 'version': 2, 'refid': 'A2'}]),
+            FakeCursor([
+                {'userid': 1, 'version': 2, 'refid': 'A2', 'extid': 1111, 'field0': '"ONE"', 'field1': None, 'field2': '{"__bytes__": "0102"}'},
+            ]),
+        ])
+
+        profiles = user.get_any_profiles('game', 2, [UserID(1)], fields=['name', 'shop_location', 'ghost'])
+
+        # Only the requested fields should be pulled out of the profile.
+        sql, params = user.execute.call_args_list[1][0]
+        self.assertNotIn('profile.data AS data', sql)
+        self.assertIn('JSON_EXTRACT(profile.data, :field0) AS field0', sql)
+        self.assertEqual(params['field0'], '$."name"')
+        self.assertEqual(params['field1'], '$."shop_location"')
+
+        # Fields missing from the profile are left out entirely.
+        self.assertEqual(profiles[0][1], {'refid': 'A2', 'extid': 1111, 'game': 'game', 'version': 2, 'name': 'ONE', 'ghost': b'\x01\x02'})
+
+    def test_get_all_profiles_fields(self) -> None:
+        user = UserData({}, None)
+        user.execute = Mock(return_value=FakeCursor([  # type: ignore
+            {'userid': 1, 'refid': 'A2', 'extid': 1111, 'field0': '51'},
+            {'userid': 2, 'refid': 'B2', 'extid': 2222, 'field0': None},
+        ]))
+
+        profiles = user.get_all_profiles('game', 2, fields=['loc'])
+
+        sql, params = user.execute.call_args_list[0][0]
+        self.assertIn('JSON_EXTRACT(profile.data, :field0) AS field0', sql)
+        self.assertEqual(params, {'field0': '$."loc"', 'game': 'game', 'version': 2})
+        self.assertEqual(profiles[0][1].get_int('loc', -1), 51)
+        self.assertEqual(profiles[1][1].get_int('loc', -1), -1)
@@ -1,7 +1,8 @@
 # vim: set fileencoding=utf-8
 import unittest
 
-from bemani.protocol.xml import XmlDecoder
+from bemani.protocol import Node
+from bemani.protocol.xml import XmlDecoder, XmlEncoding, XmlEncodingException, XmlExpatDecoder
 
 
 class TestXmlDecoder(unittest.TestCase):
@@ -112,3 +113,92 @@ class TestXmlDecoder(unittest.TestCase):
         self.assertEqual(tree.attributes, {})
         self.assertEqual(tree.data_type, 'u32')
         self.assertEqual(tree.value, [1, 2, 3, 4])
+
+
+class TestXmlExpatDecoder(unittest.TestCase):
+
+    def assertSameTree(self, data: bytes) -> None:
+        expected = XmlDecoder(data, 'ascii').get_tree()
+        xml = XmlExpatDecoder(data, 'ascii')
+        tree = xml.get_tree()
+
+        self.assertEqual(tree, expected)
+        self.assertNotEqual(tree, None)
+
+    def test_detect_encoding(self) -> None:
+        xml = XmlExpatDecoder(b'<?xml\nversion = "1.0"\tencoding   =   "shift-jis"?><node __type="str">\x93\xfa\x96\x7b</node>', 'ascii')
+        tree = xml.get_tree()
+
+        self.assertEqual(xml.encoding, 'shift-jis')
+        self.assertEqual(tree.value, '\u65e5\u672c')
+
+    def test_same_as_decoder(self) -> None:
+        self.assertSameTree(b'<node/>')
+        self.assertSameTree(b'<node attr1="foo"\nattr2="bar" attr3="&lt;&amp;&gt;"><child/></node>')
+        self.assertSameTree(b'<node __type="str"></node>')
+        self.assertSameTree(b'<node __type="str">&lt;tag&gt; &amp; text</node>')
+        self.assertSameTree(b'<node __type="bin"> D E A D B E E F </node>')
+        self.assertSameTree(b'<node __type="u32" __count="4">\n1\n2\n3\n4\n</node>')
+        self.assertSameTree(b'<node __type="bool" __count="3">1 0 1</node>')
+        self.assertSameTree(b'<node __type="3s16">1 -2 3</node>')
+        self.assertSameTree(b'<node __type="ip4">10.0.0.1</node>')
+        self.assertSameTree(b'<node><a __type="s8">-5</a>\n<b __type="u64">18446744073709551615</b></node>')
+
+    def test_self_closing(self) -> None:
+        # Our encoder never writes these, but XmlDecoder leaves their value unset, so older
+        # clients that do send them must see None rather than an empty value.
+        self.assertSameTree(b'<node __type="str"/>')
+        self.assertSameTree(b'<node __type="bin"/>')
+        self.assertSameTree(b'<node><a __type="str" /><b __type="bin"\n/><c __type="str" attr="/"></c></node>')
+        self.assertSameTree(b'<node><a><a __type="str"/></a><b __type="bin"></b></node>')
+
+        tree = XmlEncoding().decode(b'<node><a __type="str"/><b __type="bin"/><c __type="str"></c></node>')
+        self.assertEqual(tree.child_value('a'), None)
+        self.assertEqual(tree.child_value('b'), None)
+        self.assertEqual(tree.child_value('c'), '')
+
+    def test_normalized_text(self) -> None:
+        # Expat would change all of these, so they have to be left to XmlDecoder.
+        for data in [
+            b'<node __type="str">line1\r\nline2\rline3</node>',
+            b'<node attr="x\ty"/>',
+            b'<node attr="line1\nline2"/>',
+            b'<node attr=\'line1\r\nline2\'/>',
+            b'<node attr="&#13;&#10;"/>',
+            b'<node __type="str">&#65;&#x42;</node>',
+        ]:
+            with self.assertRaises(XmlEncodingException):
+                XmlExpatDecoder(data, 'ascii').get_tree()
+            self.assertEqual(XmlEncoding().decode(data), XmlDecoder(data, 'ascii').get_tree())
+
+        root = Node.void('root')
+        root.set_attribute('a', 'x\ty\r\nz')
+        root.add_child(Node.string('s', 'line1\r\nline2\rline3\tend'))
+        data = XmlEncoding().encode(root, encoding='utf-8')
+        self.assertEqual(XmlEncoding().decode(data), root)
+        self.assertEqual(XmlEncoding().decode(data), XmlDecoder(data, 'ascii').get_tree())
+
+    def test_malformed(self) -> None:
+        with self.assertRaises(XmlEncodingException):
+            XmlExpatDecoder(b'<node><child></node>', 'ascii').get_tree()
+        with self.assertRaises(XmlEncodingException):
+            XmlExpatDecoder(b'<node __type="bogus"/>', 'ascii').get_tree()
+
+        # The lenient decoder should still be used when expat gives up.
+        tree = XmlEncoding().decode(b'<node><child __type="s32">5</child></node><junk>')
+        self.assertEqual(tree, XmlDecoder(b'<node><child __type="s32">5</child></node>', 'ascii').get_tree())
+
+    def test_round_trip(self) -> None:
+        root = Node.void('root')
+        root.set_attribute('attr', '\u65e5\u672c & <friends>')
+        root.add_child(Node.string('str', 'value with spaces '))
+        root.add_child(Node.binary('bin', b'\x00\x01\xfe\xff'))
+        root.add_child(Node.s64_array('array', [-1, 0, 1]))
+        root.add_child(Node.bool('bool', False))
+        root.add_child(Node.float('float', 2.5))
+
+        for encoding in ['shift-jis', 'euc-jp', 'utf-8']:
+            data = XmlEncoding().encode(root, encoding=encoding)
+            xml = XmlExpatDecoder(data, 'ascii')
+            self.assertEqual(xml.get_tree(), root)
+            self.assertEqual(xml.encoding, encoding)
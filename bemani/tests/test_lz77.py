@@ -1,9 +1,12 @@
 # vim: set fileencoding=utf-8
 import os
 import random
+import time
 import unittest
 
-from bemani.protocol.lz77 import Lz77, Lz77Decompress
+from bemani.protocol import lz77 as lz77module
+from bemani.protocol.lz77 import Lz77, Lz77Compress, Lz77Decompress
+from bemani.tests.helpers import ExtendedTestCase
 
 
 class TestLZ77Decompressor(unittest.TestCase):
@@ -96,6 +99,19 @@ class TestLz77RealCompressor(unittest.TestCase):
         decompresseddata = lz77.decompress(compresseddata)
         self.assertEqual(data, decompresseddata)
 
+    def test_fast_level(self) -> None:
+        lz77 = Lz77()
+        for name in ["declaration.txt", "lorem.txt", "rawdata"]:
+            data = get_fixture(name)
+
+            fastdata = b"".join(Lz77Compress(data, level=Lz77Compress.LEVEL_FAST).compress_bytes())
+            bestdata = b"".join(Lz77Compress(data, level=Lz77Compress.LEVEL_BEST).compress_bytes())
+            self.assertTrue(len(fastdata) < len(data))
+            self.assertTrue(len(bestdata) <= len(fastdata))
+
+            self.assertEqual(data, lz77.decompress(fastdata))
+            self.assertEqual(data, lz77.decompress(bestdata))
+
     def test_known_compression(self) -> None:
         """
         Specifically tests for ability to compress an overlap,
@@ -108,3 +124,48 @@ class TestLz77RealCompressor(unittest.TestCase):
 
         decompresseddata = lz77.decompress(compresseddata)
         self.assertEqual(data, decompresseddata)
+
+
+class TestLz77DecompressBenchmark(ExtendedTestCase):
+    """
+    Compares the generator-based decompressor against the single buffer
+    decompressor and the C++ library (if compiled) on a profile-sized blob.
+    Run with -v to see timings.
+    """
+
+    def get_payload(self) -> bytes:
+        # Roughly 200KB of mixed text and binary, similar to a large profile save.
+        chunks = [get_fixture("declaration.txt"), get_fixture("lorem.txt"), get_fixture("rawdata")]
+        payload = b""
+        while len(payload) < 200 * 1024:
+            payload += random.choice(chunks) + os.urandom(random.randint(0, 64))
+        return payload
+
+    def test_decompress_paths(self) -> None:
+        data = self.get_payload()
+        compresseddata = b"".join(Lz77Compress(data).compress_bytes())
+
+        start = time.time()
+        generator = b"".join(Lz77Decompress(compresseddata).decompress_bytes())
+        generator_time = time.time() - start
+
+        start = time.time()
+        buffered = Lz77Decompress(compresseddata).decompress()
+        buffered_time = time.time() - start
+
+        self.assertEqual(data, generator)
+        self.assertEqual(data, buffered)
+
+        if lz77module.clib is not None:
+            start = time.time()
+            native = Lz77().decompress(compresseddata)
+            native_time = time.time() - start
+            self.assertEqual(data, native)
+        else:
+            native_time = None
+
+        if self.verbose:
+            print(f"Generator: {generator_time * 1000:.2f}ms")
+            print(f"Buffered: {buffered_time * 1000:.2f}ms")
+            if native_time is not None:
+                print(f"Native: {native_time * 1000:.2f}ms")
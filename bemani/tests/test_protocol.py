@@ -1,8 +1,10 @@
 # vim: set fileencoding=utf-8
+import struct
 import unittest
 from typing import Optional
 
 from bemani.protocol import EAmuseProtocol, Node
+from bemani.protocol.binary import BinaryEncoding, pack_node_name, unpack_node_name
 
 
 class TestProtocol(unittest.TestCase):
@@ -374,3 +376,27 @@ class TestProtocol(unittest.TestCase):
         root.add_child(unicode_node)
 
         self.assertLoopback(root)
+
+    def test_node_name_packing(self) -> None:
+        self.assertEqual(pack_node_name('call'), b'\x04\xa2lq')
+        self.assertEqual(pack_node_name('srcid'), b'\x05\xe3z.\xa4')
+        self.assertEqual(unpack_node_name(4, b'\xa2lq'), 'call')
+        self.assertEqual(unpack_node_name(5, b'\xe3z.\xa4'), 'srcid')
+
+        for name in ['a', 'ab', 'abc', 'abcd', 'test_node:name_with_0123456789', Node.NODE_NAME_CHARS]:
+            packed = pack_node_name(name)
+            self.assertEqual(packed[0], len(name))
+            self.assertEqual(unpack_node_name(packed[0], packed[1:]), name)
+
+    def test_truncated_binary(self) -> None:
+        root = Node.void('root')
+        root.add_child(Node.u8('byte', 1))
+        root.add_child(Node.string('string', 'hello'))
+        root.add_child(Node.s32_array('array', [1, 2, 3, 4]))
+        data = BinaryEncoding().encode(root, encoding=EAmuseProtocol.SHIFT_JIS)
+        self.assertEqual(BinaryEncoding().decode(data), root)
+
+        # Truncating anywhere in the header or body should fail to decode.
+        header_end = struct.unpack('>I', data[4:8])[0] + 8
+        for length in [*range(header_end), *range(header_end + 4, len(data))]:
+            self.assertIsNone(BinaryEncoding().decode(data[:length], skip_on_exceptions=True))
@@ -0,0 +1,127 @@
+import argparse
+import random
+import time
+import yaml  # type: ignore
+from typing import Any, Callable, Dict, List
+
+from bemani.data import Data
+
+
+# Game and version that seeded data is stored under, so it can't be mistaken for real data.
+GAME = 'benchmark'
+VERSION = 1
+
+
+def insert_many(data: Data, sql: str, rows: List[Dict[str, Any]]) -> None:
+    # Insert in batches so we don't build one gigantic statement.
+    for i in range(0, len(rows), 1000):
+        data.local.music.execute(sql, rows[i:(i + 1000)])  # type: ignore
+
+
+def seed(config: Dict[str, Any], users: int, songs: int, attempts: int) -> None:
+    data = Data(config)
+    cursor = data.local.music.execute("SELECT COUNT(*) AS count FROM score")
+    if cursor.fetchone()['count'] != 0:
+        raise Exception('Refusing to seed a database that already has scores in it, please use a scratch database!')
+
+    print(f'Seeding {songs} songs with 4 charts each for {users} users...')
+    musicids = list(range(1, (songs * 4) + 1))
+    insert_many(
+        data,
+        "INSERT INTO music (id, songid, chart, game, version) VALUES (:id, :songid, :chart, :game, :version)",
+        [
+            {'id': musicid, 'songid': (musicid - 1) // 4, 'chart': (musicid - 1) % 4, 'game': GAME, 'version': VERSION}
+            for musicid in musicids
+        ],
+    )
+
+    now = int(time.time())
+    for userid in range(1, users + 1):
+        scores: List[Dict[str, Any]] = []
+        history: List[Dict[str, Any]] = []
+        playcounts: List[Dict[str, Any]] = []
+        for musicid in random.sample(musicids, len(musicids) // 2):
+            plays = random.randint(1, attempts * 2)
+            scores.append({'userid': userid, 'musicid': musicid, 'points': random.randint(0, 1000000), 'timestamp': now, 'lid': 1})
+            history.extend(
+                {'userid': userid, 'musicid': musicid, 'points': 0, 'timestamp': now - play, 'lid': 1}
+                for play in range(plays)
+            )
+            playcounts.append({'userid': userid, 'musicid': musicid, 'plays': plays})
+
+        insert_many(
+            data,
+            "INSERT INTO score (userid, musicid, points, data, timestamp, `update`, lid) VALUES (:userid, :musicid, :points, '{}', :timestamp, :timestamp, :lid)",
+            scores,
+        )
+        insert_many(
+            data,
+            "INSERT INTO score_history (userid, musicid, points, data, timestamp, lid, new_record) VALUES (:userid, :musicid, :points, '{}', :timestamp, :lid, 0)",
+            history,
+        )
+        insert_many(
+            data,
+            "INSERT INTO score_playcount (userid, musicid, plays) VALUES (:userid, :musicid, :plays)",
+            playcounts,
+        )
+    data.close()
+
+
+def measure(name: str, iterations: int, func: Callable[[], int]) -> None:
+    start = time.time()
+    for _ in range(iterations):
+        rows = func()
+    duration = (time.time() - start) / iterations
+    print(f'{name}: {rows} rows in {duration * 1000:.2f}ms')
+
+
+def scores(config: Dict[str, Any], iterations: int) -> None:
+    data = Data(config)
+    userid = data.local.music.execute("SELECT MIN(userid) AS userid FROM score").fetchone()['userid']
+
+    # The query that get_all_scores() used to run, counting history for every score.
+    legacy_sql = (
+        "SELECT (SELECT songid FROM music WHERE music.id = score.musicid AND game = :game AND version = :version) AS songid, "
+        "(SELECT chart FROM music WHERE music.id = score.musicid AND game = :game AND version = :version) AS chart, "
+        "id AS scorekey, points, timestamp, `update`, lid, data, userid, "
+        "(SELECT COUNT(timestamp) FROM score_history WHERE score_history.musicid = score.musicid AND score_history.userid = score.userid) AS plays "
+        "FROM score WHERE musicid IN (SELECT DISTINCT(id) FROM music WHERE game = :game AND version = :version)"
+    )
+
+    def legacy(extra: str, params: Dict[str, Any]) -> int:
+        params.update({'game': GAME, 'version': VERSION})
+        return len(data.local.music.execute(legacy_sql + extra, params).fetchall())
+
+    measure('Legacy all scores', iterations, lambda: legacy('', {}))
+    measure('get_all_scores()', iterations, lambda: len(data.local.music.get_all_scores(GAME, VERSION)))
+    measure('Legacy scores for one user', iterations, lambda: legacy(' AND userid = :userid', {'userid': userid}))
+    measure('get_all_scores() for one user', iterations, lambda: len(data.local.music.get_all_scores(GAME, VERSION, userid=userid)))
+    data.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="A utility for benchmarking DB access patterns against a scratch database.")
+    parser.add_argument(
+        "operation",
+        help="Operation to perform, options include 'seed' and 'scores'.",
+        type=str,
+    )
+    parser.add_argument("-u", "--users", help="Number of users to seed. Defaults to 200.", type=int, default=200)
+    parser.add_argument("-s", "--songs", help="Number of songs to seed. Defaults to 1000.", type=int, default=1000)
+    parser.add_argument("-a", "--attempts", help="Average number of attempts per score to seed. Defaults to 5.", type=int, default=5)
+    parser.add_argument("-i", "--iterations", help="Number of times to run each query. Defaults to 5.", type=int, default=5)
+    parser.add_argument("-c", "--config", help="Core configuration. Defaults to server.yaml", type=str, default="server.yaml")
+    args = parser.parse_args()
+
+    config = yaml.safe_load(open(args.config))  # type: ignore
+    config['database']['engine'] = Data.create_engine(config)
+    if args.operation == "seed":
+        seed(config, args.users, args.songs, args.attempts)
+    elif args.operation == "scores":
+        scores(config, args.iterations)
+    else:
+        raise Exception(f"Unknown operation '{args.operation}'")
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,9 @@ import sys
 import yaml  # type: ignore
 from typing import Any, Dict, Optional
 
+from bemani.backend.iidx.base import IIDXBase
+from bemani.backend.museca.base import MusecaBase
+from bemani.backend.sdvx.base import SoundVoltexBase
 from bemani.data import Data, DBCreateException
 
 
@@ -68,11 +71,27 @@ def remove_admin(config: Dict[str, Any], username: Optional[str]) -> None:
     print(f'User {username} lost admin rights.')
 
 
+def backfill_clear_rates(config: Dict[str, Any]) -> None:
+    data = Data(config)
+    for game, classify in [
+        (IIDXBase.game, IIDXBase.get_clear_statistics),
+        (MusecaBase.game, MusecaBase.get_clear_statistics),
+        (SoundVoltexBase.game, SoundVoltexBase.get_clear_statistics),
+    ]:
+        with data.transaction():
+            count = data.local.music.rebuild_clear_rates(game, classify)
+        print(f'Counted clear rates for {count} songs in {game}.')
+    data.close()
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="A utility for working with databases created with this codebase.")
     parser.add_argument(
         "operation",
-        help="Operation to perform, options include 'create', 'generate', 'upgrade', 'change-password', 'add-admin' and 'remove-admin'.",
+        help=(
+            "Operation to perform, options include 'create', 'generate', 'upgrade', 'change-password', 'add-admin', 'remove-admin' " +
+            "and 'backfill-clear-rates'. Run 'backfill-clear-rates' with cabinets offline, since plays made while it runs may not be counted."
+        ),
         type=str,
     )
     parser.add_argument(
@@ -111,6 +130,8 @@ def main() -> None:
             remove_admin(config, args.username)
         elif args.operation == 'change-password':
             change_password(config, args.username)
+        elif args.operation == 'backfill-clear-rates':
+            backfill_clear_rates(config)
         else:
             raise Exception(f"Unknown operation '{args.operation}'")
     except DBCreateException as e:
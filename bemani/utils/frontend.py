@@ -78,6 +78,8 @@ def load_config(filename: str) -> None:
 
     config.update(yaml.safe_load(open(filename)))  # type: ignore
     config['database']['engine'] = Data.create_engine(config)
+    config['database']['replica_pool'] = Data.create_replica_pool(config)
+    config['database']['server_registry'] = Data.create_server_registry()
     app.secret_key = config['secret_key']
 
 
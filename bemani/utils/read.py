@@ -45,6 +45,21 @@ class ReadAPI(APIProviderInterface):
             )
         ]
 
+    def get_server_version(self) -> int:
+        # Our one server never changes.
+        return 0
+
+    # Imports are one-off, so there's nothing to gain from caching remote responses.
+
+    def get_remote_cache(self, keys: List[str]) -> Dict[str, Tuple[int, Any]]:
+        return {}
+
+    def put_remote_cache(self, key: str, timestamp: int, data: Any) -> None:
+        pass
+
+    def claim_remote_cache_refresh(self, key: str, timeout: int) -> bool:
+        return False
+
 
 class ImportBase:
 
@@ -72,6 +87,13 @@ class ImportBase:
         self.__batch = True
 
     def finish_batch(self) -> None:
+        if not self.__config['database'].get('read_only', False):
+            # Let running servers know that they need to reload the music table.
+            self.execute(
+                "INSERT INTO `music_generation` (game, generation) VALUES (:game, 1) " +
+                "ON DUPLICATE KEY UPDATE generation = generation + 1",
+                {'game': self.game},
+            )
         self.__session.commit()
         self.__batch = False
 
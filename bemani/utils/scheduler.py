@@ -68,6 +68,9 @@ def run_scheduled_work(config: Dict[str, Any]) -> None:
         oldest_event = Time.now() - keep_duration
         data.local.network.delete_events(oldest_event)
 
+    # Finally, forget about remote responses nobody has asked for in a while
+    data.local.api.delete_remote_cache(Time.now() - Time.SECONDS_IN_DAY)
+
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="A scheduler for work that needs to be done periodically.")
@@ -77,6 +80,8 @@ if __name__ == '__main__':
     # Set up global configuration
     config = yaml.safe_load(open(args.config))  # type: ignore
     config['database']['engine'] = Data.create_engine(config)
+    config['database']['replica_pool'] = Data.create_replica_pool(config)
+    config['database']['server_registry'] = Data.create_server_registry()
 
     # Run out of band work
     run_scheduled_work(config)
@@ -1,8 +1,8 @@
 import argparse
-import copy
+import threading
 import traceback
 import yaml  # type: ignore
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 from flask import Flask, request, redirect, Response, make_response
 
 from bemani.protocol import EAmuseProtocol
@@ -22,6 +22,24 @@ from bemani.data import Data
 app = Flask(__name__)
 config: Dict[str, Any] = {}
 
+# Long-lived per-process data provider and dispatcher, created on first use so
+# that forking servers don't share DB connections between workers.
+dataprovider: Optional[Data] = None
+dispatch: Optional[Dispatch] = None
+dispatch_lock = threading.Lock()
+
+
+def get_dispatch() -> Tuple[Data, Dispatch]:
+    global config
+    global dataprovider
+    global dispatch
+
+    with dispatch_lock:
+        if dataprovider is None or dispatch is None:
+            dataprovider = Data(config)
+            dispatch = Dispatch(config, dataprovider, True)
+        return dataprovider, dispatch
+
 
 @app.route('/', defaults={'path': ''}, methods=['GET'])
 @app.route('/<path:path>', methods=['GET'])
@@ -57,17 +75,9 @@ def receive_request(path: str) -> Response:
         # us up, so ignore this shit.
         return Response("Unrecognized packet!", 500)
 
-    # Create and format config
-    global config
-    requestconfig = copy.copy(config)
-    requestconfig['client'] = {
-        'address': remote_address or request.remote_addr,
-    }
-
-    dataprovider = Data(requestconfig)
+    dataprovider, dispatch = get_dispatch()
     try:
-        dispatch = Dispatch(requestconfig, dataprovider, True)
-        resp = dispatch.handle(req)
+        resp = dispatch.handle_encoded(req, proto, remote_address or request.remote_addr)
 
         if resp is None:
             # Nothing to do here
@@ -81,7 +91,7 @@ def receive_request(path: str) -> Response:
 
         compression = None
 
-        data = proto.encode(
+        data = proto.encode_body(
             compression,
             encryption,
             resp,
@@ -122,7 +132,8 @@ def receive_request(path: str) -> Response:
         )
         return Response("Crash when handling packet!", 500)
     finally:
-        dataprovider.close()
+        # Hand our connection back to the pool for the next request
+        dataprovider.release()
 
 
 def load_config(filename: str) -> None:
@@ -130,6 +141,7 @@ def load_config(filename: str) -> None:
 
     config.update(yaml.safe_load(open(filename)))  # type: ignore
     config['database']['engine'] = Data.create_engine(config)
+    config['database']['server_registry'] = Data.create_server_registry()
 
 
 def register_games() -> None:
@@ -96,6 +96,21 @@ setup(
                 extra_compile_args=["-std=c++14"],
                 extra_link_args=["-std=c++14"],
             ),
+            Extension(
+                "bemani.protocol.rc4",
+                [
+                    "bemani/protocol/rc4.py",
+                ]
+            ),
+            Extension(
+                "bemani.protocol.rc4alt",
+                [
+                    "bemani/protocol/rc4.cxx",
+                ],
+                language="c++",
+                extra_compile_args=["-std=c++14"],
+                extra_link_args=["-std=c++14"],
+            ),
             Extension(
                 "bemani.protocol.node",
                 [